@@ -0,0 +1,130 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Performance benchmarks.
+
+    python3 -m benchmarks [-k FILTER] [-o results.json] [--baseline baseline.json]
+
+Results are saved as JSON. When a baseline file is given, every benchmark
+slower than the baseline by more than its threshold is reported
+as a regression, and the exit code is 1.
+
+Thresholds are relative slowdowns (0.2 means 20% slower).
+Per-benchmark thresholds are read from `benchmarks/thresholds.json`,
+or from the file given with `--thresholds`.
+"""
+
+
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+
+
+THRESHOLDS_FILE = Path(__file__).parent / "thresholds.json"
+
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks", description="Anaouder performance benchmarks")
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="only run benchmarks whose name contains this string (repeatable)")
+    parser.add_argument("-o", "--output", type=Path, help="save the results to this JSON file")
+    parser.add_argument("-b", "--baseline", type=Path, help="compare the results with this JSON file")
+    parser.add_argument("--thresholds", type=Path, default=THRESHOLDS_FILE,
+                        help="JSON file of regression thresholds, by benchmark name")
+    parser.add_argument("--threshold", type=float,
+                        help="default regression threshold (overrides the thresholds file default)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repetitions")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum duration of a repetition, in seconds")
+    parser.add_argument("--no-gui", action="store_true",
+                        help="skip the benchmarks needing the main window")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    # Some modules import their siblings without the package prefix
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+    # Never touch the user's cache, and allow running without a display
+    os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="anaouder_bench_cache_")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from benchmarks.harness import (
+        registry, run_benchmarks, results_to_json, compare, format_time,
+        DEFAULT_THRESHOLD,
+    )
+    import benchmarks.bench_core
+    if not args.no_gui:
+        import benchmarks.bench_document
+
+    selected = [
+        bench for bench in registry
+        if not args.filter or any(f in bench.full_name for f in args.filter)
+    ]
+    if args.list:
+        for bench in selected:
+            print(bench.full_name)
+        return 0
+
+    def print_result(name, result):
+        print(f"{name:<50} {format_time(result.min):>12} {format_time(result.median):>12}", flush=True)
+
+    print(f"{'benchmark':<50} {'min':>12} {'median':>12}")
+    results = results_to_json(run_benchmarks(selected, args.repeat, args.min_time, print_result))
+
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as _fout:
+            json.dump(results, _fout, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline, 'r', encoding="utf-8") as _fin:
+        baseline = json.load(_fin)
+    thresholds = {}
+    if args.thresholds and args.thresholds.exists():
+        with open(args.thresholds, 'r', encoding="utf-8") as _fin:
+            thresholds = json.load(_fin)
+    default_threshold = thresholds.pop("default", DEFAULT_THRESHOLD)
+    if args.threshold is not None:
+        default_threshold = args.threshold
+
+    comparisons = compare(results, baseline, thresholds, default_threshold)
+    regressions = [c for c in comparisons if c.is_regression]
+
+    print()
+    print(f"{'benchmark':<50} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for c in comparisons:
+        flag = "  REGRESSION" if c.is_regression else ""
+        print(f"{c.name:<50} {format_time(c.baseline):>12} {format_time(c.current):>12} {c.ratio:>7.2f}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over threshold")
+        return 1
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Benchmarks of the functions that don't need a window:
+alignment, waveform scaling, file formats and cache.
+"""
+
+
+from itertools import cycle
+from pathlib import Path
+import random
+import tempfile
+
+from benchmarks.harness import benchmark
+from benchmarks.fixtures import (
+    ALI_FIXTURE, WAV_FIXTURE, DOCUMENT_SIZES, SEED,
+    load_language, make_document_data, make_sentence, make_tokens, make_token_stream, make_waveform,
+)
+
+from src.settings import WAVEFORM_SAMPLERATE
+
+
+
+_tmp_dir = tempfile.TemporaryDirectory(prefix="anaouder_bench_")
+TMP_DIR = Path(_tmp_dir.name)
+
+
+
+@benchmark("aligner/align_text_with_vosk_tokens", params=(20, 100, 300))
+def bench_align(n_words):
+    from src.aligner import align_text_with_vosk_tokens
+
+    load_language()
+    text = make_sentence(random.Random(SEED), n_words)
+    tokens = make_tokens(text)
+    return lambda: align_text_with_vosk_tokens(text, tokens)
+
+
+@benchmark("aligner/align_sentences", params=(100, 1_000))
+def bench_align_sentences(n_utterances):
+    """Alignment of a whole document on a long token stream"""
+    from src.aligner import align_sentences
+
+    load_language()
+    sentences = [text for text, _ in make_document_data(n_utterances)]
+    tokens = make_tokens(' '.join(sentences))
+    return lambda: align_sentences(sentences, tokens)
+
+
+@benchmark("waveform/ScaledWaveform.get", params=(50, 150, 1000))
+def bench_scaled_waveform(ppsec):
+    """
+    Draw requests of a 1000 pixels wide widget, scrolling through a one hour media.
+    Samples are memory-mapped from a cached waveform file, as in the application.
+    """
+    from src.waveform_widget import WaveformWidget
+    from src.cache_system import _write_waveform
+    from src.waveform_file import open_waveform
+
+    duration = 3600.0
+    width = 1000
+    path = TMP_DIR / "scaled_waveform.wf"
+    if not path.exists():
+        with path.open("wb") as _f:
+            _write_waveform(_f, make_waveform(duration, WAVEFORM_SAMPLERATE))
+    waveform = WaveformWidget.ScaledWaveform()
+    waveform.setSamples(open_waveform(path, WAVEFORM_SAMPLERATE), WAVEFORM_SAMPLERATE)
+    waveform.ppsec = ppsec
+
+    view_duration = width / ppsec
+    # Distinct positions, so the memoization is never used
+    positions = cycle([t * 0.37 for t in range(int((duration - view_duration) / 0.37))])
+
+    def scroll():
+        t_left = next(positions)
+        waveform.get(t_left, t_left + view_duration, width)
+    return scroll
+
+
+def _make_segment_store(size):
+    from src.segment_store import SegmentStore
+    return SegmentStore({i: segment for i, (_, segment) in enumerate(make_document_data(size))})
+
+
+@benchmark("segment/auto_segment", params=(600, 3600))
+def bench_auto_segment(duration):
+    """Segmentation of a whole media, in seconds"""
+    from src.auto_segment import auto_segment
+
+    samples = make_waveform(duration, WAVEFORM_SAMPLERATE)
+    return lambda: auto_segment(samples, 0, len(samples))
+
+
+@benchmark("segments/copy", params=DOCUMENT_SIZES)
+def bench_segments_copy(size):
+    """Snapshot of the segments of a document"""
+    store = _make_segment_store(size)
+    return store.copy
+
+
+@benchmark("segments/getSortedItems", params=DOCUMENT_SIZES)
+def bench_segments_sorted(size):
+    store = _make_segment_store(size)
+    return store.getSortedItems
+
+
+@benchmark("segments/getItemsInRange", params=DOCUMENT_SIZES)
+def bench_segments_in_range(size):
+    """Segments visible in a 30 seconds wide waveform, at random positions"""
+    store = _make_segment_store(size)
+    end = make_document_data(size)[-1][1][1]
+    rng = random.Random(SEED)
+    positions = cycle([rng.uniform(0.0, end - 30.0) for _ in range(1000)])
+
+    def query():
+        t = next(positions)
+        store.getItemsInRange(t, t + 30.0)
+    return query
+
+
+@benchmark("file/read_ali", params=("fixture",) + DOCUMENT_SIZES)
+def bench_read_ali(size):
+    from src.file_manager import FileManager
+    from src.ali_codec import write_ali
+
+    if size == "fixture":
+        path = ALI_FIXTURE
+    else:
+        path = TMP_DIR / f"read_{size}.ali"
+        with path.open('w', encoding="utf-8") as _fout:
+            write_ali(_fout, make_document_data(size), WAV_FIXTURE.name)
+
+    file_manager = FileManager()
+    return lambda: file_manager.read_ali_file(path)
+
+
+@benchmark("file/save_ali", params=DOCUMENT_SIZES)
+def bench_save_ali(size):
+    from src.file_manager import FileManager
+
+    data = make_document_data(size)
+    path = TMP_DIR / f"save_{size}.ali"
+    file_manager = FileManager()
+    return lambda: file_manager.save_ali_file(path, data, WAV_FIXTURE)
+
+
+@benchmark("export/format_srt", params=DOCUMENT_SIZES)
+def bench_format_srt(size):
+    from src.exports.textual_exporter import format_srt
+
+    utterances = [(text, tuple(segment)) for text, segment in make_document_data(size)]
+    return lambda: format_srt(utterances)
+
+
+@benchmark("cache/transcription_save", params=(10_000, 100_000))
+def bench_cache_save_transcription(n_tokens):
+    from src.cache_system import cache
+
+    tokens = make_token_stream(n_tokens)
+
+    def save():
+        cache.set_media_transcription(WAV_FIXTURE, tokens)
+        cache.flush()
+    return save
+
+
+@benchmark("cache/transcription_load", params=(10_000, 100_000))
+def bench_cache_load_transcription(n_tokens):
+    from src.cache_system import cache
+    from src.fingerprint import calculate_fingerprint
+
+    cache.set_media_transcription(WAV_FIXTURE, make_token_stream(n_tokens))
+    cache.flush()
+    fingerprint = calculate_fingerprint(WAV_FIXTURE)
+    return lambda: cache._get_transcription_from_disk(fingerprint)
+
+
+@benchmark("cache/waveform_save_load", params=(600, 3600))
+def bench_cache_waveform(duration):
+    """Write and open back the waveform of a media file, in seconds"""
+    from src.cache_system import _write_waveform
+    from src.waveform_file import open_waveform
+
+    samples = make_waveform(duration, WAVEFORM_SAMPLERATE)
+    path = TMP_DIR / f"waveform_{duration}.wf"
+
+    def save_load():
+        with path.open("wb") as _f:
+            _write_waveform(_f, samples)
+        open_waveform(path, WAVEFORM_SAMPLERATE)
+    return save_load
+
+
+@benchmark("cache/init")
+def bench_cache_init():
+    """Loading of the cache index, at application start"""
+    from src.cache_system import CacheSystem, cache
+
+    cache.get_media_metadata(WAV_FIXTURE)
+    cache.flush()
+
+    def init():
+        CacheSystem()._writer.shutdown()
+    return init
@@ -0,0 +1,107 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Benchmarks of the document controller and of the caption renderer.
+These need a QApplication and the main window.
+"""
+
+
+from itertools import cycle
+import random
+
+from benchmarks.harness import benchmark
+from benchmarks.fixtures import (
+    ALI_FIXTURE, DOCUMENT_SIZES, SEED,
+    get_main_window, load_document, load_language, make_document_data,
+)
+from benchmarks.bench_core import TMP_DIR
+
+
+
+@benchmark("document/loadDocumentData", params=DOCUMENT_SIZES)
+def bench_load_document(size):
+    data = make_document_data(size)
+    document = get_main_window().document_controller
+    return lambda: document.loadDocumentData(data)
+
+
+@benchmark("document/getSegmentsAtTime", params=DOCUMENT_SIZES)
+def bench_segments_at_time(size):
+    """Lookups at random positions, as done on every playback tick"""
+    document = load_document(size)
+    end = make_document_data(size)[-1][1][1]
+    rng = random.Random(SEED)
+    positions = cycle([rng.uniform(0.0, end) for _ in range(1000)])
+    return lambda: document.getSegmentsAtTime(next(positions))
+
+
+@benchmark("document/getCaptionAtTime", params=DOCUMENT_SIZES)
+def bench_caption_at_time(size):
+    """Caption lookups during playback, at 25 positions per second"""
+    document = load_document(size)
+    end = make_document_data(size)[-1][1][1]
+    positions = cycle([i * 0.04 for i in range(int(end / 0.04))])
+    return lambda: document.getCaptionAtTime(next(positions))
+
+
+@benchmark("document/getSnapshot", params=DOCUMENT_SIZES)
+def bench_snapshot(size):
+    """Snapshot for autosave, after editing one block"""
+    from PySide6.QtGui import QTextCursor
+
+    document = load_document(size)
+    document.getSnapshot()
+    text_document = document.text_widget.document()
+    block_numbers = cycle(range(0, text_document.blockCount(), 97))
+
+    def snapshot():
+        cursor = QTextCursor(text_document.findBlockByNumber(next(block_numbers)))
+        cursor.insertText("a")
+        cursor.deletePreviousChar()
+        return document.getSnapshot()
+    return snapshot
+
+
+@benchmark("document/getBlockById", params=DOCUMENT_SIZES)
+def bench_block_by_id(size):
+    document = load_document(size)
+    segment_ids = list(document.segments)
+    random.Random(SEED).shuffle(segment_ids)
+    segment_ids = cycle(segment_ids)
+    return lambda: document.getBlockById(next(segment_ids))
+
+
+@benchmark("render/render_frame", params=("empty", "caption"))
+def bench_render_frame(frame):
+    """Rendering of a frame of the fixture document, without and with a caption"""
+    from src.file_manager import FileManager
+    from src.services.caption_renderer import CaptionRenderer
+
+    load_language()
+    document = get_main_window().document_controller
+    document.setMediaPath(None)
+    document.loadDocumentData(FileManager().read_ali_file(ALI_FIXTURE)["document"])
+
+    renderer = CaptionRenderer(document)
+    renderer.set_output_dir(TMP_DIR / "renders")
+
+    start, end = document.getSegment(next(iter(document.segments)))
+    time_s = 0.0 if frame == "empty" else (start + end) / 2
+    frame_number = int(time_s * renderer.fps)
+    return lambda: renderer.render_frame(frame_number)
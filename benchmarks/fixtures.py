@@ -0,0 +1,146 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Data used by the benchmarks.
+
+Synthetic documents and transcriptions are generated from a fixed seed,
+so every run works on the same data.
+"""
+
+
+from typing import List, Optional, Tuple
+from functools import lru_cache
+from pathlib import Path
+import random
+
+import numpy as np
+
+from src.interfaces import Segment
+
+
+
+TESTS_DIR = Path(__file__).parent.parent / "tests"
+ALI_FIXTURE = TESTS_DIR / "MeliMilaMalou.ali"
+WAV_FIXTURE = TESTS_DIR / "MeliMilaMalou.wav"
+
+DOCUMENT_SIZES = (1_000, 10_000, 50_000)
+
+SEED = 1234
+
+WORDS = (
+    "ar", "an", "he", "e", "ha", "gant", "evit", "bremañ", "plac'hig", "gwenn",
+    "ruz", "glas", "brezhoneg", "ti", "kêr", "mor", "avel", "glav", "heol", "loar",
+    "mont", "dont", "ober", "lavarout", "gwelet", "kavout", "bez'", "emañ", "eo", "oa",
+    "kentañ", "diwezhañ", "bras", "bihan", "mat", "fall", "kalz", "nebeut", "hiziv", "warc'hoazh",
+)
+
+# Mean duration of a word and of the silence between utterances, in seconds
+WORD_DURATION = 0.3
+UTTERANCE_GAP = 0.5
+
+
+
+def load_language(language: str = "br") -> None:
+    """Text normalization for the alignment depends on the language"""
+    import src.lang as lang
+    lang.loadLanguage(language)
+
+
+def make_sentence(rng: random.Random, n_words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(n_words))
+
+
+@lru_cache(maxsize=None)
+def make_document_data(n_utterances: int) -> List[Tuple[str, Optional[Segment]]]:
+    """Generate a document of aligned utterances of 3 to 15 words"""
+    rng = random.Random(SEED)
+    data = []
+    t = 0.0
+    for _ in range(n_utterances):
+        n_words = rng.randint(3, 15)
+        duration = n_words * WORD_DURATION
+        data.append((make_sentence(rng, n_words), [round(t, 3), round(t + duration, 3)]))
+        t += duration + UTTERANCE_GAP
+    return data
+
+
+def make_tokens(text: str, start: float = 0.0, error_rate: float = 0.1) -> List[tuple]:
+    """
+    Generate a speech recognition transcription of a text,
+    with some words substituted to simulate recognition errors
+
+    Returns:
+        A list of tokens (start, end, word, confidence, language)
+    """
+    rng = random.Random(SEED)
+    tokens = []
+    t = start
+    for word in text.split():
+        if rng.random() < error_rate:
+            word = rng.choice(WORDS)
+        tokens.append((round(t, 3), round(t + WORD_DURATION, 3), word, rng.random(), "br"))
+        t += WORD_DURATION
+    return tokens
+
+
+@lru_cache(maxsize=None)
+def make_token_stream(n_tokens: int) -> List[tuple]:
+    """Transcription of a long media file"""
+    rng = random.Random(SEED)
+    return make_tokens(make_sentence(rng, n_tokens))
+
+
+@lru_cache(maxsize=None)
+def make_waveform(duration: float, sample_rate: int) -> np.ndarray:
+    """Noise with a varying amplitude, in the format of a rendered waveform"""
+    rng = np.random.default_rng(SEED)
+    n = int(duration * sample_rate)
+    envelope = np.abs(np.sin(np.linspace(0, duration, n)))
+    return (rng.uniform(-1.0, 1.0, n) * envelope).astype(np.float16)
+
+
+_main_window = None
+
+def get_main_window():
+    """
+    Shared application window, its document controller and text widget
+    are used by the document benchmarks
+    """
+    global _main_window
+    if _main_window is None:
+        from PySide6.QtWidgets import QApplication
+        from src.main import MainWindow
+        from src.ui.icons import loadIcons
+        from src.strings import app_strings
+
+        if QApplication.instance() is None:
+            QApplication([])
+        loadIcons()
+        app_strings.initialize()
+        _main_window = MainWindow()
+    return _main_window
+
+
+def load_document(n_utterances: int):
+    """Load a synthetic document in the shared window and return its document controller"""
+    window = get_main_window()
+    document = window.document_controller
+    document.clear()
+    document.loadDocumentData(make_document_data(n_utterances))
+    return document
@@ -0,0 +1,193 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Benchmark registry, timing and comparison with a baseline.
+
+A benchmark is a setup function, registered with the `benchmark` decorator,
+returning the callable to be timed. Setup time is never measured.
+
+    @benchmark("document/getBlockById", params=(1_000, 10_000))
+    def bench_get_block(n):
+        document = make_document(n)
+        return lambda: document.getBlockById(n // 2)
+"""
+
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+from dataclasses import dataclass, asdict
+from datetime import datetime
+import gc
+import platform
+import statistics
+import sys
+import timeit
+
+
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.2     # Relative slowdown considered as a regression
+
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable
+    param: object = None
+
+
+    @property
+    def full_name(self) -> str:
+        if self.param is None:
+            return self.name
+        return f"{self.name}[{self.param}]"
+
+
+
+@dataclass
+class BenchmarkResult:
+    min: float      # Seconds per call
+    median: float
+    mean: float
+    number: int     # Calls per repetition
+    repeat: int
+
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else 1.0
+
+    @property
+    def is_regression(self) -> bool:
+        return self.ratio > 1.0 + self.threshold
+
+
+
+registry: List[Benchmark] = []
+
+
+
+def benchmark(name: str, params: Sequence = (None,)) -> Callable:
+    """Register a benchmark setup function, once for every parameter"""
+    def decorator(setup):
+        for param in params:
+            registry.append(Benchmark(name, setup, param))
+        return setup
+    return decorator
+
+
+def time_callable(func: Callable, repeat: int = 5, min_time: float = 0.2) -> BenchmarkResult:
+    """
+    Time a callable, the number of calls per repetition is chosen
+    so that a repetition lasts at least `min_time` seconds
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time or number >= 1_000_000:
+            break
+        number *= 10
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times = [t / number for t in timer.repeat(repeat, number)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return BenchmarkResult(
+        min=min(times),
+        median=statistics.median(times),
+        mean=statistics.fmean(times),
+        number=number,
+        repeat=repeat,
+    )
+
+
+def run_benchmarks(
+        benchmarks: List[Benchmark],
+        repeat: int = 5,
+        min_time: float = 0.2,
+        on_result: Optional[Callable[[str, BenchmarkResult], None]] = None
+    ) -> Dict[str, BenchmarkResult]:
+    results = dict()
+    for bench in benchmarks:
+        func = bench.setup() if bench.param is None else bench.setup(bench.param)
+        result = time_callable(func, repeat, min_time)
+        results[bench.full_name] = result
+        if on_result:
+            on_result(bench.full_name, result)
+    return results
+
+
+def results_to_json(results: Dict[str, BenchmarkResult]) -> dict:
+    return {
+        "version": RESULTS_VERSION,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": { name: asdict(result) for name, result in results.items() },
+    }
+
+
+def compare(
+        current: dict,
+        baseline: dict,
+        thresholds: Optional[Dict[str, float]] = None,
+        default_threshold: float = DEFAULT_THRESHOLD,
+        stat: str = "min"
+    ) -> List[Comparison]:
+    """
+    Compare two result files (as loaded from JSON).
+    Benchmarks missing from either side are ignored.
+
+    Thresholds are relative slowdowns, indexed by benchmark name.
+    A name without parameter applies to every parameter of this benchmark.
+    """
+    thresholds = thresholds or {}
+    comparisons = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        threshold = thresholds.get(
+            name,
+            thresholds.get(name.split('[')[0], default_threshold)
+        )
+        comparisons.append(Comparison(
+            name,
+            baseline["results"][name][stat],
+            result[stat],
+            threshold,
+        ))
+    return comparisons
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
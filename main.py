@@ -47,8 +47,6 @@ logging.basicConfig(
 )
 
 
-from src.main import main
-
 
 if __name__ == "__main__":
     argv = sys.argv
@@ -57,6 +55,27 @@ if __name__ == "__main__":
         i = argv.index("--debug")
         argv.pop(i)
 
+    if "--batch" in argv:
+        # Headless processing, the GUI modules are never imported
+        argv.remove("--batch")
+        from src.batch import main as batch_main
+        sys.exit(batch_main(argv[1:]))
+
+    if "--import-time" in argv:
+        # Report which modules slow down the application start
+        from src.import_time import main as import_time_main
+        sys.exit(import_time_main())
+
+    from src.main import main
+
+    # Trace recording, saved on exit (and with Ctrl+Alt+Shift+T)
+    trace_arg = next((arg for arg in argv if arg.startswith("--trace")), None)
+    if trace_arg is not None:
+        argv.remove(trace_arg)
+        from src.tracing import tracer
+        _, _, trace_path = trace_arg.partition('=')
+        tracer.enable(output_path=trace_path or None)
+
     profiling = False
     if "--profile" in argv:
         i = argv.index("--profile")
@@ -68,6 +87,9 @@ if __name__ == "__main__":
         profiler.enable()
     
     ret = main(argv)
+
+    if trace_arg is not None:
+        tracer.save()
     
     if profiling:
         profiler.disable()
@@ -0,0 +1,156 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Reader and writer for the ALI file format.
+
+An ALI file is a text file with one utterance (or comment, or metadata) per line.
+Aligned utterances end with a timecode metadata: `{start: 1.2; end: 3.4}`.
+The associated media file is given by a `{media-path: ...}` metadata.
+
+Most lines hold no metadata at all, so lines without a `{` character
+are passed through without running any regex on them.
+"""
+
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+from pathlib import Path
+import re
+
+from ostilhou.asr.dataset import format_timecode
+
+from src.utils import LINE_BREAK
+from src.interfaces import Segment
+
+
+TIMECODE_PATTERN = re.compile(r"{\s*start\s*:\s*([0-9\.]+)\s*;\s*end\s*:\s*([0-9\.]+)\s*}")
+MEDIA_PATH_PATTERN = re.compile(r"{\s*(media|audio)\-path\s*:\s*(.*?)\s*}")
+
+WRITE_BATCH_SIZE = 1024     # Number of lines written at once
+
+
+
+def decode_line(line: str) -> Tuple[str, Optional[Segment], Optional[str]]:
+    """
+    Parse a single line of an ALI file
+
+    Returns:
+        A tuple of (text, segment or None, media path or None)
+    """
+    line = line.strip()
+
+    if '{' not in line:
+        # Fast path, regular text or comments
+        return (line, None, None)
+
+    media_path = None
+    if "-path" in line and (match := MEDIA_PATH_PATTERN.search(line)):
+        media_path = match[2]
+
+    # Timecodes are usually found at the end of the line
+    match = TIMECODE_PATTERN.match(line, line.rfind('{')) or TIMECODE_PATTERN.search(line)
+    if match:
+        # Remove timecodes from text
+        text = line[:match.start()] + line[match.end():]
+        text = text.strip().replace(LINE_BREAK, "<br>")
+        return (text, [float(match[1]), float(match[2])], media_path)
+
+    # Metadata only
+    return (line, None, media_path)
+
+
+def iter_decode(lines: Iterable[str]) -> Iterator[Tuple[str, Optional[Segment], Optional[str]]]:
+    """Parse lines of an ALI file, lazily"""
+    for line in lines:
+        yield decode_line(line)
+
+
+def read_ali(file_path: Path) -> Tuple[List[Tuple[str, Optional[Segment]]], Optional[str]]:
+    """
+    Read an ALI file, streaming it line by line
+
+    Returns:
+        A tuple of:
+            * The list of (text, segment) of every line
+            * The first media path found in metadata, relative to the file, or None
+
+    Raise:
+        IOError
+    """
+    parsed_data = []
+    media_path = None
+    append = parsed_data.append
+
+    with file_path.open('r', encoding="utf-8") as _fin:
+        for text, segment, line_media_path in iter_decode(_fin):
+            if line_media_path and not media_path:
+                media_path = line_media_path
+            append((text, segment))
+
+    return parsed_data, media_path
+
+
+def encode_line(text: str, segment: Optional[Segment]) -> str:
+    if segment:
+        start, end = segment
+        return f"{text} {{start: {format_timecode(start)}; end: {format_timecode(end)}}}\n"
+    return text + '\n'
+
+
+def iter_encode(
+        blocks_data: Iterable[Tuple[str, Optional[Segment]]],
+        media_name: Optional[str] = None
+    ) -> Iterator[str]:
+    """
+    Format document blocks as lines of an ALI file, lazily
+
+    Args:
+        blocks_data: text and segment of every block
+        media_name: write a media-path metadata, replacing the existing one
+    """
+    if media_name:
+        # Write media-path metadata if provided
+        yield f"{{media-path: {media_name}}}\n"
+
+    must_strip_media_path = bool(media_name)
+    for text, segment in blocks_data:
+        # Remove the previous media-path metadata if necessary
+        if must_strip_media_path and '{' in text:
+            match = MEDIA_PATH_PATTERN.search(text)
+            if match:
+                # Strip the media-path metadata from the rest of the string
+                text = text[:match.start()] + text[match.end():]
+                must_strip_media_path = False
+                if not text.strip():
+                    continue
+        yield encode_line(text, segment)
+
+
+def write_ali(
+        _fout: TextIO,
+        blocks_data: Iterable[Tuple[str, Optional[Segment]]],
+        media_name: Optional[str] = None
+    ) -> None:
+    """Write document blocks to a text file, in batches of lines"""
+    batch = []
+    for line in iter_encode(blocks_data, media_name):
+        batch.append(line)
+        if len(batch) >= WRITE_BATCH_SIZE:
+            _fout.write(''.join(batch))
+            batch.clear()
+    if batch:
+        _fout.write(''.join(batch))
@@ -17,23 +17,27 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 
-from typing import List
+from __future__ import annotations
+from typing import List, TYPE_CHECKING
 import logging
 import re
-import jiwer
 from math import inf
 
 from PySide6.QtCore import QRunnable, Signal, QObject, QThread
 from PySide6.QtGui import QTextBlock
 
 from src.ui.progess_dialog import ProgressDialog
-from src.services.media_player_controller import MediaPlayerController
-from src.transcriber import TranscriptionService
-from src.interfaces import DocumentInterface
-from src.commands import AlignBlockWithSegment
+from src.interfaces import DocumentInterface, Segment
+from src.commands import AlignBlocksBatchCommand
 from src.cache_system import cache
 from src.lang import prepTextForAlignment
 from src.utils import PUNCTUATION, filter_out_chars, yellow
+from src.tracing import traced
+
+if TYPE_CHECKING:
+    # Not imported at runtime, so alignment functions can be used headless
+    from src.services.media_player_controller import MediaPlayerController
+    from src.transcriber import TranscriptionService
 
 
 
@@ -136,6 +140,8 @@ def smart_split_time(text: str, timepos: float, vosk_tokens: list) -> tuple:
         # We could take advantage of that to avoid redundant calls
         raise SmartSplitError("CER is too high")
 
+    import jiwer
+
     # Find the best location to split the transcribed sentence
     idx = 0
     for t_start, t_end, word, _, _ in vosk_tokens:
@@ -168,6 +174,8 @@ def smart_split_time(text: str, timepos: float, vosk_tokens: list) -> tuple:
 
 
 def can_smart_split(text: str, vosk_tokens: list):
+    import jiwer # Slow to import, only needed here
+
     # Simplify text representation
     gt = prep_sentence(text)
     hyp = prep_sentence(' '.join([t[2] for t in vosk_tokens]))
@@ -238,55 +246,11 @@ class TextAlignerThread(QThread):
         QThread.currentThread().setPriority(QThread.Priority.HighPriority)
 
         try:
-            text = "|| " + " || ".join(self.sentences) + " || "
-            
-            alignment = align_text_with_vosk_tokens(text, self.tokens, cancel_check=lambda: self._must_stop)
+            segments = align_sentences(self.sentences, self.tokens, cancel_check=lambda: self._must_stop)
 
             if self._must_stop:
                 return
 
-            # Separating into segments
-            segments = []
-            segment_tokens = []
-            for al in alignment:
-                if al[0] is None:
-                    continue
-                if al[0] == "||":
-                    # print("||")
-                    if segment_tokens:
-                        first_idx = 0
-                        last_idx = len(segment_tokens) - 1
-                        first_token = segment_tokens[first_idx][1]
-                        last_token = segment_tokens[last_idx][1]
-                        # Skip first tokens if they align to None
-                        while (first_token is None) and (first_idx < last_idx):
-                            first_idx += 1
-                            first_token = segment_tokens[first_idx][1]
-                        # Skip last tokens if they align to None
-                        while (last_token is None) and (first_idx < last_idx):
-                            last_idx -= 1
-                            last_token = segment_tokens[last_idx][1]
-
-                        if not (first_token or last_token):
-                            segments.append(None)
-                            segment_tokens.clear()
-                            continue
-                        
-                        if first_token:
-                            segment_start = first_token[1]
-                        else:
-                            segment_start = last_token[1]
-                        
-                        if last_token:
-                            segment_end = last_token[2]
-                        else:
-                            segment_end = first_token[2]
-                        
-                        segments.append([segment_start, segment_end])
-                        segment_tokens.clear()
-                    continue
-                segment_tokens.append(al)
-
             self.segments = segments
             self.finished.emit(segments)
         
@@ -306,6 +270,8 @@ def align_text_with_vosk_tokens(text: str, vosk_tokens: list, cancel_check=None)
         list of tuple, where each tuple represent an alignment candidate
             with the format (ground_truth_word, (hyp_word, start, end))
     """
+    import jiwer # Slow to import, only needed here
+
     # Simplify text representation
     gt_words = prep_sentence(text, remove_spaces=False).split()
 
@@ -364,6 +330,68 @@ def align_text_with_vosk_tokens(text: str, vosk_tokens: list, cancel_check=None)
 
 
 
+@traced("align sentences", "alignment")
+def align_sentences(sentences: List[str], vosk_tokens: list, cancel_check=None) -> List[Segment | None]:
+    """
+    Find the segment of every sentence in a transcription.
+
+    Args:
+        sentences: ground truth sentences
+        vosk_tokens: list of tuples (start_time, end_time, word, confidence, language)
+    
+    Returns:
+        A segment for every sentence, or None if the sentence couldn't be aligned
+    """
+    text = "|| " + " || ".join(sentences) + " || "
+    
+    alignment = align_text_with_vosk_tokens(text, vosk_tokens, cancel_check=cancel_check)
+
+    # Separating into segments
+    segments = []
+    segment_tokens = []
+    for al in alignment:
+        if al[0] is None:
+            continue
+        if al[0] == "||":
+            # print("||")
+            if segment_tokens:
+                first_idx = 0
+                last_idx = len(segment_tokens) - 1
+                first_token = segment_tokens[first_idx][1]
+                last_token = segment_tokens[last_idx][1]
+                # Skip first tokens if they align to None
+                while (first_token is None) and (first_idx < last_idx):
+                    first_idx += 1
+                    first_token = segment_tokens[first_idx][1]
+                # Skip last tokens if they align to None
+                while (last_token is None) and (first_idx < last_idx):
+                    last_idx -= 1
+                    last_token = segment_tokens[last_idx][1]
+
+                if not (first_token or last_token):
+                    segments.append(None)
+                    segment_tokens.clear()
+                    continue
+                
+                if first_token:
+                    segment_start = first_token[1]
+                else:
+                    segment_start = last_token[1]
+                
+                if last_token:
+                    segment_end = last_token[2]
+                else:
+                    segment_end = first_token[2]
+                
+                segments.append([segment_start, segment_end])
+                segment_tokens.clear()
+            continue
+        segment_tokens.append(al)
+    
+    return segments
+
+
+
 class TextAligner(QObject):
     error_msg = Signal(str)
 
@@ -437,14 +465,19 @@ class TextAligner(QObject):
                 self.alignment_thread.cancel()
 
         def on_alignment_complete(segments):
-            self.undo_stack.beginMacro("Auto alignment")
-            for i, segment in enumerate(segments):
-                if segment is None:
-                    continue
+            aligned = [
+                (blocks[i], segment) for i, segment in enumerate(segments)
+                if segment is not None
+            ]
+            if aligned:
                 self.undo_stack.push(
-                    AlignBlockWithSegment(self.document_controller, blocks[i], segment)
+                    AlignBlocksBatchCommand(
+                        self.document_controller,
+                        self.document_controller.text_widget,
+                        [ block for block, _ in aligned ],
+                        [ segment for _, segment in aligned ]
+                    )
                 )
-            self.undo_stack.endMacro()
 
             # Close loading dialog
             if self.loading_dialog is not None:
@@ -0,0 +1,156 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Frame loop for animated widgets.
+
+The timer only runs while something is animating, it is started by `wake`
+and stops by itself once the widget stays idle.
+Animation steps are given the time elapsed since the previous frame,
+so animations run at the same speed whatever the timer precision.
+"""
+
+
+import logging
+from collections import deque
+from typing import Callable, NamedTuple
+import time
+
+from PySide6.QtCore import QObject, Qt, QTimer
+from PySide6.QtGui import QGuiApplication
+
+from src.settings import UI_MAX_FPS
+from src.tracing import tracer
+
+
+
+log = logging.getLogger(__name__)
+
+
+# Longest time step given to an animation (in seconds),
+# so it doesn't jump after the application was busy
+MAX_FRAME_DT = 0.1
+
+# The timer is stopped after this long without activity (in seconds)
+IDLE_TIMEOUT = 0.5
+
+# Number of frames kept for the statistics
+STATS_WINDOW = 120
+
+
+
+def frame_interval_ms(max_fps: float = UI_MAX_FPS) -> int:
+    """Timer interval following the refresh rate of the screen, in ms"""
+    fps = max_fps
+    screen = QGuiApplication.primaryScreen()
+    if screen is not None and screen.refreshRate() > 0:
+        fps = min(fps, screen.refreshRate())
+    return max(1, round(1000 / fps))
+
+
+
+class FrameStats(NamedTuple):
+    frames: int             # Frames since the controller was created
+    fps: float              # Frame rate over the last frames, while running
+    mean_interval_ms: float # Time between consecutive frames
+    max_interval_ms: float
+    mean_step_ms: float     # Time spent in the animation step
+    max_step_ms: float
+
+
+
+class AnimationController(QObject):
+    """
+    Calls `step(dt)` once per frame while animations are running.
+    `step` returns True as long as it has more frames to animate.
+    """
+
+    def __init__(
+            self,
+            step: Callable[[float], bool],
+            parent=None,
+            name: str = "animation",
+            max_fps: float = UI_MAX_FPS,
+            time_source: Callable[[], float] = time.perf_counter
+        ):
+        super().__init__(parent)
+        self.step = step
+        self.name = name
+        self.max_fps = max_fps
+        self.time_source = time_source
+
+        self.frames = 0
+        self._last_frame_time = 0.0
+        self._last_activity = 0.0
+        self._intervals = deque(maxlen=STATS_WINDOW)
+        self._step_durations = deque(maxlen=STATS_WINDOW)
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.onFrame)
+
+
+    def isRunning(self) -> bool:
+        return self.timer.isActive()
+
+
+    def wake(self) -> None:
+        """Something changed, start the frame loop if it was idle"""
+        now = self.time_source()
+        self._last_activity = now
+        if not self.timer.isActive():
+            self._last_frame_time = now
+            self.timer.start(frame_interval_ms(self.max_fps))
+
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+
+    def onFrame(self) -> None:
+        now = self.time_source()
+        interval = now - self._last_frame_time
+        self._last_frame_time = now
+
+        busy = self.step(min(interval, MAX_FRAME_DT))
+
+        end = self.time_source()
+        self.frames += 1
+        self._intervals.append(interval)
+        self._step_durations.append(end - now)
+        tracer.counter(f"{self.name} frame", interval_ms=interval * 1000, step_ms=(end - now) * 1000)
+
+        if busy:
+            self._last_activity = end
+        elif end - self._last_activity > IDLE_TIMEOUT:
+            log.debug(f"{self.name} idle, frame loop stopped ({self.getFrameStats()})")
+            self.timer.stop()
+
+
+    def getFrameStats(self) -> FrameStats:
+        intervals = self._intervals
+        steps = self._step_durations
+        mean_interval = sum(intervals) / len(intervals) if intervals else 0.0
+        return FrameStats(
+            frames=self.frames,
+            fps=1.0 / mean_interval if mean_interval > 0.0 else 0.0,
+            mean_interval_ms=mean_interval * 1000,
+            max_interval_ms=max(intervals, default=0.0) * 1000,
+            mean_step_ms=sum(steps) / len(steps) * 1000 if steps else 0.0,
+            max_step_ms=max(steps, default=0.0) * 1000,
+        )
@@ -14,14 +14,31 @@ GNU General Public License for more details.
 
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Find segments based on sound activity.
+
+The audio is cut in frames, the RMS level of every frame is computed
+on a strided view of the samples. Frames louder than a ratio of the
+loudest frames are active, and runs of active frames separated by short
+pauses make the segments. Segments too long are split at their quietest frame.
+
+Levels are computed by chunks, in a pool of threads (numpy releases the GIL).
+The frames of a chunk may overlap the next chunk, so the levels are the same
+as in a single pass. The segments of a chunk are sent as soon as they are found.
 """
 
 
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
-from numpy import ndarray
 
-from ostilhou.audio.audio_numpy import split_to_segments
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from PySide6.QtCore import QThread, Signal
 
 from src.settings import WAVEFORM_SAMPLERATE
 
@@ -29,25 +46,216 @@ from src.settings import WAVEFORM_SAMPLERATE
 log = logging.getLogger(__name__)
 
 
-def auto_segment(samples: ndarray, start_frame: int, end_frame: int) -> List[Tuple[float, float]]:
-    SEGMENTS_MAXIMUM_LENGTH = 10 # Seconds
-    RATIO_THRESHOLD = 0.05
+SEGMENTS_MAXIMUM_LENGTH = 10 # Seconds
+RATIO_THRESHOLD = 0.05      # Of the level of the loudest frames
+FRAME_DURATION = 0.02       # Seconds
+HOP_DURATION = 0.01         # Seconds
+MIN_SILENCE = 0.3           # Shorter pauses don't split segments (in seconds)
+MIN_SEGMENT = 0.2           # Shorter segments are dropped (in seconds)
+LOUD_PERCENTILE = 99        # Level of the loudest frames, ignoring clicks
+CHUNK_DURATION = 60.0       # Seconds of audio processed by a worker at once
+
+
+
+def frame_levels(samples: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """RMS level of every frame, frames start every `hop_length` samples"""
+    if len(samples) < frame_length:
+        return np.zeros(0, dtype=np.float32)
+    frames = sliding_window_view(samples, frame_length)[::hop_length]
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def find_regions(
+        levels: np.ndarray,
+        threshold: float,
+        min_silence_frames: int,
+        min_segment_frames: int
+    ) -> np.ndarray:
+    """
+    Return the runs of active frames, as an array of [start, end[ frame indices.
+    Runs separated by less than `min_silence_frames` are joined.
+    """
+    active = np.concatenate(([0], (levels > threshold).view(np.int8), [0]))
+    changes = np.diff(active)
+    starts = np.flatnonzero(changes == 1)
+    ends = np.flatnonzero(changes == -1)
+    if len(starts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # Join runs separated by short pauses
+    is_pause = starts[1:] - ends[:-1] < min_silence_frames
+    starts = starts[np.concatenate(([True], ~is_pause))]
+    ends = ends[np.concatenate((~is_pause, [True]))]
+
+    is_long = ends - starts >= min_segment_frames
+    return np.column_stack((starts[is_long], ends[is_long]))
+
+
+def split_region(
+        levels: np.ndarray,
+        start: int,
+        end: int,
+        max_frames: int,
+        min_segment_frames: int
+    ) -> List[Tuple[int, int]]:
+    """Split a region recursively at its quietest frame, until every part is short enough"""
+    parts = []
+    stack = [(start, end)]
+    while stack:
+        start, end = stack.pop()
+        if end - start <= max_frames:
+            parts.append((start, end))
+            continue
+        margin = min(min_segment_frames, (end - start) // 4)
+        cut = start + margin + int(np.argmin(levels[start + margin:end - margin]))
+        # Right part first, so parts are found in order
+        stack.append((cut + 1, end))
+        stack.append((start, cut))
+    return parts
+
+
+def get_threshold(levels: np.ndarray, ratio_threshold: float = RATIO_THRESHOLD) -> float:
+    if len(levels) == 0:
+        return 0.0
+    return ratio_threshold * float(np.percentile(levels, LOUD_PERCENTILE))
+
+
+def segment_regions(
+        levels: np.ndarray,
+        regions: np.ndarray,
+        samplerate: int,
+        start_frame: int
+    ) -> List[Tuple[float, float]]:
+    """Convert regions to segments in seconds, splitting the long ones"""
+    hop_length, frame_length, max_frames, _, min_segment_frames = _get_frame_sizes(samplerate)
+    segments = []
+    for start, end in regions.tolist():
+        for part_start, part_end in split_region(levels, start, end, max_frames, min_segment_frames):
+            segments.append((
+                (start_frame + part_start * hop_length) / samplerate,
+                (start_frame + (part_end - 1) * hop_length + frame_length) / samplerate
+            ))
+    return segments
 
+
+def _get_frame_sizes(samplerate: int) -> Tuple[int, int, int, int, int]:
+    """Return the hop and frame lengths, in samples, then the durations in frames"""
+    hop_length = max(1, round(HOP_DURATION * samplerate))
+    frame_length = max(hop_length, round(FRAME_DURATION * samplerate))
+    max_frames = max(1, int((SEGMENTS_MAXIMUM_LENGTH * samplerate - frame_length) / hop_length) + 1)
+    min_silence_frames = round(MIN_SILENCE * samplerate / hop_length)
+    min_segment_frames = round(MIN_SEGMENT * samplerate / hop_length)
+    return hop_length, frame_length, max_frames, min_silence_frames, min_segment_frames
+
+
+def auto_segment(
+        samples: np.ndarray,
+        start_frame: int,
+        end_frame: int,
+        samplerate: int = WAVEFORM_SAMPLERATE
+    ) -> List[Tuple[float, float]]:
+    """
+    Find segments between two sample indices, in a single pass.
+    Segments are in seconds, from the beginning of the audio.
+    """
     log.info("Finding segments...")
 
-    segments = split_to_segments(
-        samples[start_frame:end_frame],
-        WAVEFORM_SAMPLERATE,
-        SEGMENTS_MAXIMUM_LENGTH,
-        RATIO_THRESHOLD
-    )
+    hop_length, frame_length, _, min_silence_frames, min_segment_frames = _get_frame_sizes(samplerate)
+    levels = frame_levels(samples[start_frame:end_frame], frame_length, hop_length)
+    regions = find_regions(levels, get_threshold(levels), min_silence_frames, min_segment_frames)
+    segments = segment_regions(levels, regions, samplerate, start_frame)
+
+    log.debug(f"{len(segments)} segments found")
+
+    return segments
+
+
+
+class AutoSegmentWorker(QThread):
+    """
+    Find segments between two sample indices, using all cores.
+    Segments are sent by batches, in order, as they are found.
+    """
+    segments_found = Signal(list)   # List of (start, end) in seconds
+    progress = Signal(float)        # Between 0.0 and 1.0
+    finished = Signal(bool)         # False if stopped or failed
+    message = Signal(str)
+
+
+    def __init__(
+            self,
+            samples: np.ndarray,
+            start_frame: int,
+            end_frame: int,
+            samplerate: int = WAVEFORM_SAMPLERATE,
+            max_workers: int | None = None
+        ):
+        super().__init__()
+        self.samples = samples
+        self.start_frame = max(start_frame, 0)
+        self.end_frame = min(end_frame, len(samples))
+        self.samplerate = samplerate
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._must_stop = False
+
+
+    def stop(self) -> None:
+        self._must_stop = True
+
+
+    def run(self) -> None:
+        log.info("Start auto-segmentation thread")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="auto-segment") as pool:
+                self._run(pool)
+            self.finished.emit(not self._must_stop)
+        except Exception as e:
+            log.error(f"Error in auto-segmentation: {e}")
+            self.message.emit(f"Error in auto-segmentation: {e}")
+            self.finished.emit(False)
+
+
+    def _run(self, pool: ThreadPoolExecutor) -> None:
+        hop_length, frame_length, _, min_silence_frames, min_segment_frames = _get_frame_sizes(self.samplerate)
+        num_samples = self.end_frame - self.start_frame
+        num_frames = max(0, (num_samples - frame_length) // hop_length + 1)
+        frames_per_chunk = max(1, int(CHUNK_DURATION * self.samplerate) // hop_length)
+        chunk_starts = list(range(0, num_frames, frames_per_chunk))
+
+        # Levels of every frame, the samples of the last frames of a chunk overlap the next chunk
+        def chunk_levels(first_frame: int) -> np.ndarray:
+            if self._must_stop:
+                return np.zeros(0, dtype=np.float32)
+            last_frame = min(first_frame + frames_per_chunk, num_frames)
+            sample_start = self.start_frame + first_frame * hop_length
+            sample_end = self.start_frame + (last_frame - 1) * hop_length + frame_length
+            return frame_levels(self.samples[sample_start:sample_end], frame_length, hop_length)
 
-    # Adjust segments to be in global audio context
-    segments = [
-        (start + start_frame / WAVEFORM_SAMPLERATE, end + start_frame / WAVEFORM_SAMPLERATE)
-        for start, end in segments
-    ]
+        futures = [ pool.submit(chunk_levels, first_frame) for first_frame in chunk_starts ]
+        chunks = []
+        for future in futures:
+            if self._must_stop:
+                for f in futures:
+                    f.cancel()
+                return
+            chunks.append(future.result())
+            self.progress.emit(0.5 * len(chunks) / len(futures))
+        levels = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
 
-    log.debug("Segments found:", segments)
+        regions = find_regions(levels, get_threshold(levels), min_silence_frames, min_segment_frames)
 
-    return segments
\ No newline at end of file
+        # Regions are split in the workers, and sent in order by batches of a chunk
+        batches = np.split(regions, np.searchsorted(regions[:, 0], chunk_starts[1:]))
+        futures = [
+            pool.submit(segment_regions, levels, batch, self.samplerate, self.start_frame)
+            for batch in batches
+        ]
+        for i, future in enumerate(futures):
+            if self._must_stop:
+                for f in futures:
+                    f.cancel()
+                return
+            segments = future.result()
+            if segments:
+                self.segments_found.emit(segments)
+            self.progress.emit(0.5 + 0.5 * (i + 1) / len(futures))
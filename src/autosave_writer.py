@@ -0,0 +1,79 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+from pathlib import Path
+
+from PySide6.QtCore import QRunnable, Signal, QObject, QThread
+
+from src.file_manager import FileManager
+from src.document_snapshot import DocumentSnapshot
+
+
+
+log = logging.getLogger(__name__)
+
+
+
+class AutosaveWriterSignals(QObject):
+    finished = Signal(object)   # Path of the autosave file
+    error = Signal(str)         # Sends the error message
+
+
+
+class AutosaveWriter(QRunnable):
+    """
+    Write a snapshot of the document to an autosave file,
+    then remove the oldest autosave files of the same document.
+    The snapshot is taken on the main thread, it is not modified afterwards.
+    """
+
+    def __init__(
+            self,
+            file_manager: FileManager,
+            snapshot: DocumentSnapshot,
+            autosave_path: Path,
+            max_backups: int
+        ):
+        super().__init__()
+        self.signals = AutosaveWriterSignals()
+        self.file_manager = file_manager
+        self.snapshot = snapshot
+        self.autosave_path = autosave_path
+        self.max_backups = max_backups
+
+    def run(self):
+        QThread.currentThread().setPriority(QThread.Priority.LowPriority)
+
+        autosave_folder = self.autosave_path.parent
+        try:
+            autosave_folder.mkdir(exist_ok=True)  # Create "autosave" folder, if necessary
+            self.file_manager.save_ali_file(self.autosave_path, self.snapshot.getBlocksData())
+
+            # Remove old backups, if necessary
+            document_stem = self.autosave_path.stem.rsplit('@', 1)[0]
+            old_backups = sorted(autosave_folder.glob(document_stem + "@*.ali"))
+            if len(old_backups) > self.max_backups:
+                for i in range(len(old_backups) - self.max_backups):
+                    old_backups[i].unlink()
+        except Exception as e:
+            log.error(f"Autosave failed {e}")
+            self.signals.error.emit(str(e))
+            return
+
+        self.signals.finished.emit(self.autosave_path)
@@ -0,0 +1,411 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Headless batch processing, without any window.
+
+    python3 main.py --batch [options] FILE_OR_FOLDER ...
+
+Every media file goes through the same pipeline as in the application:
+waveform, whole-file transcription, alignment of an existing text and export.
+Waveforms and transcriptions are read from and saved to the application cache.
+
+Files are processed in parallel worker processes.
+Worker processes only write cache artifacts (waveforms and transcriptions),
+their metadata changes are sent back with the file report,
+and written by the main process, once a file is done.
+"""
+
+
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.settings import WAVEFORM_SAMPLERATE
+from src.file_formats import MEDIA_FORMATS
+from src.interfaces import Segment
+
+
+log = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("srt", "eaf", "txt")
+
+
+# Recognizer of the current worker process, the model is loaded only once
+_recognizer = None
+_normalize = False
+
+
+
+@dataclass
+class FileReport:
+    media_path: str
+    duration: float = 0.0   # Media duration, in seconds
+    timings: Dict[str, float] = field(default_factory=dict) # Time spent at every step, in seconds
+    cached: List[str] = field(default_factory=list)         # Steps skipped thanks to the cache
+    outputs: List[str] = field(default_factory=list)
+    num_utterances: int = 0
+    error: Optional[str] = None
+    metadata: dict = field(default_factory=dict)            # Media metadata, to be saved in the cache
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def rtf(self) -> float:
+        """Real-time factor: processing time over media duration"""
+        if self.duration <= 0.0:
+            return 0.0
+        return self.total_time / self.duration
+
+
+
+def find_media_files(paths: List[Path], recursive: bool = False) -> List[Path]:
+    """List media files from a list of files and folders, without duplicates"""
+    media_files = []
+    for path in paths:
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            media_files.extend(sorted(
+                p for p in path.glob(pattern)
+                if p.suffix.lower() in MEDIA_FORMATS and p.is_file()
+            ))
+        elif path.suffix.lower() in MEDIA_FORMATS and path.is_file():
+            media_files.append(path)
+        else:
+            log.warning(f"Skipping {path}")
+
+    unique_files = dict.fromkeys(p.absolute() for p in media_files)
+    return list(unique_files)
+
+
+
+def find_text_file(media_path: Path) -> Optional[Path]:
+    """Return the text to align with a media file, if there is one"""
+    for ext in (".ali", ".txt"):
+        text_path = media_path.with_suffix(ext)
+        if text_path.is_file():
+            return text_path
+    return None
+
+
+
+def read_sentences(text_path: Path) -> List[str]:
+    """Read sentences from an ALI file or a text file, one sentence per line"""
+    if text_path.suffix == ".ali":
+        from src.ali_codec import read_ali
+        parsed_data, _ = read_ali(text_path)
+        lines = [text for text, _ in parsed_data]
+    else:
+        with text_path.open('r', encoding="utf-8") as _f:
+            lines = _f.readlines()
+
+    # Skip comments and metadata lines
+    sentences = [' '.join(line.split()) for line in lines]
+    return [
+        s for s in sentences
+        if s and not s.startswith('#') and not (s.startswith('{') and s.endswith('}'))
+    ]
+
+
+
+def resolve_model(language: str, model_name: Optional[str]) -> Optional[str]:
+    """Return the given model if it is cached, or the latest cached model for this language"""
+    from src import lang
+
+    lang.loadLanguage(language)
+    models = lang.getCachedModelList()
+    if model_name is None:
+        return models[0] if models else None
+    return model_name if model_name in models else None
+
+
+
+def _init_worker(language: str, model_name: str, normalize: bool) -> None:
+    """Load the language and the recognizer model, once per worker process"""
+    global _recognizer, _normalize
+
+    from src import lang
+    from src.transcriber import RecognizerWorker
+
+    lang.loadLanguage(language)
+    _recognizer = RecognizerWorker()
+    _recognizer.load_model(model_name)
+    _normalize = normalize
+
+
+
+def _init_worker_process(language: str, model_name: str, normalize: bool) -> None:
+    """Initialize a spawned worker process, which must not write the cache metadata"""
+    from src.cache_system import cache
+
+    cache.set_artifacts_only()
+    _init_worker(language, model_name, normalize)
+
+
+
+def process_media(
+        media_path: Path,
+        formats: List[str],
+        output_dir: Optional[Path],
+        align: bool = True
+    ) -> FileReport:
+    """
+    Run the whole pipeline on a single media file.
+    Must be called after `_init_worker`, in the same process.
+    """
+    from src import lang
+    from src.cache_system import cache
+    from src.aligner import align_sentences
+    from src.exports.textual_exporter import save_export
+    from ostilhou.audio.audio_numpy import get_samples
+
+    report = FileReport(str(media_path))
+
+    try:
+        # Waveform
+        t0 = time.perf_counter()
+        samples = cache.get_waveform(media_path)
+        if samples is None:
+            samples = get_samples(str(media_path), WAVEFORM_SAMPLERATE)
+            cache.set_waveform(media_path, samples)
+        else:
+            report.cached.append("waveform")
+        report.duration = len(samples) / WAVEFORM_SAMPLERATE
+        report.timings["waveform"] = time.perf_counter() - t0
+
+        # Transcription
+        # A whole transcription is needed to create utterances,
+        # but cached tokens are enough for alignment
+        t0 = time.perf_counter()
+        text_path = find_text_file(media_path) if align else None
+        media_metadata = cache.get_media_metadata(media_path)
+        utterances: List[Tuple[str, Segment]] = []
+        if text_path and media_metadata.get("transcription_completed", False):
+            report.cached.append("transcription")
+        else:
+            def on_new_segment(text: str, segment: Segment) -> None:
+                utterances.append( (lang.postProcessText(text, _normalize), segment) )
+
+            # The recognizer reports errors as messages, without raising
+            messages: List[str] = []
+            completed = False
+
+            def on_end_of_file() -> None:
+                nonlocal completed
+                completed = True
+                cache.update_media_metadata(media_path, {"transcription_completed": True})
+
+            start_time = media_metadata.get("transcription_progress", 0.0) if text_path else 0.0
+            _recognizer.new_segment_transcribed.connect(on_new_segment)
+            _recognizer.end_of_file.connect(on_end_of_file)
+            _recognizer.message.connect(messages.append)
+            try:
+                _recognizer.transcribe_file(str(media_path), start_time, is_hidden=bool(text_path))
+            finally:
+                _recognizer.new_segment_transcribed.disconnect()
+                _recognizer.end_of_file.disconnect()
+                _recognizer.message.disconnect()
+            if not completed:
+                raise RuntimeError(messages[-1] if messages else "Transcription didn't complete")
+        report.timings["transcription"] = time.perf_counter() - t0
+
+        # Alignment
+        if text_path:
+            t0 = time.perf_counter()
+            sentences = read_sentences(text_path)
+            tokens = cache.get_media_transcription(media_path) or []
+            segments = align_sentences(sentences, tokens)
+            utterances = [
+                (sentence, segment)
+                for sentence, segment in zip(sentences, segments)
+                if segment is not None
+            ]
+            report.timings["alignment"] = time.perf_counter() - t0
+        report.num_utterances = len(utterances)
+
+        # Export
+        t0 = time.perf_counter()
+        utterances.sort(key=lambda u: tuple(u[1]))
+        for file_type in formats:
+            out_dir = output_dir or media_path.parent
+            out_path = out_dir / f"{media_path.stem}.{file_type}"
+            save_export(str(out_path), utterances, file_type, str(media_path))
+            report.outputs.append(str(out_path))
+        report.timings["export"] = time.perf_counter() - t0
+
+        # Artifacts must be on disk before the main process moves on
+        cache.flush()
+        report.metadata = dict(cache.get_media_metadata(media_path))
+
+    except Exception as e:
+        log.exception(f"Error while processing {media_path}")
+        report.error = str(e)
+
+    return report
+
+
+
+def format_report(report: FileReport) -> str:
+    name = Path(report.media_path).name
+    if report.error:
+        return f"{name}: ERROR {report.error}"
+    steps = ' '.join(
+        f"{step}={t:.2f}s" + ("(cached)" if step in report.cached else "")
+        for step, t in report.timings.items()
+    )
+    return (
+        f"{name}: {report.duration:.1f}s of media, {report.num_utterances} utterances, "
+        f"{steps}, total={report.total_time:.2f}s, RTF={report.rtf:.3f}"
+    )
+
+
+
+def run_batch(
+        media_files: List[Path],
+        formats: List[str],
+        output_dir: Optional[Path] = None,
+        align: bool = True,
+        language: str = "br",
+        model_name: str = "",
+        normalize: bool = False,
+        jobs: int = 1
+    ) -> List[FileReport]:
+    """Process media files in parallel worker processes, reporting each file when it's done"""
+    from src.cache_system import cache
+    from src.fingerprint import fingerprints
+
+    # Fingerprints are computed and saved once, before worker processes start
+    fingerprints.get_many(media_files)
+
+    reports = []
+
+    def on_report(report: FileReport) -> None:
+        if report.metadata:
+            cache.update_media_metadata(Path(report.media_path), report.metadata)
+        print(format_report(report), flush=True)
+        reports.append(report)
+
+    initargs = (language, model_name, normalize)
+    if jobs <= 1:
+        _init_worker(*initargs)
+        for media_path in media_files:
+            on_report(process_media(media_path, formats, output_dir, align))
+    else:
+        # Worker processes must not inherit the parent's threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(jobs, context, _init_worker_process, initargs) as executor:
+            futures = [
+                executor.submit(process_media, media_path, formats, output_dir, align)
+                for media_path in media_files
+            ]
+            for future in as_completed(futures):
+                on_report(future.result())
+
+    cache.flush()
+    return reports
+
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py --batch",
+        description="Transcribe, align and export media files without the graphical interface."
+    )
+    parser.add_argument("inputs", nargs='+', type=Path, help="Media files or folders")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Look for media files in subfolders")
+    parser.add_argument("-f", "--formats", default="srt",
+        help=f"Comma-separated export formats, among {', '.join(EXPORT_FORMATS)} (default: srt)")
+    parser.add_argument("-o", "--output-dir", type=Path, help="Output folder (default: next to each media file)")
+    parser.add_argument("-l", "--language", default="br", help="Language (default: br)")
+    parser.add_argument("-m", "--model", help="Recognizer model (default: latest cached model)")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+        help="Number of worker processes, each one loads its own model")
+    parser.add_argument("--no-align", action="store_true",
+        help="Ignore text files (.ali or .txt) found next to media files, and export the transcription")
+    parser.add_argument("--normalize", action="store_true", help="Normalize transcribed text")
+    parser.add_argument("--report", type=Path, help="Save timings to a JSON file")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    for file_type in formats:
+        if file_type not in EXPORT_FORMATS:
+            parser.error(f"Unknown export format: {file_type}")
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    media_files = find_media_files(args.inputs, args.recursive)
+    if not media_files:
+        print("No media file found", file=sys.stderr)
+        return 1
+
+    model_name = resolve_model(args.language, args.model)
+    if model_name is None:
+        print(f"Model not found for language '{args.language}'", file=sys.stderr)
+        return 1
+
+    jobs = max(1, min(args.jobs, len(media_files)))
+    print(f"Processing {len(media_files)} file(s) with {jobs} worker(s)", flush=True)
+
+    t0 = time.perf_counter()
+    reports = run_batch(
+        media_files,
+        formats,
+        args.output_dir,
+        align=not args.no_align,
+        language=args.language,
+        model_name=model_name,
+        normalize=args.normalize,
+        jobs=jobs
+    )
+    wall_time = time.perf_counter() - t0
+
+    media_duration = sum(r.duration for r in reports)
+    num_errors = sum(1 for r in reports if r.error)
+    print(
+        f"Done: {len(reports)} file(s), {num_errors} error(s), "
+        f"{media_duration:.1f}s of media in {wall_time:.1f}s, "
+        f"RTF={wall_time / media_duration if media_duration else 0.0:.3f}"
+    )
+
+    if args.report:
+        with args.report.open('w', encoding="utf-8") as _f:
+            json.dump({
+                "wall_time": wall_time,
+                "media_duration": media_duration,
+                "jobs": jobs,
+                "files": [
+                    {
+                        **{ k: v for k, v in asdict(r).items() if k != "metadata" },
+                        "total_time": r.total_time,
+                        "rtf": r.rtf,
+                    } for r in reports
+                ]
+            }, _f, indent=2)
+
+    return 1 if num_errors else 0
@@ -0,0 +1,61 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from PySide6.QtCore import QRunnable, Signal, QObject, QThread
+
+from src.settings import app_settings, MEDIA_CACHE_DEFAULT_SIZE
+from src.cache_system import cache, EvictionReport
+from src.strings import app_strings
+
+
+
+def get_cache_budget() -> int:
+    """Return the media cache size limit, in bytes"""
+    size_mo = int(app_settings.value("cache/media_cache_size", MEDIA_CACHE_DEFAULT_SIZE))
+    return size_mo * 1000 * 1000
+
+
+
+class CacheJanitorSignals(QObject):
+    finished = Signal(object)   # EvictionReport
+    message = Signal(str)   # Sends a message to be displayed in the status bar
+
+
+class CacheJanitor(QRunnable):
+    """
+    Evict the least recently used media artifacts (waveforms, transcriptions, scenes)
+    from the cache, until it fits in the size limit set in the parameters.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.signals = CacheJanitorSignals()
+
+    def run(self):
+        QThread.currentThread().setPriority(QThread.Priority.LowPriority)
+
+        report: EvictionReport = cache.evict_to_budget(get_cache_budget())
+
+        if report.evicted:
+            freed_mo = round(report.freed_bytes / 1000 / 1000, 1)
+            self.signals.message.emit(
+                QObject.tr("Cache cleaned")
+                + f": {len(report.evicted)} {app_strings.TR_UNIT_FILES}, "
+                + f"{freed_mo} {app_strings.TR_UNIT_MEGA_OCTED}"
+            )
+        self.signals.finished.emit(report)
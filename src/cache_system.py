@@ -17,61 +17,52 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 
-from typing import List, Dict
-from functools import lru_cache
+from typing import List, Dict, Set, Iterable, Optional
+from dataclasses import dataclass, field
 import logging
 import os
-import hashlib
+import io
 import copy
-import json
+import threading
 from datetime import datetime
 from pathlib import Path
 import numpy as np
 
 from utils import get_cache_directory
+from src.fingerprint import Fingerprint, calculate_fingerprint
+from src.metadata_store import JournaledStore
+from src.write_behind import WriteBehindQueue
+from src.waveform_file import write_waveform, open_waveform, WaveformFileError
+from src.settings import WAVEFORM_SAMPLERATE, WAVEFORM_STORAGE_DTYPE
 
 
-type Fingerprint = str
+log = logging.getLogger(__name__)
 
 
-log = logging.getLogger(__name__)
+ARTIFACT_KINDS = ("waveform", "transcription", "scenes")
 
 
 
-@lru_cache  # Memoization
-def calculate_fingerprint(file_path: Path) -> Fingerprint:
-    """
-    Calculate a unique fingerprint to use as identifiers
-    for the cache system.
-    To make it fast, it only calculates a checksum on
-    different parts of the file rather than the whole file.
-
-    Args:
-        filepath (Path)
-            A path to a audio file
-    
-    Returns:
-        A unique fingerprint for any given file
-    """
+def _write_tsv(_f, rows: List[tuple]) -> None:
+    """Write rows of fields, separated by tabs"""
+    text_file = io.TextIOWrapper(_f)
+    for row in rows:
+        text_file.write('\t'.join([ str(field) for field in row ]) + '\n')
+    text_file.flush()
+    text_file.detach()
+
+
+def _write_waveform(_f, samples: np.ndarray) -> None:
+    write_waveform(_f, samples, WAVEFORM_SAMPLERATE, WAVEFORM_STORAGE_DTYPE)
 
-    file_size = file_path.stat().st_size
-    block_size = 4096
-    n_blocks = min(8, int(file_size / block_size))
-    loc_step = file_size // n_blocks
-    
-    sha256_hash = hashlib.sha256()
-    with file_path.open('rb') as _f:
-        loc = 0
-        for i in range(n_blocks):
-            if loc + block_size > file_size:
-                _f.seek(loc)
-                sha256_hash.update(_f.read(file_size - loc))
-                break
-            _f.seek(loc)
-            sha256_hash.update(_f.read(block_size))
-            loc += loc_step
 
-    return sha256_hash.hexdigest()
+
+@dataclass
+class EvictionReport:
+    """Summary of a cache eviction pass"""
+    freed_bytes: int = 0
+    remaining_bytes: int = 0
+    evicted: List[str] = field(default_factory=list)  # Media file paths (or fingerprints)
 
 
 
@@ -79,7 +70,8 @@ class CacheSystem:
     """
     The cache consists of different parts:
 
-    Two jsonl file, which serve as databases for:
+    Two jsonl file, which serve as databases for
+    (each one with an append-only journal of recent changes, see `JournaledStore`):
 
     * Media cache (accessed with fingerprint)
         file_path
@@ -104,20 +96,19 @@ class CacheSystem:
     Folders for:
         * scenes (.tsv)
         * transcriptions (.tsv)
-        * waveforms (numpy arrays .npy)
+        * waveforms (.wf, see `waveform_file`)
+    
+    Files in these folders are written in the background, by a write-behind queue.
+    Until they are written, their content is served from memory.
+    
+    The size of every file in these folders is tracked in memory,
+    so the cache footprint can be known without walking the folders.
     """
 
     def __init__(self) -> None:
-        # Copy in memory of cache loaded from disk
-        self.media_cache: Dict[Fingerprint, Dict] = dict()
-        self.doc_cache: Dict[str, Dict] = dict()
-
         # Volatile cache for transcriptions
         self.transcriptions_cache: Dict[Fingerprint, List[tuple]] = dict()
 
-        self._media_cache_dirty = False # True when the db has unsaved changes
-        self._doc_cache_dirty = False
-
         cache_dir = get_cache_directory()
         
         self.transcriptions_dir = cache_dir / "transcriptions"
@@ -131,99 +122,296 @@ class CacheSystem:
         self.media_cache_path = cache_dir / "media_cache.jsonl"
         self.doc_cache_path = cache_dir / "doc_cache.jsonl"
 
+        # Guards the media records and the artifact sizes,
+        # which are modified by the cache writer thread too
+        self._lock = threading.RLock()
+
+        # Media file cache, indexed by audio fingerprint
+        self.media_store = JournaledStore(
+            self.media_cache_path,
+            key_field="fingerprint",
+            keep_key=True,
+            sort_field="last_access",
+            lock=self._lock
+        )
+        # Document cache, indexed by document path
+        self.doc_store = JournaledStore(
+            self.doc_cache_path,
+            key_field="file_path",
+            sort_field="last_access"
+        )
+
+        # Copy in memory of cache loaded from disk
+        self.media_cache: Dict[Fingerprint, Dict] = self.media_store.entries
+        self.doc_cache: Dict[str, Dict] = self.doc_store.entries
+
+        # Currently opened media, never evicted from cache
+        self.active_media: Set[Fingerprint] = set()
+
+        # Removed waveforms still memory-mapped by the opened media,
+        # deleted once it is closed (mapped files can't be deleted on Windows)
+        self._deferred_removals: Set[Path] = set()
+
+        # Size on disk of cached artifacts, by kind and fingerprint
+        self._artifact_sizes: Dict[str, Dict[Fingerprint, int]] = {
+            kind: dict() for kind in ARTIFACT_KINDS
+        }
+        self._artifact_totals: Dict[str, int] = { kind: 0 for kind in ARTIFACT_KINDS }
+
+        # Artifact files are written by a dedicated I/O thread
+        self._writer = WriteBehindQueue()
+
+        self._remove_legacy_waveforms()
         self._load_root_cache()
+        self._scan_artifacts()
     
 
     def _get_transcription_path(self, fingerprint: Fingerprint) -> Path:
         return self.transcriptions_dir / f"{fingerprint}.tsv"
 
     def _get_waveform_path(self, fingerprint: Fingerprint) -> Path:
-        return self.waveforms_dir / f"{fingerprint}.npy"
+        return self.waveforms_dir / f"{fingerprint}.wf"
 
     def _get_scenes_path(self, fingerprint: Fingerprint) -> Path:
         return self.scenes_dir / f"{fingerprint}.tsv"
 
+    def _get_artifact_path(self, kind: str, fingerprint: Fingerprint) -> Path:
+        if kind == "waveform":
+            return self._get_waveform_path(fingerprint)
+        elif kind == "transcription":
+            return self._get_transcription_path(fingerprint)
+        return self._get_scenes_path(fingerprint)
+
+
+    def _remove_legacy_waveforms(self) -> None:
+        """
+        Waveforms used to be saved as .npy files, without their samplerate,
+        they are computed again instead
+        """
+        for legacy_path in self.waveforms_dir.glob("*.npy"):
+            log.info(f"Removing legacy waveform {legacy_path.name}")
+            legacy_path.unlink(missing_ok=True)
+
+
+    def _scan_artifacts(self) -> None:
+        """Initialize the artifact sizes, done once at startup"""
+        dirs = {
+            "waveform": (self.waveforms_dir, ".wf"),
+            "transcription": (self.transcriptions_dir, ".tsv"),
+            "scenes": (self.scenes_dir, ".tsv"),
+        }
+        with self._lock:
+            for kind, (dir_path, suffix) in dirs.items():
+                sizes = self._artifact_sizes[kind]
+                sizes.clear()
+                with os.scandir(dir_path) as it:
+                    for dir_entry in it:
+                        if dir_entry.is_file() and dir_entry.name.endswith(suffix):
+                            sizes[dir_entry.name[:-len(suffix)]] = dir_entry.stat().st_size
+                self._artifact_totals[kind] = sum(sizes.values())
+
+
+    def _record_artifact_size(self, kind: str, fingerprint: Fingerprint) -> None:
+        """Update the running totals after an artifact was written or removed"""
+        path = self._get_artifact_path(kind, fingerprint)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        with self._lock:
+            if path in self._deferred_removals:
+                size = 0
+            sizes = self._artifact_sizes[kind]
+            self._artifact_totals[kind] += size - sizes.get(fingerprint, 0)
+            if size:
+                sizes[fingerprint] = size
+            else:
+                sizes.pop(fingerprint, None)
+
+
+    def get_cache_sizes(self) -> Dict[str, int]:
+        """Return the total size on disk of each kind of cached artifact"""
+        with self._lock:
+            return dict(self._artifact_totals)
+
+
+    def get_media_cache_sizes(self, fingerprint: Fingerprint) -> Dict[str, int]:
+        """Return the size on disk of each cached artifact of a media file"""
+        with self._lock:
+            return {
+                kind: self._artifact_sizes[kind].get(fingerprint, 0)
+                for kind in ARTIFACT_KINDS
+            }
+
+
+    def get_cached_fingerprints(self, kind: str) -> List[Fingerprint]:
+        """Return the fingerprints of all media with a cached artifact of the given kind"""
+        with self._lock:
+            return list(self._artifact_sizes[kind])
+
+
+    def set_active_media(self, media_path: Optional[Path]) -> None:
+        """
+        Set the currently opened media, protecting it from eviction.
+        The previous media's waveform must not be mapped anymore.
+        """
+        with self._lock:
+            self.active_media.clear()
+            if media_path:
+                self.active_media.add(calculate_fingerprint(media_path))
+            self._remove_deferred()
+
+
+    def _remove_deferred(self) -> None:
+        """Delete the removed waveforms that are not mapped anymore"""
+        with self._lock:
+            for path in list(self._deferred_removals):
+                if path.stem in self.active_media:
+                    continue
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError as e:
+                    log.warning(f"Couldn't remove {path} ({e})")
+                    continue
+                self._deferred_removals.discard(path)
+
+
+    def remove_media_artifacts(
+            self,
+            fingerprint: Fingerprint,
+            kinds: Iterable[str] = ARTIFACT_KINDS
+        ) -> int:
+        """
+        Delete cached artifacts of a media file.
+        The media record is kept, stripped of the related fields.
+
+        Returns:
+            Number of bytes freed on disk
+        """
+        freed = 0
+        with self._lock:
+            metadata = self.media_cache.get(fingerprint)
+            for kind in kinds:
+                freed += self._artifact_sizes[kind].get(fingerprint, 0)
+                artifact_path = self._get_artifact_path(kind, fingerprint)
+                self._writer.cancel(artifact_path)
+                if kind == "waveform" and fingerprint in self.active_media:
+                    # Still memory-mapped, ignored until the media is closed
+                    self._deferred_removals.add(artifact_path)
+                else:
+                    artifact_path.unlink(missing_ok=True)
+                self._record_artifact_size(kind, fingerprint)
+                if kind == "waveform" and metadata:
+                    metadata.pop("waveform_size", None)
+                elif kind == "transcription":
+                    self.transcriptions_cache.pop(fingerprint, None)
+                    if metadata:
+                        metadata.pop("transcription_progress", None)
+                        metadata.pop("transcription_completed", None)
+            if metadata:
+                self.media_store.put(fingerprint)
+        return freed
+
+
+    def evict_to_budget(self, max_bytes: int) -> EvictionReport:
+        """
+        Delete the artifacts of the least recently used media files,
+        until the cache fits in the given budget.
+        Currently opened media are never evicted.
+        """
+        report = EvictionReport()
+        with self._lock:
+            total = sum(self._artifact_totals.values())
+            if total <= max_bytes:
+                report.remaining_bytes = total
+                return report
+
+            fingerprints = set()
+            for sizes in self._artifact_sizes.values():
+                fingerprints.update(sizes)
+            fingerprints -= self.active_media
+            # Artifacts being written are in use
+            fingerprints = [
+                fg for fg in fingerprints
+                if not any(
+                    self._writer.is_pending(self._get_artifact_path(kind, fg))
+                    for kind in ARTIFACT_KINDS
+                )
+            ]
+
+            # Least recently used first, orphan artifacts before anything else
+            candidates = sorted(
+                fingerprints,
+                key=lambda fg: self.media_cache.get(fg, {}).get("last_access", 0.0)
+            )
+            for fingerprint in candidates:
+                if total <= max_bytes:
+                    break
+                freed = self.remove_media_artifacts(fingerprint)
+                total -= freed
+                report.freed_bytes += freed
+                report.evicted.append(
+                    self.media_cache.get(fingerprint, {}).get("file_path", fingerprint)
+                )
+            report.remaining_bytes = total
+
+        if report.evicted:
+            log.info(f"Evicted {len(report.evicted)} media from cache ({report.freed_bytes} bytes)")
+        return report
+
 
     def _load_root_cache(self) -> None:
-        # Media file cache, indexed by audio fingerprint
+        def upgrade_media_entry(entry: dict) -> bool:
+            modified = False
+
+            # Add the "last_access" property, if not present
+            if "last_access" not in entry:
+                entry["last_access"] = datetime.now().timestamp()
+
+            # Add the "waveform_size" property, if not present
+            waveform_path = self._get_waveform_path(entry["fingerprint"])
+            if "waveform_size" not in entry:
+                if waveform_path.exists():
+                    entry["waveform_size"] = waveform_path.stat().st_size
+                    modified = True
+            elif not waveform_path.exists():
+                # Legacy waveform, or removed from the cache folder
+                entry.pop("waveform_size")
+                modified = True
+            return modified
+
+        def upgrade_doc_entry(entry: dict) -> bool:
+            # Add the "last_access" property, if not present
+            if "last_access" not in entry:
+                entry["last_access"] = datetime.now().timestamp()
+            return False
+
         log.info("Loading media cache")
-        try:
-            with self.media_cache_path.open('r') as _jsonl_file:
-                for line in _jsonl_file:
-                    entry: dict = json.loads(line)
-
-                    # Add the "last_access" property, if not present
-                    if "last_access" not in entry:
-                        entry["last_access"] = datetime.now().timestamp()
-
-                    fingerprint = entry["fingerprint"]
-
-                    # Add the "waveform_size" property, if not present
-                    if "waveform_size" not in entry:
-                        waveform_path = self._get_waveform_path(fingerprint)
-                        if waveform_path.exists():
-                            entry.update(
-                                { "waveform_size": waveform_path.stat().st_size }
-                            )
-                            self._media_cache_dirty = True
-                    self.media_cache[fingerprint] = entry
-
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            log.error(f"Could not open media cache file: {e}")
-            self.media_cache = dict()
-        
-        # Document cache, indexed by document path
+        self.media_store.load(upgrade_media_entry)
         log.info("Loading document cache")
-        try:
-            with self.doc_cache_path.open('r') as _jsonl_file:
-                for line in _jsonl_file:
-                    entry = json.loads(line)
+        self.doc_store.load(upgrade_doc_entry)
 
-                    # Add the "last_access" property, if not present
-                    if "last_access" not in entry:
-                        entry["last_access"] = datetime.now().timestamp()
 
-                    doc_path = entry.pop("file_path")
-                    self.doc_cache[doc_path] = entry
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            log.error(f"Could not open media cache file: {e}")
-            # We should try to restore the database
-            self.doc_cache = dict()
+    def _save_root_cache_to_disk(self) -> None:
+        """Write pending metadata changes to the cache journals"""
+        self.media_store.flush()
+        self.doc_store.flush()
 
 
-    def _save_root_cache_to_disk(self) -> None:
-        """ Save cache root files to disk in jsonl format """
-        if self._media_cache_dirty:
-            try:
-                with self.media_cache_path.open('w') as _f:
-                    for fg in sorted(
-                            self.media_cache,
-                            key=lambda fg: self.media_cache[fg]["last_access"],
-                            reverse=True
-                        ):
-                        entry = self.media_cache[fg]
-                        entry["fingerprint"] = fg
-                        json.dump(entry, _f)
-                        _f.write('\n')
-                self._media_cache_dirty = False
-            except Exception as e:
-                log.error(f"Error: Couln't save media cache to disk ({e})")
-        
-        if self._doc_cache_dirty:
-            try:
-                with self.doc_cache_path.open('w') as _f:
-                    for key in sorted(
-                            self.doc_cache,
-                            key=lambda e: self.doc_cache[e]["last_access"],
-                            reverse=True
-                        ):
-                        entry = self.doc_cache[key]
-                        entry["file_path"] = key
-                        json.dump(entry, _f)
-                        _f.write('\n')
-                self._doc_cache_dirty = False
-            except Exception as e:
-                log.error(f"Error: Couln't save document cache to disk ({e})")
+    def set_artifacts_only(self, artifacts_only: bool = True) -> None:
+        """
+        Only write artifact files (waveforms, transcriptions and scenes).
+        Metadata changes are kept in memory and never written to the cache files,
+        so worker processes can share the cache with the main process.
+        """
+        self.media_store.read_only = artifacts_only
+        self.doc_store.read_only = artifacts_only
+
+
+    def flush(self) -> None:
+        """Block until every pending change is written to disk"""
+        self._writer.flush()
+        self._save_root_cache_to_disk()
 
 
     def get_media_metadata(self, media_path: Path) -> dict:
@@ -231,41 +419,56 @@ class CacheSystem:
         Get cached metadata (except waveform) for media file and update access time
         The waveform is never present in returned dictionary
         You must call the 'get_waveform' method instead
+        The returned dictionary is a copy, use 'update_media_metadata' to modify it
         """
         if not media_path:
             return {}
         
         fingerprint = calculate_fingerprint(media_path)
 
-        if fingerprint in self.media_cache:
-            metadata = self.media_cache[fingerprint]
-            metadata["last_access"] = datetime.now().timestamp()
+        with self._lock:
+            if fingerprint in self.media_cache:
+                metadata = self.media_cache[fingerprint]
+                metadata["last_access"] = datetime.now().timestamp()
 
-            # Update media cache on disk
-            self._media_cache_dirty = True
-            # self._save_root_cache_to_disk()
+                # Access time will be saved with the next write
+                self.media_store.mark_dirty(fingerprint)
 
-            return metadata
+                return dict(metadata)
         
         return {}
 
 
-    def update_media_metadata(self, media_path: Path, metadata: dict = {}) -> None:
+    def update_media_metadata(self, media_path: Path, metadata: Optional[dict] = None) -> None:
         """Update given metadata fields and save updated metadata on disk"""
         log.info(f"Update media metadata cache for {media_path}")
         log.debug(f"{metadata=}")
         fingerprint = calculate_fingerprint(media_path)
 
+        # May be called from the cache writer thread, never share the default dict
+        metadata = dict(metadata) if metadata else dict()
         metadata["file_path"] = str(media_path.absolute())
         metadata["last_access"] = datetime.now().timestamp()
 
-        if fingerprint not in self.media_cache:
-            self.media_cache[fingerprint] = {"file_size": media_path.stat().st_size}
-        
-        self.media_cache[fingerprint].update(metadata)
+        with self._lock:
+            if fingerprint not in self.media_cache:
+                self.media_cache[fingerprint] = {
+                    "file_size": media_path.stat().st_size,
+                    "fingerprint": fingerprint,
+                }
+            
+            self.media_cache[fingerprint].update(metadata)
+            self.media_store.put(fingerprint)
+
+
+    def remove_media_metadata(self, fingerprint: Fingerprint) -> None:
+        """Remove a media record from the cache root"""
+        self.media_store.delete(fingerprint)
 
-        self._media_cache_dirty = True
-        self._save_root_cache_to_disk()
+
+    def clear_media_metadata(self) -> None:
+        """Remove all media records from the cache root"""
+        self.media_store.clear()
 
 
     def get_doc_metadata(self, file_path: Path) -> dict:
@@ -275,8 +478,9 @@ class CacheSystem:
         if str(file_path) in self.doc_cache:
             metadata = self.doc_cache[str(file_path)]
             metadata["last_access"] = datetime.now().timestamp()
-            self._doc_cache_dirty = True
-            self._save_root_cache_to_disk()
+
+            # Access time will be saved with the next write
+            self.doc_store.mark_dirty(str(file_path))
             return metadata
         
         return {}
@@ -285,16 +489,16 @@ class CacheSystem:
     def update_doc_metadata(self, file_path: Path, metadata: dict) -> None:
         file_path = file_path.absolute()
         metadata["last_access"] = datetime.now().timestamp()
-        self.doc_cache.update({str(file_path): metadata})
-
-        self._doc_cache_dirty = True
-        self._save_root_cache_to_disk()
+        self.doc_store.put(str(file_path), metadata)
 
 
     def get_media_transcription(self, file_path: Path) -> List[tuple] | None:
         fingerprint = calculate_fingerprint(file_path)
 
-        if fingerprint not in self.transcriptions_cache:        
+        if fingerprint not in self.transcriptions_cache:
+            pending = self._writer.get_pending(self._get_transcription_path(fingerprint))
+            if pending is not None:
+                return list(pending)
             transcription = self._get_transcription_from_disk(fingerprint)
             if transcription is None:
                 return None
@@ -347,11 +551,13 @@ class CacheSystem:
 
         self.transcriptions_cache[fingerprint] = tokens
 
-        # Write on disk
-        with open(self._get_transcription_path(fingerprint), 'w') as _fout:
-            for tok in tokens:
-                tok = [ str(t) for t in tok ]
-                _fout.write('\t'.join(tok) + '\n')
+        # Write on disk, in the background
+        self._writer.submit(
+            self._get_transcription_path(fingerprint),
+            tuple(tokens),
+            _write_tsv,
+            lambda _: self._record_artifact_size("transcription", fingerprint)
+        )
 
         # Update modification time
         self.update_media_metadata(media_path)
@@ -363,17 +569,22 @@ class CacheSystem:
 
         self.transcriptions_cache[fingerprint].extend(tokens)
 
-        # Write on disk, append mode
-        with self._get_transcription_path(fingerprint).open('a') as _fout:
-            for tok in tokens:
-                tok = [ str(t) for t in tok ]
-                _fout.write('\t'.join(tok) + '\n')
+        # Write only the new tokens, at the end of the file, in the background
+        self._writer.append(
+            self._get_transcription_path(fingerprint),
+            tokens,
+            _write_tsv,
+            lambda _: self._record_artifact_size("transcription", fingerprint)
+        )
         
         self.update_media_metadata(media_path)
 
 
     def get_media_scenes(self, media_path: Path) -> List[tuple] | None:
         fingerprint = calculate_fingerprint(media_path)
+        pending = self._writer.get_pending(self._get_scenes_path(fingerprint))
+        if pending is not None:
+            return list(pending)
         return self._get_scenes_from_disk(fingerprint)
 
 
@@ -399,7 +610,7 @@ class CacheSystem:
     def set_media_scenes(self, media_path: Path, scenes: List[tuple]) -> None:
         fingerprint = calculate_fingerprint(media_path)
         self._save_scenes_to_disk(fingerprint, scenes)
-        self._media_cache_dirty = True
+        self.media_store.mark_dirty(fingerprint)
 
 
     def _save_scenes_to_disk(self, fingerprint: Fingerprint, scenes: List[tuple]) -> None:
@@ -410,36 +621,61 @@ class CacheSystem:
             Fields: onset time, red channel, green channel, blue channel
         """
         
-        # Write scenes to disk
+        # Write scenes to disk, in the background
         log.info("Writting scenes to disk")
-        with self._get_scenes_path(fingerprint).open('w') as _fout:
-            for scene in scenes:
-                scene = [ str(f) for f in scene ]
-                _fout.write('\t'.join(scene) + '\n')
+        self._writer.submit(
+            self._get_scenes_path(fingerprint),
+            tuple(scenes),
+            _write_tsv,
+            lambda _: self._record_artifact_size("scenes", fingerprint)
+        )
 
     
     def get_waveform(self, media_path: Path) -> np.ndarray | None:
+        """
+        Return the cached waveform of a media file, as float16 samples.
+        Samples read from disk are memory-mapped when possible.
+        """
         log.info("Loading waveform from cache")
         fingerprint = calculate_fingerprint(media_path)
+        waveform_path = self._get_waveform_path(fingerprint)
+
+        pending = self._writer.get_pending(waveform_path)
+        if pending is not None:
+            return pending
+
+        with self._lock:
+            if waveform_path in self._deferred_removals:
+                log.info(f"File {waveform_path} was removed.")
+                return None
 
         if fingerprint in self.media_cache:
-            waveform_path = self._get_waveform_path(fingerprint)
             if os.path.exists(waveform_path):
-                return np.load(waveform_path)
+                try:
+                    return open_waveform(waveform_path, WAVEFORM_SAMPLERATE)
+                except (WaveformFileError, OSError) as e:
+                    log.info(f"Cached waveform {waveform_path} can't be used ({e})")
             else:
                 log.info(f"File {waveform_path} doesn't exist.")
         return None
     
 
     def set_waveform(self, media_path: Path, audio_samples: np.ndarray):
+        """Save a waveform in the background, the samples are kept as float16"""
         fingerprint = calculate_fingerprint(media_path)
+        audio_samples = audio_samples.astype(np.float16, copy=False)
 
-        # Save waveform to disk
+        def _on_saved(waveform_path: Path) -> None:
+            self._record_artifact_size("waveform", fingerprint)
+            self.update_media_metadata(media_path, { "waveform_size": waveform_path.stat().st_size })
+
+        # Save waveform to disk, in the background
         waveform_path = self._get_waveform_path(fingerprint)
+        with self._lock:
+            # Replaced by the new file
+            self._deferred_removals.discard(waveform_path)
         log.info(f"Saving the waveform to {waveform_path}")
-        np.save(waveform_path, audio_samples)
-
-        self.update_media_metadata(media_path, { "waveform_size": waveform_path.stat().st_size })
+        self._writer.submit(waveform_path, audio_samples, _write_waveform, _on_saved)
 
     
     # def clear_transcription(self, audio_path: str) -> None:
@@ -451,8 +687,7 @@ class CacheSystem:
     # def clear(self, audio_path: str) -> None:
     #     self.clear_transcription(audio_path)
     #     fingerprint = calculate_fingerprint(audio_path)
-    #     del self.media_cache[fingerprint]
-    #     self._save_root_cache_to_disk()
+    #     self.remove_media_metadata(fingerprint)
 
 
 
@@ -18,7 +18,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
 from __future__ import annotations
-from typing import Optional, List
+from typing import Optional, List, Dict, TYPE_CHECKING
 import logging
 
 from PySide6.QtWidgets import (
@@ -34,7 +34,9 @@ from src.interfaces import (
     WaveformInterface, TextDocumentInterface,
     DocumentInterface,
 )
-from src.services.media_player_controller import MediaPlayerController
+
+if TYPE_CHECKING:
+    from src.services.media_player_controller import MediaPlayerController
 
 
 log = logging.getLogger(__name__)
@@ -84,6 +86,74 @@ class CreateNewEmptyUtteranceCommand(QUndoCommand):
         self.text_widget.highlightUtterance(self.segment_id)
 
 
+class CreateUtterancesBatchCommand(QUndoCommand):
+    """
+    Create many new utterances with empty text,
+    the segments will be added to the waveform.
+
+    Consecutive batches with the same `merge_key` are undone at once,
+    for segments found progressively by a single operation.
+    """
+
+    def __init__(
+            self,
+            media_controller: MediaPlayerController,
+            document_controller: DocumentInterface,
+            text_widget: TextDocumentInterface,
+            waveform_widget: WaveformInterface,
+            segments: List[Segment],
+            merge_key: object = None
+        ):
+        log.debug(f"CreateUtterancesBatchCommand.__init__(parent, {len(segments)=})")
+
+        super().__init__()
+        self.media_controller = media_controller
+        self.document_controller = document_controller
+        self.text_widget =  text_widget
+        self.waveform_widget = waveform_widget
+        self.segments = {
+            self.document_controller.getNewSegmentId(): segment
+            for segment in segments
+        }
+        self.merge_key = merge_key
+        self.prev_cursor = self.text_widget.getCursorState()
+    
+
+    def id(self) -> int:
+        return -1 if self.merge_key is None else 4
+
+
+    def mergeWith(self, other: QUndoCommand) -> bool:
+        if not isinstance(other, CreateUtterancesBatchCommand) or other.merge_key != self.merge_key:
+            return False
+        self.segments.update(other.segments)
+        return True
+
+    
+    def undo(self):
+        if self.media_controller.getPlayingSegmentId() in self.segments:
+            self.media_controller.deselectSegment()
+        self.text_widget.deleteSentences(list(self.segments))
+        self.document_controller.removeSegments(list(self.segments))
+        self.waveform_widget.active_segments = [
+            segment_id for segment_id in self.waveform_widget.active_segments
+            if segment_id not in self.segments
+        ]
+        self.text_widget.setCursorState(self.prev_cursor)
+
+
+    def redo(self):
+        self.document_controller.addSegments(self.segments)
+        self.text_widget.insertSentencesWithIds('*', list(self.segments))
+        if self.segments:
+            # Batches of a single operation come one after another, keep the text still
+            self.text_widget.highlightUtterance(
+                list(self.segments)[-1],
+                scroll_text=self.merge_key is None
+            )
+
+
+
 class JoinUtterancesCommand(QUndoCommand):
     def __init__(
             self,
@@ -118,7 +188,7 @@ class JoinUtterancesCommand(QUndoCommand):
             cursor.insertText(self.segments_text[i+1])
             user_data = {"seg_id": seg_id}
             self.document_controller.setBlockMetadata(cursor.block(), user_data)
-            self.document_controller.segments[seg_id] = self.segments[i+1]
+            self.document_controller.addSegment(self.segments[i+1], seg_id)
             self.text_widget.deactivateSentence(seg_id)
         
         self.text_widget.setCursorState(self.prev_cursor)
@@ -236,6 +306,56 @@ class AlignBlockWithSegment(QUndoCommand):
 
 
 
+class AlignBlocksBatchCommand(QUndoCommand):
+    """Align many blocks with new segments at once"""
+
+    def __init__(
+            self,
+            document_controller: DocumentInterface,
+            text_edit: TextDocumentInterface,
+            blocks: List[QTextBlock],
+            segments: List[Segment],
+        ):
+        log.debug(f"AlignBlocksBatchCommand.__init__(parent, {len(blocks)=})")
+        super().__init__()
+        self.document_controller = document_controller
+        self.text_edit = text_edit
+        self.block_numbers: List[int] = [ block.blockNumber() for block in blocks ]
+        self.old_blocks_data = [
+            document_controller.getBlockMetadata(block).copy() for block in blocks
+        ]
+        self.segments = {
+            document_controller.getNewSegmentId(): segment for segment in segments
+        }
+    
+    def _setBlocksData(self, blocks_data: List[dict]) -> None:
+        document = self.text_edit.document()
+        for block_number, block_data in zip(self.block_numbers, blocks_data):
+            block = document.findBlockByNumber(block_number)
+            assert block.isValid()
+            block.setUserData(MyTextBlockUserData(block_data) if block_data else None)
+        
+        if self.block_numbers:
+            self.text_edit.invalidateLineNumbers(min(self.block_numbers))
+            self.document_controller.invalidateBlocks(min(self.block_numbers), max(self.block_numbers))
+            self.text_edit.highlighter.rehighlightRange(
+                document.findBlockByNumber(min(self.block_numbers)),
+                document.findBlockByNumber(max(self.block_numbers))
+            )
+    
+    def undo(self):
+        self.document_controller.removeSegments(list(self.segments))
+        self._setBlocksData(self.old_blocks_data)
+
+    def redo(self):
+        self.document_controller.addSegments(self.segments)
+        self._setBlocksData([
+            { **block_data, "seg_id": segment_id }
+            for block_data, segment_id in zip(self.old_blocks_data, self.segments)
+        ])
+
+
+
 class DeleteUtterancesCommand(QUndoCommand):
     def __init__(
             self,
@@ -574,6 +694,43 @@ class ReplaceTextCommand(QUndoCommand):
 
 
 
+class ReplaceTextsCommand(QUndoCommand):
+    """Replace the content of many text blocks at once, in a single edit block"""
+    def __init__(
+            self,
+            text_edit: TextDocumentInterface,
+            texts: Dict[int, str],
+        ):
+        super().__init__()
+        self.text_edit = text_edit
+        self.new_texts = texts  # New text of each block number
+        document = text_edit.document()
+        self.old_texts = {
+            block_number: text_edit.getBlockHtml(document.findBlockByNumber(block_number))[0]
+            for block_number in texts
+        }
+        self.prev_cursor = self.text_edit.getCursorState()
+    
+    def _replaceTexts(self, texts: Dict[int, str]) -> None:
+        document = self.text_edit.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        for block_number, text in texts.items():
+            block = document.findBlockByNumber(block_number)
+            cursor.setPosition(block.position())
+            cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertHtml(text.replace('\u2028', "<br>"))
+        cursor.endEditBlock()
+        self.text_edit.setCursorState(self.prev_cursor)
+
+    def undo(self):
+        self._replaceTexts(self.old_texts)
+
+    def redo(self):
+        self._replaceTexts(self.new_texts)
+
+
+
 class MoveTextCursor(QUndoCommand):
     """Move the text cursor
 
@@ -672,6 +829,30 @@ class ResizeSegmentCommand(QUndoCommand):
 
 
 
+class ResizeSegmentsCommand(QUndoCommand):
+    """Resize many segments at once, with a single UI update"""
+    def __init__(
+            self,
+            document_controller: DocumentInterface,
+            segments: Dict[SegmentId, Segment],
+        ):
+        super().__init__()
+        self.document_controller = document_controller
+        self.new_segments = {
+            segment_id: segment[:] for segment_id, segment in segments.items()
+        }
+        self.old_segments = {
+            segment_id: document_controller.segments[segment_id][:] for segment_id in segments
+        }
+    
+    def undo(self):
+        self.document_controller.updateSegments(self.old_segments)
+    
+    def redo(self):
+        self.document_controller.updateSegments(self.new_segments)
+
+
+
 class DeleteSegmentsCommand(QUndoCommand):
     def __init__(
             self,
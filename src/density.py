@@ -0,0 +1,198 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Speech density (characters per second) of utterances.
+
+The number of characters and the duration of every utterance are kept in arrays,
+updated one utterance at a time when its text or its segment changes.
+Statistics on the whole document are computed in a single vectorized pass.
+"""
+
+
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.interfaces import Segment, SegmentId
+
+
+
+@dataclass
+class DensityStatistics:
+    num_utterances: int = 0
+    target_density: float = 0.0
+    mean_density: float = 0.0
+    max_density: float = 0.0
+    over_target: int = 0        # Number of utterances denser than the target
+    histogram: List[int] = field(default_factory=list)
+    bin_edges: List[float] = field(default_factory=list)
+    worst: List[Tuple[SegmentId, float]] = field(default_factory=list) # Densest first
+
+
+
+class DensityIndex:
+    """
+    Number of characters and duration of utterances, indexed by segment ID.
+    A negative number of characters means that the utterance text must be counted again.
+    """
+
+    initial_capacity = 256
+
+    def __init__(self) -> None:
+        self.clear()
+
+
+    def clear(self) -> None:
+        self._rows: Dict[SegmentId, int] = dict()
+        self._free_rows: List[int] = []
+        self._segment_ids = np.full(self.initial_capacity, -1, dtype=np.int64)
+        self._num_chars = np.full(self.initial_capacity, -1, dtype=np.int32)
+        self._durations = np.zeros(self.initial_capacity, dtype=np.float64)
+
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+    def __contains__(self, segment_id: SegmentId) -> bool:
+        return segment_id in self._rows
+
+
+    def _getRow(self, segment_id: SegmentId) -> int:
+        row = self._rows.get(segment_id)
+        if row is not None:
+            return row
+
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._rows)
+            if row >= len(self._segment_ids):
+                self._grow()
+
+        self._rows[segment_id] = row
+        self._segment_ids[row] = segment_id
+        self._num_chars[row] = -1
+        self._durations[row] = 0.0
+        return row
+
+
+    def _grow(self) -> None:
+        capacity = len(self._segment_ids)
+        self._segment_ids = np.concatenate((self._segment_ids, np.full(capacity, -1, dtype=np.int64)))
+        self._num_chars = np.concatenate((self._num_chars, np.full(capacity, -1, dtype=np.int32)))
+        self._durations = np.concatenate((self._durations, np.zeros(capacity, dtype=np.float64)))
+
+
+    def setSegment(self, segment_id: SegmentId, segment: Segment) -> None:
+        """Update the duration of an utterance, its number of characters is left untouched"""
+        start, end = segment
+        row = self._getRow(segment_id)
+        self._durations[row] = end - start
+
+
+    def setNumChars(self, segment_id: SegmentId, num_chars: int) -> None:
+        row = self._getRow(segment_id)
+        self._num_chars[row] = num_chars
+
+
+    def invalidateNumChars(self, segment_id: SegmentId) -> None:
+        row = self._rows.get(segment_id)
+        if row is not None:
+            self._num_chars[row] = -1
+
+
+    def remove(self, segment_id: SegmentId) -> None:
+        row = self._rows.pop(segment_id, None)
+        if row is None:
+            return
+        self._segment_ids[row] = -1
+        self._num_chars[row] = -1
+        self._durations[row] = 0.0
+        self._free_rows.append(row)
+
+
+    def getDensity(self, segment_id: SegmentId) -> Optional[float]:
+        """
+        Return the density (chars/s) of an utterance,
+        or None if its number of characters is unknown
+        """
+        row = self._rows.get(segment_id)
+        if row is None or self._num_chars[row] < 0:
+            return None
+
+        duration = self._durations[row]
+        if duration <= 0.0:
+            return 0.0
+        return float(self._num_chars[row] / duration)
+
+
+    def getInvalidSegmentIds(self) -> List[SegmentId]:
+        """Return the IDs of utterances whose number of characters is unknown"""
+        invalid = (self._segment_ids >= 0) & (self._num_chars < 0)
+        return self._segment_ids[invalid].tolist()
+
+
+    def getStatistics(
+            self,
+            target_density: float,
+            num_bins: int = 10,
+            num_worst: int = 5
+        ) -> DensityStatistics:
+        """
+        Compute statistics on the density of every utterance.
+        Utterances with an unknown number of characters or a null duration are ignored.
+
+        Args:
+            target_density (float): Maximum density (chars/s)
+            num_bins (int): Number of histogram bins, between 0 and twice the target density
+            num_worst (int): Number of densest utterances to return
+        """
+        valid = (self._segment_ids >= 0) & (self._num_chars >= 0) & (self._durations > 0.0)
+        segment_ids = self._segment_ids[valid]
+        densities = self._num_chars[valid] / self._durations[valid]
+
+        stats = DensityStatistics(num_utterances=len(densities), target_density=target_density)
+        if len(densities) == 0:
+            return stats
+
+        stats.mean_density = float(densities.mean())
+        stats.max_density = float(densities.max())
+        stats.over_target = int(np.count_nonzero(densities >= target_density))
+
+        # Denser utterances are counted in the last bin
+        upper_bound = 2.0 * target_density if target_density > 0.0 else stats.max_density
+        histogram, bin_edges = np.histogram(
+            np.minimum(densities, upper_bound),
+            bins=num_bins,
+            range=(0.0, max(upper_bound, 1e-6))
+        )
+        stats.histogram = histogram.tolist()
+        stats.bin_edges = bin_edges.tolist()
+
+        num_worst = min(num_worst, len(densities))
+        if num_worst > 0:
+            worst = np.argpartition(densities, -num_worst)[-num_worst:]
+            worst = worst[np.argsort(densities[worst])[::-1]]
+            stats.worst = [
+                (int(segment_ids[i]), float(densities[i]))
+                for i in worst
+            ]
+        return stats
@@ -19,7 +19,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from typing import List, Tuple, Dict, Optional, Iterator
 import logging
 from pathlib import Path
-from copy import deepcopy
+import time
 
 from ostilhou.asr import extract_metadata
 
@@ -27,7 +27,7 @@ from PySide6.QtGui import (
     QTextBlock, QUndoStack,
     QTextCursor
 )
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, QTimer
 
 from src.interfaces import (
     BlockType,
@@ -52,6 +52,10 @@ from src.aligner import (
     SmartSplitError
 )
 from src.cache_system import cache
+from src.density import DensityIndex, DensityStatistics
+from src.subtitle_timeline import SubtitleTimeline
+from src.segment_store import SegmentStore
+from src.document_snapshot import BlockRecords, DocumentSnapshot
 from src.strings import app_strings
 
 
@@ -59,6 +63,11 @@ from src.strings import app_strings
 log = logging.getLogger(__name__)
 
 
+# Block records are computed in the background by small batches
+RECORDS_FILL_INTERVAL_MS = 20
+RECORDS_FILL_BUDGET = 0.005  # in seconds
+
+
 
 class DocumentController(QObject):
     message = Signal(str)
@@ -68,8 +77,15 @@ class DocumentController(QObject):
         super().__init__(parent)
 
         self.media_path: Optional[Path]
-        self.segments: Dict[SegmentId, Segment] = dict()
+        self.segments = SegmentStore()
         self._sorted_segments = []
+        self._block_numbers: Dict[SegmentId, int] = dict() # Block number of utterances, may be outdated
+        self.densities = DensityIndex()
+        self.subtitles = SubtitleTimeline()
+        self.block_records = BlockRecords(lambda block: self.text_widget.getBlockHtml(block)[0])
+        self._records_timer = QTimer(self)
+        self._records_timer.setInterval(RECORDS_FILL_INTERVAL_MS)
+        self._records_timer.timeout.connect(self._fillBlockRecords)
 
         self.text_widget: Optional[TextEditWidget] = None
         self.waveform_widget: Optional[WaveformWidget] = None
@@ -86,6 +102,10 @@ class DocumentController(QObject):
         """ Clears the document """
         # self.media_path = None
         self.segments.clear()
+        self._block_numbers.clear()
+        self.densities.clear()
+        self.subtitles.clear()
+        self.block_records.clear()
         self.id_counter = 0
         self.must_sort = True
 
@@ -94,7 +114,7 @@ class DocumentController(QObject):
         
         # Clear text document
         if self.text_widget is not None:
-            self.text_widget.document().clear()
+            self.text_widget.clear()
             self.text_widget.updateLineNumberAreaWidth()
             self.text_widget.updateLineNumberArea()
         
@@ -128,38 +148,84 @@ class DocumentController(QObject):
         Args:
             data (list): List of document blocks (text, Segment)
         """
-        # TODO: This function seems quite slow
-
         if self.text_widget is None:
             return
 
         self.clear()
 
+        # Build the segments and block indexes in a single pass
+        sentences = []
+        for block_number, (text, segment) in enumerate(data):
+            segment_id = None
+            if segment:
+                segment_id = self.getNewSegmentId()
+                self.segments[segment_id] = segment
+                self._block_numbers[segment_id] = block_number
+                self.densities.setSegment(segment_id, segment)
+            sentences.append((text, segment_id))
+        self.getSortedSegments()
+        
+        if self.waveform_widget:
+            self.waveform_widget.must_redraw = True
+
         was_blocked = self.text_widget.document().blockSignals(True)
-        for text, segment in data:
-            segment_id = self.addSegment(segment) if segment else None
-            self.text_widget.appendSentence(text, segment_id)
+        self.text_widget.appendSentences(sentences)
         self.text_widget.document().blockSignals(was_blocked)
         
         self.text_widget.updateLineNumberAreaWidth()
         self.text_widget.updateLineNumberArea()
+        self._records_timer.start()
     
 
+    def getSnapshot(self) -> DocumentSnapshot:
+        """
+        An immutable copy of the document.
+        Only the blocks modified since the previous snapshot are read again.
+        """
+        return DocumentSnapshot(
+            self.block_records.getRecords(self.text_widget.document()),
+            self.segments.copy()
+        )
+
+
+    def getSnapshotBacklog(self) -> int:
+        """Number of blocks that would be read by a snapshot right now"""
+        return self.block_records.getNumMissing(self.text_widget.document())
+
+
+    def invalidateBlocks(self, first_block_number: int, last_block_number: int) -> None:
+        """
+        Blocks were modified, inserted or removed between these block numbers.
+        Must be called after every change of the text document, unless it emitted `contentsChange`.
+        """
+        self.block_records.invalidate(
+            first_block_number,
+            last_block_number,
+            self.text_widget.document().blockCount()
+        )
+        if not self._records_timer.isActive():
+            self._records_timer.start()
+
+
+    def _fillBlockRecords(self) -> None:
+        """Compute the records of modified blocks ahead of the next snapshot"""
+        if self.text_widget is None:
+            self._records_timer.stop()
+            return
+        deadline = time.perf_counter() + RECORDS_FILL_BUDGET
+        if self.block_records.fill(self.text_widget.document(), deadline):
+            self._records_timer.stop()
+
+
     def getDocumentState(self) -> dict:
         state = dict()
         cursor = self.text_widget.textCursor()
         state["cursor_position"] = cursor.position()
         state["cursor_anchor"] = cursor.anchor()
         # state["n_blocks"] = main_window.text_edit.document().blockCount()
-        state["blocks"] = []
-        block = self.text_widget.document().firstBlock()
-        while block.isValid():
-            text = block.text()[:]
-            data = deepcopy(block.userData().data) if block.userData() else {}
-            data.pop("density", None)
-            state["blocks"].append((text, data))
-            block = block.next()
-        state["segments"] = deepcopy(self.segments)
+        snapshot = self.getSnapshot()
+        state["blocks"] = [(record.text, record.data) for record in snapshot.blocks]
+        state["segments"] = snapshot.segments
         return state
     
     
@@ -189,6 +255,8 @@ class DocumentController(QObject):
             user_data = block.userData().data
             user_data["seg_id"] = segment_id
         
+        self.block_records.invalidateBlock(block.blockNumber())
+        self.text_widget.invalidateLineNumbers(block.blockNumber())
         self.text_widget.highlighter.rehighlightBlock(block)
 
 
@@ -209,13 +277,25 @@ class DocumentController(QObject):
             return None
         
         document = self.text_widget.document()
+        
+        block_number = self._block_numbers.get(segment_id)
+        if block_number is not None:
+            block = document.findBlockByNumber(block_number)
+            if self.getBlockId(block) == segment_id:
+                return block
+        
+        # The index is outdated, rebuild it while searching
+        self._block_numbers.clear()
+        found = None
         block = document.firstBlock()
         while block.isValid():
-            if block.userData():
-                if block.userData().data["seg_id"] == segment_id:
-                    return block
+            block_id = self.getBlockId(block)
+            if block_id >= 0:
+                self._block_numbers.setdefault(block_id, block.blockNumber())
+                if found is None and block_id == segment_id:
+                    found = block
             block = block.next()
-        return None
+        return found
     
 
     def getBlockType(self, block: QTextBlock) -> BlockType:
@@ -257,14 +337,22 @@ class DocumentController(QObject):
     def setBlockMetadata(self, block: QTextBlock, metadata: dict | None) -> None:
         if metadata:
             block.setUserData(MyTextBlockUserData(metadata))
+            if "seg_id" in metadata:
+                self.subtitles.invalidateCaption(metadata["seg_id"])
         else:
             block.setUserData(None)
+        self.block_records.invalidateBlock(block.blockNumber())
+        self.text_widget.invalidateLineNumbers(block.blockNumber())
 
 
     def updateBlockMetadata(self, block: QTextBlock, metadata: dict) -> None:
         block_metadata = self.getBlockMetadata(block)
         block_metadata.update(metadata)
         block.setUserData(MyTextBlockUserData(block_metadata))
+        if "seg_id" in metadata:
+            self.subtitles.invalidateCaption(metadata["seg_id"])
+        self.block_records.invalidateBlock(block.blockNumber())
+        self.text_widget.invalidateLineNumbers(block.blockNumber())
         self.text_widget.highlighter.rehighlightBlock(block)
 
 
@@ -280,12 +368,27 @@ class DocumentController(QObject):
         if segment_id is None:
             segment_id = self.getNewSegmentId()
         self.segments[segment_id] = segment
+        self.densities.setSegment(segment_id, segment)
 
         self.must_sort = True
         self.waveform_widget.must_redraw = True
+        if self.text_widget is not None:
+            self.text_widget.invalidateLineNumbers()
         return segment_id
         
 
+    def addSegments(self, segments: Dict[SegmentId, Segment]) -> None:
+        """Add many segments at once, refreshing the UI only once"""
+        for segment_id, segment in segments.items():
+            self.segments[segment_id] = segment
+            self.densities.setSegment(segment_id, segment)
+
+        self.must_sort = True
+        self.waveform_widget.must_redraw = True
+        if self.text_widget is not None:
+            self.text_widget.invalidateLineNumbers()
+        
+
     def getSegment(self, segment_id: SegmentId) -> Optional[Segment]:
         if segment_id in self.segments:
             return self.segments[segment_id]
@@ -296,24 +399,59 @@ class DocumentController(QObject):
         """Updates a segment already present in document"""
         assert segment_id in self.segments
         self.segments[segment_id] = segment
-        self.updateUtteranceDensity(segment_id)
+        self.densities.setSegment(segment_id, segment)
 
         self.must_sort = True
         self.waveform_widget.must_redraw = True
         self.refresh_segment_info.emit(segment_id)
 
 
+    def updateSegments(self, segments: Dict[SegmentId, Segment]) -> None:
+        """Update many segments at once, refreshing the UI only once"""
+        for segment_id, segment in segments.items():
+            assert segment_id in self.segments
+            self.segments[segment_id] = segment
+            self.densities.setSegment(segment_id, segment)
+
+        self.must_sort = True
+        self.waveform_widget.must_redraw = True
+        if self.text_widget is not None:
+            highlighter = self.text_widget.highlighter
+            if highlighter.mode == highlighter.ColorMode.DENSITY:
+                highlighter.rehighlightLazily(block_formats_only=True)
+        
+        active_segment_id = self.waveform_widget.active_segment_id
+        if active_segment_id in segments:
+            self.refresh_segment_info.emit(active_segment_id)
+
+
     def removeSegment(self, segment_id: SegmentId) -> None:
         assert segment_id in self.segments
         del self.segments[segment_id]
+        self.densities.remove(segment_id)
         self.must_sort = True
         self.waveform_widget.must_redraw = True
+        if self.text_widget is not None:
+            self.text_widget.invalidateLineNumbers()
+
+    
+    def removeSegments(self, segment_ids: List[SegmentId]) -> None:
+        """Remove many segments at once, refreshing the UI only once"""
+        for segment_id in segment_ids:
+            assert segment_id in self.segments
+            del self.segments[segment_id]
+            self.densities.remove(segment_id)
+        
+        self.must_sort = True
+        self.waveform_widget.must_redraw = True
+        if self.text_widget is not None:
+            self.text_widget.invalidateLineNumbers()
 
     
     def getSortedSegments(self) -> List[Tuple[SegmentId, Segment]]:
         """Return the list of (SegmentId, Segment), sorted by start time"""
         if self.must_sort:
-            self._sorted_segments = sorted(self.segments.items(), key=lambda x: x[1])
+            self._sorted_segments = self.segments.getSortedItems()
             self.must_sort = False
         return self._sorted_segments
 
@@ -406,15 +544,13 @@ class DocumentController(QObject):
     ) -> List[SegmentId]:
         """Return the list of IDs of all segment at a given positiont"""
         log.debug(f"getSegmentAtTime({position_sec=})")
-        segment_ids = []
-        for segment_id, (start, end) in self.getSortedSegments():
+        candidates = self.segments.getItemsInRange(position_sec - offset, position_sec + 0.001 + onset)
+        return [
+            segment_id for segment_id, (start, end) in candidates
             # Give precedence to the segment that starts at this timecode
             # rather than the one that ends at this timecode
-            if start - 0.001 - onset <= position_sec < end + offset:
-                segment_ids.append(segment_id)
-            elif start - onset > position_sec:
-                return segment_ids
-        return segment_ids
+            if start - 0.001 - onset <= position_sec < end + offset
+        ]
     
 
     def getSegmentsAtTimeOffsets(
@@ -451,7 +587,7 @@ class DocumentController(QObject):
 
 
     def getUtteranceDensity(self, segment_id: SegmentId) -> float:
-        """Get the density (chars/s) field of an utterance"""
+        """Get the density (chars/s) of an utterance"""
         log.debug(f"getUtteranceDensity({segment_id=})")
 
         if self.waveform_widget is None:
@@ -461,40 +597,61 @@ class DocumentController(QObject):
         if self.waveform_widget.resizing_handle and self.waveform_widget.active_segment_id == segment_id:
             return self.waveform_widget.resizing_density
 
-        block = self.getBlockById(segment_id)
-        if not block:
-            log.warning("No block found for id: {seg_id}")
-            return 0.0
-        
-        block_metadata = block.userData().data
-        if "density" not in block_metadata:
+        density = self.densities.getDensity(segment_id)
+        if density is None:
             self.updateUtteranceDensity(segment_id)
+            density = self.densities.getDensity(segment_id)
 
-        return block_metadata.get("density", 0.0)
+        return density if density is not None else 0.0
     
 
     def updateUtteranceDensity(self, segment_id: SegmentId) -> None:
-        """Update the density (chars/s) field of an utterance"""
+        """Count the characters of an utterance again, after its text has changed"""
         log.debug(f"updateUtteranceDensity({segment_id=})")
         assert self.text_widget is not None
+        
+        segment = self.getSegment(segment_id)
+        if not segment:
+            return
                 
         block = self.getBlockById(segment_id)
         if block is None:
+            log.warning(f"No block found for id: {segment_id}")
             return
 
-        # Count the number of characters in sentence
-        num_chars = self.getSentenceLength(block)
+        self.densities.setSegment(segment_id, segment)
+        self.densities.setNumChars(segment_id, self.getSentenceLength(block))
 
-        segment = self.getSegment(segment_id)
-        if not segment:
-            return
-        
-        start, end = segment
-        dur = end - start
-        if dur > 0.0:
-            new_density = num_chars / dur
-            # current_density = block.userData().data.get("density", -1.0)
-            block.userData().data["density"] = new_density
+
+    def invalidateUtterances(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        """
+        Mark the utterances of a range of blocks as modified:
+        their characters will be counted again and their captions formatted again
+        """
+        self.invalidateBlocks(first_block.blockNumber(), last_block.blockNumber())
+        block = first_block
+        for _ in range(last_block.blockNumber() - first_block.blockNumber() + 1):
+            segment_id = self.getBlockId(block)
+            if segment_id >= 0:
+                self.densities.invalidateNumChars(segment_id)
+                self.subtitles.invalidateCaption(segment_id)
+            block = block.next()
+
+
+    def getDensityStatistics(
+            self,
+            target_density: float,
+            num_bins: int = 10,
+            num_worst: int = 5
+        ) -> DensityStatistics:
+        """Return statistics on the density of every utterance of the document"""
+        for segment_id, segment in self.segments.items():
+            if segment_id not in self.densities:
+                self.densities.setSegment(segment_id, segment)
+        for segment_id in self.densities.getInvalidSegmentIds():
+            self.updateUtteranceDensity(segment_id)
+
+        return self.densities.getStatistics(target_density, num_bins, num_worst)
 
 
     def getSentenceLength(self, block: QTextBlock) -> int:
@@ -590,6 +747,34 @@ class DocumentController(QObject):
         return (seg_id, html)
 
 
+    def getSegmentIdAtTime(self, position_sec: float) -> SegmentId:
+        """
+        Return the ID of the segment at a time position, or -1.
+        Same as the first ID returned by `getSegmentsAtTime`, with a bisection.
+        """
+        sorted_segments = self.getSortedSegments()
+        if self.subtitles.isOutdated(sorted_segments):
+            self.subtitles.build(sorted_segments)
+        return self.subtitles.getSegmentAt(position_sec)
+
+
+    def getCaptionAtTime(self, position_sec: float) -> str:
+        """
+        Return the caption to display at a time position, stripped of its metadata.
+        The same string object is returned as long as the caption doesn't change.
+        """
+        segment_id = self.getSegmentIdAtTime(position_sec)
+        return self.subtitles.getCaption(segment_id, self._getCaptionHtml)
+
+
+    def _getCaptionHtml(self, segment_id: SegmentId) -> str:
+        block = self.getBlockById(segment_id)
+        if self.text_widget is None or block is None:
+            return ""
+        html, _ = self.text_widget.getBlockHtml(block)
+        return html
+
+
     def getTranscriptionFor(self, segment_id: SegmentId) -> list:
         """ Return a list of transcription tokens """
         
@@ -627,29 +812,29 @@ class DocumentController(QObject):
         return []
 
 
-    def getUtterancesForExport(self) -> List[Tuple[str, Segment]]:
-        """Return all sentences and segments for export"""
+    def iterUtterancesForExport(self) -> Iterator[Tuple[str, Segment]]:
+        """Generate sentences and segments for export, in a single pass over the document"""
         if self.text_widget is None:
-            return []
+            return
         
-        utterances = []
         block = self.text_widget.document().firstBlock()
         while block.isValid():
             if self.getBlockType(block) == BlockType.ALIGNED:
-                text = self.text_widget.getBlockHtml(block)[0]
-
-                # Remove extra spaces
-                lines = [' '.join(l.split()) for l in text.split(LINE_BREAK)]
-                text = LINE_BREAK.join(lines)
-            
                 block_id = self.getBlockId(block)
                 segment = self.getSegment(block_id)
                 if segment:
-                    utterances.append( (text, segment) )
+                    text = self.text_widget.getBlockHtml(block)[0]
+
+                    # Remove extra spaces
+                    lines = [' '.join(l.split()) for l in text.split(LINE_BREAK)]
+                    yield LINE_BREAK.join(lines), segment
             
             block = block.next()
-        
-        return utterances
+
+
+    def getUtterancesForExport(self) -> List[Tuple[str, Segment]]:
+        """Return all sentences and segments for export"""
+        return list(self.iterUtterancesForExport())
     
 
     def splitFromText(self, segment_id: SegmentId, position: int) -> None:
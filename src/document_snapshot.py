@@ -0,0 +1,158 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Snapshots of a document.
+
+Every block of the text document has an immutable record of its text,
+its HTML and its user data. Records are kept until their block is modified,
+so a snapshot only computes the records of the blocks modified since
+the previous one, and consecutive snapshots share the other records.
+"""
+
+
+from copy import deepcopy
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import time
+
+from PySide6.QtGui import QTextBlock, QTextDocument
+
+from src.interfaces import Segment
+from src.segment_store import SegmentStore
+
+
+
+class BlockRecord(NamedTuple):
+    text: str   # Plain text
+    html: str   # Text with its formatting, as saved in ALI files
+    data: dict  # Copy of the block user data, must not be modified
+
+
+
+class DocumentSnapshot(NamedTuple):
+    blocks: Tuple[BlockRecord, ...]
+    segments: SegmentStore
+
+
+    def getBlocksData(self) -> List[Tuple[str, Optional[Segment]]]:
+        """Return the blocks as (html, segment), as expected by `FileManager.save_ali_file`"""
+        return [
+            (record.html, self.segments.get(record.data.get("seg_id", -1)))
+            for record in self.blocks
+        ]
+
+
+
+class BlockRecords:
+    """
+    Records of the blocks of a text document, by block number.
+    A record of `None` is computed on the next snapshot,
+    or beforehand by calling `fill` when the application is idle.
+    """
+
+    def __init__(self, get_html: Callable[[QTextBlock], str]) -> None:
+        self.get_html = get_html
+        self.clear()
+
+
+    def clear(self) -> None:
+        self._records: List[Optional[BlockRecord]] = []
+
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+    def invalidate(self, first_block_number: int, last_block_number: int, block_count: int) -> None:
+        """
+        Blocks from `first_block_number` to `last_block_number` were modified or inserted,
+        and the blocks removed were between them.
+        `block_count` is the number of blocks in the document after the change.
+        """
+        records = self._records
+        delta = block_count - len(records)
+        old_last = last_block_number - delta
+        if (first_block_number < 0
+                or last_block_number < first_block_number
+                or old_last < first_block_number - 1
+                or old_last >= len(records)):
+            # The change doesn't fit the records, all blocks will be recorded again
+            self._records = [None] * block_count
+            return
+        records[first_block_number:old_last + 1] = [None] * (last_block_number - first_block_number + 1)
+
+
+    def invalidateBlock(self, block_number: int) -> None:
+        """The user data of a block has changed"""
+        if 0 <= block_number < len(self._records):
+            self._records[block_number] = None
+
+
+    def getNumMissing(self, document: QTextDocument) -> int:
+        """Number of blocks to read on the next snapshot"""
+        if len(self._records) != document.blockCount():
+            return document.blockCount()
+        return self._records.count(None)
+
+
+    def _nextMissing(self, start: int) -> int:
+        """Return the block number of the next missing record, or -1"""
+        try:
+            return self._records.index(None, start)
+        except ValueError:
+            return -1
+
+
+    def _record(self, block: QTextBlock) -> BlockRecord:
+        user_data = block.userData()
+        return BlockRecord(
+            block.text(),
+            self.get_html(block),
+            deepcopy(user_data.data) if user_data else {}
+        )
+
+
+    def fill(self, document: QTextDocument, deadline: Optional[float] = None) -> bool:
+        """
+        Compute the missing records.
+        Stops after `deadline` (a `time.perf_counter` value), if given.
+
+        Returns:
+            True if all records are computed
+        """
+        if len(self._records) != document.blockCount():
+            # Blocks were added or removed without notice (when loading a document)
+            self._records = [None] * document.blockCount()
+        records = self._records
+
+        i = self._nextMissing(0)
+        while i >= 0:
+            block = document.findBlockByNumber(i)
+            while block.isValid() and records[i] is None:
+                records[i] = self._record(block)
+                i += 1
+                block = block.next()
+                if deadline is not None and time.perf_counter() > deadline:
+                    return self._nextMissing(i) < 0
+            i = self._nextMissing(i)
+        return True
+
+
+    def getRecords(self, document: QTextDocument) -> Tuple[BlockRecord, ...]:
+        self.fill(document)
+        return tuple(self._records)
@@ -1,7 +1,13 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import subprocess
 import logging
+import tempfile
+import wave
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 
 from pathlib import Path
 from PySide6.QtCore import QObject, QThread, Signal, Slot
@@ -12,6 +18,7 @@ from PySide6.QtWidgets import (
 )
 
 from src.interfaces import Segment, MainWindowInterface
+from src.exports.textual_exporter import clean_text
 from src.ui.icons import icons
 
 
@@ -110,6 +117,126 @@ class ExportAudioDialog(QDialog):
 
 
 
+class ExtractionMode(Enum):
+    COPY = 0    # Concurrent FFmpeg processes, stream copy
+    SPLIT = 1   # Single FFmpeg process with the segment muxer, stream copy
+    PCM = 2     # Decode once to 16kHz mono PCM, segments are sliced from the decoded buffer
+
+
+
+PCM_SAMPLE_RATE = 16000
+
+
+
+def _get_output_name(index: int, segment: Segment, ext: str) -> str:
+    start, end = segment
+    return f"segment_{index:03}_{round(start)}_{round(end)}{ext}"
+
+
+
+def build_extract_command(media_path: Path, segment: Segment, output_path: Path) -> List[str]:
+    """
+    FFmpeg command extracting a single segment.
+    Seeking is done on the input (`-ss` before `-i`),
+    so FFmpeg jumps right to the segment instead of reading the whole file up to it.
+    """
+    start, end = segment
+    return [
+        'ffmpeg', '-y', '-nostdin',
+        '-loglevel', 'error',
+        '-ss', f"{start:.3f}", '-t', f"{end - start:.3f}",
+        '-i', str(media_path),
+        '-vn',
+        '-c', 'copy',
+        str(output_path)
+    ]
+
+
+
+def plan_segment_cuts(segments: List[Segment]) -> Optional[Tuple[List[float], Dict[int, int]]]:
+    """
+    Cut times for FFmpeg's segment muxer.
+    The muxer splits the whole timeline, so gaps between segments become pieces too.
+
+    Returns:
+        A tuple (cut times, segment index of each kept piece),
+        or None if segments overlap and can't be split in a single pass.
+    """
+    order = sorted(range(len(segments)), key=lambda i: segments[i][0])
+    cut_times: List[float] = []
+    kept_pieces: Dict[int, int] = dict()
+    piece = 0
+    position = 0.0
+    for i in order:
+        start, end = segments[i]
+        if start < position - 0.001:
+            return None
+        if start > position + 0.001:
+            # Gap before this segment
+            cut_times.append(start)
+            piece += 1
+        kept_pieces[piece] = i
+        cut_times.append(end)
+        piece += 1
+        position = end
+    return cut_times, kept_pieces
+
+
+
+def build_decode_command(media_path: Path, output_path: Path) -> List[str]:
+    """FFmpeg command decoding a whole media file to raw 16kHz mono PCM"""
+    return [
+        'ffmpeg', '-y', '-nostdin',
+        '-loglevel', 'error',
+        '-i', str(media_path),
+        '-vn',
+        '-ar', str(PCM_SAMPLE_RATE), '-ac', '1', # 16kHz sample rate, single channel
+        '-f', 's16le',                           # 16-bit signed little-endian PCM
+        str(output_path)
+    ]
+
+
+
+def write_wav_segment(
+        pcm: np.ndarray,
+        segment: Segment,
+        output_path: Path,
+        sample_rate: int = PCM_SAMPLE_RATE
+    ) -> None:
+    """
+    Write a segment of a 16-bit mono PCM buffer to a WAV file.
+    The samples are written from a view of the buffer, without copy.
+    """
+    start, end = segment
+    first = max(0, round(start * sample_rate))
+    last = min(len(pcm), round(end * sample_rate))
+    with wave.open(str(output_path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(memoryview(pcm[first:max(first, last)]))
+
+
+
+def write_segment_text(text: str, output_path: Path) -> None:
+    """Write the plain text of an utterance on a single line, next to its WAV file"""
+    text = clean_text(text) or ''
+    with open(output_path.with_suffix(".txt"), 'w', encoding="utf-8") as text_file:
+        text_file.write(' '.join(text.split()) + '\n')
+
+
+
+def _get_startupinfo():
+    # Windows users might see a popup CMD window without startupinfo
+    # This ensures the subprocess runs invisibly
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
+
+
+
 class _AudioWorker(QObject):
     """
     Internal Worker class. The Main Window never sees this.
@@ -120,64 +247,187 @@ class _AudioWorker(QObject):
     progress_update = Signal(int, int, str)
     error_occurred = Signal(str)
 
-    def __init__(self, media_path: Path, segments: List[Segment], output_dir: Path):
+    max_processes = min(8, os.cpu_count() or 1) # Concurrent FFmpeg processes
+
+    def __init__(
+            self,
+            media_path: Path,
+            segments: List[Segment],
+            output_dir: Path,
+            mode: ExtractionMode = ExtractionMode.COPY,
+            texts: Optional[List[str]] = None
+        ):
         super().__init__()
         self.media_path = media_path
         self.output_dir = output_dir
         self.segments = segments
+        self.mode = mode
+        self.texts = texts
         self._must_stop = False
 
     @Slot()
     def process(self):
-        total = len(self.segments)
-        for i, segment in enumerate(self.segments):
-            if self._must_stop:
-                break
+        # Create folder if missing
+        if self.output_dir and not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+        try:
+            if self.mode == ExtractionMode.PCM:
+                self._processDecoded()
+            elif self.mode == ExtractionMode.SPLIT and self._processSingle():
+                pass
+            else:
+                self._processParallel()
+        except Exception as e:
+            self.error_occurred.emit(str(e))
 
-            start, end = segment
-            
-            # Create folder if missing
-            if self.output_dir and not os.path.exists(self.output_dir):
-                os.makedirs(self.output_dir)
-
-            ext = self.media_path.suffix
-            output_path = self.output_dir / f"segment_{i:03}_{round(start)}_{round(end)}{ext}"
-
-            cmd = [
-                'ffmpeg', '-y',
-                '-i', self.media_path,
-                '-ss', str(start), '-to', str(end),
-                '-vn',
-                '-c', 'copy',
-                output_path
-            ]
+        self.finished.emit()
 
-            try:
-                # Windows users might see a popup CMD window without startupinfo
-                # This ensures the subprocess runs invisibly
-                startupinfo = None
-                if os.name == 'nt':
-                    startupinfo = subprocess.STARTUPINFO()
-                    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    startupinfo=startupinfo
-                )
-
-                if result.returncode != 0:
-                    self.error_occurred.emit(f"FFmpeg Error on {os.path.basename(output_path)}")
+    def _extract(self, i: int, segment: Segment) -> Tuple[str, bool]:
+        output_name = _get_output_name(i, segment, self.media_path.suffix)
+        if self._must_stop:
+            return output_name, False
+        
+        result = subprocess.run(
+            build_extract_command(self.media_path, segment, self.output_dir / output_name),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            startupinfo=_get_startupinfo()
+        )
+        if result.returncode != 0:
+            log.error(result.stderr)
+        return output_name, result.returncode == 0
+
+    def _processParallel(self) -> None:
+        """Run a bounded pool of FFmpeg processes, one per segment"""
+        total = len(self.segments)
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_processes) as executor:
+            futures = [
+                executor.submit(self._extract, i, segment)
+                for i, segment in enumerate(self.segments)
+            ]
+            for future in as_completed(futures):
+                output_name, success = future.result()
+                if self._must_stop:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                if success:
+                    done += 1
+                    self.progress_update.emit(done, total, output_name)
                 else:
-                    self.progress_update.emit(i + 1, total, os.path.basename(output_path))
+                    self.error_occurred.emit(f"FFmpeg Error on {output_name}")
 
-            except Exception as e:
-                self.error_occurred.emit(str(e))
-                break
+    def _processSingle(self) -> bool:
+        """
+        Split all segments in a single FFmpeg process, with the segment muxer.
+        The media is read only once, but segments must not overlap.
 
-        self.finished.emit()
+        Returns:
+            False if the segments can't be split this way
+        """
+        plan = plan_segment_cuts(self.segments)
+        if plan is None or not self.segments:
+            return False
+        cut_times, kept_pieces = plan
+
+        ext = self.media_path.suffix
+        piece_pattern = self.output_dir / f".piece_%05d{ext}"
+        cmd = [
+            'ffmpeg', '-y', '-nostdin',
+            '-loglevel', 'error',
+            '-i', str(self.media_path),
+            '-to', f"{cut_times[-1]:.3f}",
+            '-vn',
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_times', ','.join(f"{t:.3f}" for t in cut_times),
+            '-reset_timestamps', '1',
+            '-segment_list', 'pipe:1',
+            '-segment_list_type', 'flat',
+            str(piece_pattern)
+        ]
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            startupinfo=_get_startupinfo()
+        )
+
+        # The segment list is written as each piece is completed
+        total = len(self.segments)
+        done = 0
+        for piece, line in enumerate(process.stdout):
+            if self._must_stop:
+                process.terminate()
+                break
+            piece_path = self.output_dir / line.strip()
+            if piece in kept_pieces:
+                i = kept_pieces[piece]
+                output_name = _get_output_name(i, self.segments[i], ext)
+                os.replace(piece_path, self.output_dir / output_name)
+                done += 1
+                self.progress_update.emit(done, total, output_name)
+            else:
+                piece_path.unlink(missing_ok=True)
+
+        _, errors = process.communicate()
+        if process.returncode != 0 and not self._must_stop:
+            log.error(errors)
+            self.error_occurred.emit(f"FFmpeg Error on {self.media_path.name}")
+        return True
+
+    def _processDecoded(self) -> None:
+        """
+        Decode the whole media once to a temporary PCM file,
+        then write every segment as a WAV file by slicing the memory-mapped buffer.
+        Each WAV file is accompanied by a text file when utterance texts are given.
+        """
+        fd, pcm_path = tempfile.mkstemp(suffix=".pcm")
+        os.close(fd)
+        try:
+            process = subprocess.Popen(
+                build_decode_command(self.media_path, Path(pcm_path)),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                startupinfo=_get_startupinfo()
+            )
+            while True:
+                try:
+                    _, errors = process.communicate(timeout=0.2)
+                    break
+                except subprocess.TimeoutExpired:
+                    if self._must_stop:
+                        process.terminate()
+                        process.wait()
+                        return
+            if process.returncode != 0:
+                log.error(errors)
+                self.error_occurred.emit(f"FFmpeg Error on {self.media_path.name}")
+                return
+            if os.path.getsize(pcm_path) == 0:
+                return
+
+            pcm = np.memmap(pcm_path, dtype='<i2', mode='r')
+            total = len(self.segments)
+            for i, segment in enumerate(self.segments):
+                if self._must_stop:
+                    break
+                output_name = _get_output_name(i, segment, ".wav")
+                output_path = self.output_dir / output_name
+                write_wav_segment(pcm, segment, output_path)
+                if self.texts is not None and i < len(self.texts):
+                    write_segment_text(self.texts[i], output_path)
+                self.progress_update.emit(i + 1, total, output_name)
+            del pcm
+        finally:
+            try:
+                os.remove(pcm_path)
+            except OSError as e:
+                log.warning(f"Couldn't remove temporary file {pcm_path}: {e}")
 
     def stop(self):
         self._must_stop = True
@@ -201,16 +451,28 @@ class AudioSegmentExtractor(QObject):
         self._worker = None
 
 
-    def start_job(self, media_path: Path, segments: List[Segment]):
+    def start_job(
+            self,
+            media_path: Path,
+            segments: List[Segment],
+            mode: ExtractionMode = ExtractionMode.COPY,
+            texts: Optional[List[str]] = None
+        ):
         """
         Initializes the thread and worker, connects signals, and starts.
+
+        Args:
+            mode (ExtractionMode): Concurrent FFmpeg processes (COPY),
+                a single FFmpeg process for non-overlapping segments (SPLIT)
+                or 16kHz mono WAV files sliced from a single decoding (PCM)
+            texts (list): Utterance texts, written alongside the WAV files in PCM mode
         """
         # Cleanup previous run if exists
         self.cleanup()
 
         # Setup Thread and Worker
         self._thread = QThread()
-        self._worker = _AudioWorker(media_path, segments, media_path.parent)
+        self._worker = _AudioWorker(media_path, segments, media_path.parent, mode, texts)
         self._worker.moveToThread(self._thread)
 
         self._thread.started.connect(self._worker.process)
@@ -265,8 +527,13 @@ def initAudioSegmentExtractor(parent: MainWindowInterface):
     audio_extractor.on_error.connect(parent.setStatusMessage)
 
 
-def startAudioSegmentExtractor(media_path: Path, segments: List[Segment]):
+def startAudioSegmentExtractor(
+        media_path: Path,
+        segments: List[Segment],
+        mode: ExtractionMode = ExtractionMode.COPY,
+        texts: Optional[List[str]] = None
+    ):
     if audio_extractor is None:
         return
 
-    audio_extractor.start_job(media_path, segments)
\ No newline at end of file
+    audio_extractor.start_job(media_path, segments, mode, texts)
\ No newline at end of file
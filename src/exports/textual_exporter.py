@@ -17,12 +17,11 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List, TextIO, Tuple
 import os
 import re
 import srt
 import datetime, pytz
-from xml.dom import minidom
 
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout,
@@ -42,7 +41,7 @@ from src.version import __version__
 def export(
         parent: QWidget,
         media_path: Optional[str],
-        utterances: List[tuple],
+        utterances: Iterable[tuple],
         file_type: str
     ) -> None:
     file_type = file_type.lower()
@@ -64,20 +63,15 @@ def export(
     if not file_path:
         return
     
-    match file_type:
-        case "srt":
-            data = format_srt(utterances)
-        case "txt":
-            data = format_txt(utterances)
-        case "eaf":
-            data = format_eaf(utterances, media_path)
-        case _:
-            return
+    if file_type not in ("srt", "txt", "eaf"):
+        return
+    if file_type == "srt":
+        # Subtitles are numbered in time order
+        utterances = sorted(utterances, key=lambda u: tuple(u[1]))
     
     # I/O: Write file
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(data)
+        save_export(file_path, utterances, file_type, media_path)
         
         print(f"File saved to {file_path}")
         exportSignals.message.emit(
@@ -226,13 +220,17 @@ def clean_subtitle_text(text: str, allowed_tags: Optional[set] = None) -> str:
 
 
 
-def format_srt(utterances: List[tuple]) -> str:
+def iter_srt(utterances: Iterable[tuple]) -> Iterator[str]:
+    """
+    Generate SRT blocks one utterance at a time.
+    Utterances must be sorted by time, subtitles are numbered in order.
+    """
     # Remove metadata
     metadata_parser = MetadataParser()
     metadata_parser.set_filter_out({"subtitles": False, "st": False})
 
-    subs = []
-    for i, (text, (start, end)) in enumerate(utterances):
+    index = 1
+    for text, (start, end) in utterances:
         data = metadata_parser.parse_sentence(text)
         if data is None:
             continue
@@ -240,58 +238,101 @@ def format_srt(utterances: List[tuple]) -> str:
         text = ''.join([region["text"] for region in regions if "text" in region])
         clean_content = clean_subtitle_text(text)
         
-        # Skip empty subtitles
-        if not clean_content.strip():
+        # Skip empty or invalid subtitles
+        if not clean_content.strip() or start < 0 or start >= end:
             continue
-            
-        subs.append(
-            srt.Subtitle(
-                index=i + 1, # SRT indexes usually start at 1
-                content=clean_content,
-                start=datetime.timedelta(seconds=start),
-                end=datetime.timedelta(seconds=end)
-            )
+        
+        subtitle = srt.Subtitle(
+            index=index, # SRT indexes usually start at 1
+            content=clean_content,
+            start=datetime.timedelta(seconds=start),
+            end=datetime.timedelta(seconds=end)
         )
+        index += 1
+        yield subtitle.to_srt()
 
-    return srt.compose(subs)
 
 
+def format_srt(utterances: List[tuple]) -> str:
+    return ''.join(iter_srt(sorted(utterances, key=lambda u: tuple(u[1]))))
 
-def format_txt(utterances: List[tuple]) -> str:
-    # Remove metadata
-    rm_special_tokens = True
 
+
+def clean_text(text: str, metadata_parser: Optional[MetadataParser] = None) -> Optional[str]:
+    """
+    Return the plain text of an utterance, without metadata nor special tokens.
+    Line breaks are kept.
+
+    Returns:
+        None if the sentence couldn't be parsed
+    """
+    if metadata_parser is None:
+        metadata_parser = MetadataParser()
+
+    data = metadata_parser.parse_sentence(text)
+    if data is None:
+        return None
+    regions, _ = data
+    text = ''.join([region["text"] for region in regions if "text" in region])
+
+    text = re.sub(r"\*", '', text)
+    text = re.sub(r"<br>", '\n', text, count=0, flags=re.IGNORECASE)
+    text = text.replace('\u2028', '\n')
+    text = re.sub(r'<(/?)(\w+)[^>]*>', '', text)
+    return text.strip()
+
+
+
+def iter_txt(utterances: Iterable[tuple]) -> Iterator[str]:
+    """Generate text lines one utterance at a time"""
     metadata_parser = MetadataParser()
 
-    lines = []
-    for i, (text, _) in enumerate(utterances):
-        data = metadata_parser.parse_sentence(text)
-        if data is None:
+    first = True
+    for text, _ in utterances:
+        text = clean_text(text, metadata_parser)
+        if text is None:
             continue
-        regions, _ = data
-        text = ''.join([region["text"] for region in regions if "text" in region])
+        
+        yield text if first else '\n' + text
+        first = False
 
-        text = re.sub(r"\*", '', text)
-        text = re.sub(r"<br>", '\n', text, count=0, flags=re.IGNORECASE)
-        text = text.replace('\u2028', '\n')
 
-        if rm_special_tokens:
-            text = re.sub(r'<(/?)(\w+)[^>]*>', '', text)
-        
-        lines.append(text.strip())
 
-    return '\n'.join(lines)
+def format_txt(utterances: List[tuple]) -> str:
+    return ''.join(iter_txt(utterances))
 
 
 
-def format_eaf(utterances: List[tuple], audiofile, type="wav") -> str:
-    """ Export to eaf (Elan) file """
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+
+def _xml_start_tag(name: str, attributes: List[Tuple[str, str]], depth: int) -> str:
+    indent = '\t' * depth
+    attrs = ''.join(f' {key}="{_xml_escape(value)}"' for key, value in attributes)
+    return f"{indent}<{name}{attrs}>\n"
+
 
-    sentences = []
-    segments = []
-    for text, segment in utterances:
-        sentences.append(text)
-        segments.append(segment)
+
+def _xml_element(name: str, attributes: List[Tuple[str, str]], depth: int, content: Optional[str] = None) -> str:
+    """Element on a single line, written the same way as `minidom.toprettyxml`"""
+    indent = '\t' * depth
+    attrs = ''.join(f' {key}="{_xml_escape(value)}"' for key, value in attributes)
+    if content is None:
+        return f"{indent}<{name}{attrs}/>\n"
+    return f"{indent}<{name}{attrs}>{_xml_escape(content)}</{name}>\n"
+
+
+
+def iter_eaf(utterances: Iterable[tuple], audiofile, type="wav") -> Iterator[str]:
+    """
+    Generate an eaf (Elan) file one element at a time.
+    Time slots and annotations are written in two passes over the utterances,
+    an iterator will be turned to a list first.
+    """
+    if iter(utterances) is utterances:
+        utterances = list(utterances)
 
     record_id = os.path.splitext(os.path.abspath(audiofile))[0]
     if type == "mp3":
@@ -301,77 +342,59 @@ def format_eaf(utterances: List[tuple], audiofile, type="wav") -> str:
             # convert_to_mp3(audiofile, mp3_file)
         audiofile = mp3_file
 
-    doc = minidom.Document()
-
-    root = doc.createElement('ANNOTATION_DOCUMENT')
-    root.setAttribute('AUTHOR', f'Anaouder-gui {__version__}')
-    root.setAttribute('DATE', datetime.datetime.now(pytz.timezone('Europe/Paris')).isoformat(timespec='seconds'))
-    root.setAttribute('FORMAT', '3.0')
-    root.setAttribute('VERSION', '3.0')
-    root.setAttribute('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-    root.setAttribute('xsi:noNamespaceSchemaLocation', 'http://www.mpi.nl/tools/elan/EAFv3.0.xsd')
-    doc.appendChild(root)
-
-    header = doc.createElement('HEADER')
-    header.setAttribute('MEDIA_FILE', '')
-    header.setAttribute('TIME_UNITS', 'milliseconds')
-    root.appendChild(header)
-
-    media_descriptor = doc.createElement('MEDIA_DESCRIPTOR')
-    media_descriptor.setAttribute('MEDIA_URL', 'file://' + os.path.abspath(audiofile))
-    if type == "mp3":
-        media_descriptor.setAttribute('MIME_TYPE', 'audio/mpeg')
-    else:
-        media_descriptor.setAttribute('MIME_TYPE', 'audio/x-wav')
-    media_descriptor.setAttribute('RELATIVE_MEDIA_URL', './' + os.path.basename(audiofile))
-    header.appendChild(media_descriptor)
-
-    time_order = doc.createElement('TIME_ORDER')
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    root_attributes = [
+        ('AUTHOR', f'Anaouder-gui {__version__}'),
+        ('DATE', datetime.datetime.now(pytz.timezone('Europe/Paris')).isoformat(timespec='seconds')),
+        ('FORMAT', '3.0'),
+        ('VERSION', '3.0'),
+        ('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance'),
+        ('xsi:noNamespaceSchemaLocation', 'http://www.mpi.nl/tools/elan/EAFv3.0.xsd'),
+    ]
+    yield _xml_start_tag('ANNOTATION_DOCUMENT', root_attributes, 0)
+
+    yield '\t<HEADER MEDIA_FILE="" TIME_UNITS="milliseconds">\n'
+    yield _xml_element('MEDIA_DESCRIPTOR', [
+        ('MEDIA_URL', 'file://' + os.path.abspath(audiofile)),
+        ('MIME_TYPE', 'audio/mpeg' if type == "mp3" else 'audio/x-wav'),
+        ('RELATIVE_MEDIA_URL', './' + os.path.basename(audiofile)),
+    ], 2)
+    yield '\t</HEADER>\n'
+
+    if utterances:
+        yield '\t<TIME_ORDER>\n'
     last_t = 0
-    for i, (s, e) in enumerate(segments):
+    for i, (_, (s, e)) in enumerate(utterances):
         s, e = int(s*1000), int(e*1000)
         if s < last_t:
             s = last_t
         last_t = s
-        time_slot = doc.createElement('TIME_SLOT')
-        time_slot.setAttribute('TIME_SLOT_ID', f'ts{2*i+1}')
-        time_slot.setAttribute('TIME_VALUE', str(s))
-        time_order.appendChild(time_slot)
-        time_slot = doc.createElement('TIME_SLOT')
-        time_slot.setAttribute('TIME_SLOT_ID', f'ts{2*i+2}')
-        time_slot.setAttribute('TIME_VALUE', str(e))
-        time_order.appendChild(time_slot)
-    root.appendChild(time_order)
-
-    tier_trans = doc.createElement('TIER')
-    tier_trans.setAttribute('LINGUISTIC_TYPE_REF', 'transcript')
-    tier_trans.setAttribute('TIER_ID', 'Transcription')
-
-    for i, sentence in enumerate(sentences):
-        annotation = doc.createElement('ANNOTATION')
-        alignable_annotation = doc.createElement('ALIGNABLE_ANNOTATION')
-        alignable_annotation.setAttribute('ANNOTATION_ID', f'a{i+1}')
-        alignable_annotation.setAttribute('TIME_SLOT_REF1', f'ts{2*i+1}')
-        alignable_annotation.setAttribute('TIME_SLOT_REF2', f'ts{2*i+2}')
-        annotation_value = doc.createElement('ANNOTATION_VALUE')
-        #text = doc.createTextNode(get_cleaned_sentence(sentence, rm_bl=True, keep_dash=True, keep_punct=True)[0])
-        text = doc.createTextNode(sentence.replace('*', ''))
-        annotation_value.appendChild(text)
-        alignable_annotation.appendChild(annotation_value)
-        annotation.appendChild(alignable_annotation)
-        tier_trans.appendChild(annotation)
-    root.appendChild(tier_trans)
-
-    linguistic_type = doc.createElement('LINGUISTIC_TYPE')
-    linguistic_type.setAttribute('GRAPHIC_REFERENCES', 'false')
-    linguistic_type.setAttribute('LINGUISTIC_TYPE_ID', 'transcript')
-    linguistic_type.setAttribute('TIME_ALIGNABLE', 'true')
-    root.appendChild(linguistic_type)
-
-    language = doc.createElement('LANGUAGE')
-    language.setAttribute("LANG_ID", "bre")
-    language.setAttribute("LANG_LABEL", "Breton (bre)")
-    root.appendChild(language)
+        yield _xml_element('TIME_SLOT', [('TIME_SLOT_ID', f'ts{2*i+1}'), ('TIME_VALUE', str(s))], 2)
+        yield _xml_element('TIME_SLOT', [('TIME_SLOT_ID', f'ts{2*i+2}'), ('TIME_VALUE', str(e))], 2)
+    yield '\t</TIME_ORDER>\n' if utterances else '\t<TIME_ORDER/>\n'
+
+    if utterances:
+        yield '\t<TIER LINGUISTIC_TYPE_REF="transcript" TIER_ID="Transcription">\n'
+        for i, (sentence, _) in enumerate(utterances):
+            yield '\t\t<ANNOTATION>\n'
+            yield _xml_start_tag('ALIGNABLE_ANNOTATION', [
+                ('ANNOTATION_ID', f'a{i+1}'),
+                ('TIME_SLOT_REF1', f'ts{2*i+1}'),
+                ('TIME_SLOT_REF2', f'ts{2*i+2}'),
+            ], 3)
+            yield _xml_element('ANNOTATION_VALUE', [], 4, sentence.replace('*', ''))
+            yield '\t\t\t</ALIGNABLE_ANNOTATION>\n'
+            yield '\t\t</ANNOTATION>\n'
+        yield '\t</TIER>\n'
+    else:
+        yield '\t<TIER LINGUISTIC_TYPE_REF="transcript" TIER_ID="Transcription"/>\n'
+
+    yield _xml_element('LINGUISTIC_TYPE', [
+        ('GRAPHIC_REFERENCES', 'false'),
+        ('LINGUISTIC_TYPE_ID', 'transcript'),
+        ('TIME_ALIGNABLE', 'true'),
+    ], 1)
+    yield _xml_element('LANGUAGE', [("LANG_ID", "bre"), ("LANG_LABEL", "Breton (bre)")], 1)
 
     constraint_list = [
         ("Time_Subdivision", "Time subdivision of parent annotation's time interval, no time gaps allowed within this interval"),
@@ -380,11 +403,65 @@ def format_eaf(utterances: List[tuple], audiofile, type="wav") -> str:
         ("Included_In", "Time alignable annotations within the parent annotation's time interval, gaps are allowed")
     ]
     for stereotype, description in constraint_list:
-        constraint = doc.createElement('CONSTRAINT')
-        constraint.setAttribute('DESCRIPTION', description)
-        constraint.setAttribute('STEREOTYPE', stereotype)
-        root.appendChild(constraint)
+        yield _xml_element('CONSTRAINT', [('DESCRIPTION', description), ('STEREOTYPE', stereotype)], 1)
+    yield '</ANNOTATION_DOCUMENT>\n'
+
+
+
+def format_eaf(utterances: List[tuple], audiofile, type="wav") -> str:
+    """ Export to eaf (Elan) file """
+    return ''.join(iter_eaf(utterances, audiofile, type))
+
+
+
+def write_export(
+        file: TextIO,
+        utterances: Iterable[tuple],
+        file_type: str,
+        media_path: Optional[str] = None
+    ) -> None:
+    """
+    Write utterances to an open text file, one chunk at a time.
+    Usable without a GUI.
+
+    Args:
+        file: Text file handle
+        utterances: (text, segment) pairs, sorted by time for SRT
+        file_type: "srt", "txt" or "eaf"
+        media_path: Path to the media file, required for EAF
+    """
+    match file_type.lower():
+        case "srt":
+            chunks = iter_srt(utterances)
+        case "txt":
+            chunks = iter_txt(utterances)
+        case "eaf":
+            chunks = iter_eaf(utterances, media_path)
+        case _:
+            raise ValueError(f"Unknown export format: {file_type}")
+    
+    for chunk in chunks:
+        file.write(chunk)
+
 
-    xml_str = doc.toprettyxml(indent ="\t", encoding="UTF-8")
 
-    return xml_str.decode("utf-8")
\ No newline at end of file
+def save_export(
+        file_path: str,
+        utterances: Iterable[tuple],
+        file_type: str,
+        media_path: Optional[str] = None
+    ) -> None:
+    """
+    Write utterances to a file, see `write_export`.
+    The file is written to a temporary file first, then renamed over the target,
+    so an error while exporting leaves a previous file untouched.
+    """
+    tmp_path = file_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            write_export(f, utterances, file_type, media_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
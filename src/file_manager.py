@@ -31,10 +31,10 @@ import srt
 
 from PySide6.QtCore import QObject, Signal
 
-from ostilhou.asr import load_segments_data, extract_metadata, MetadataParser
-from ostilhou.asr.dataset import format_timecode
+from ostilhou.asr import load_segments_data, extract_metadata
 
-from src.utils import MEDIA_FORMATS, LINE_BREAK
+from src.utils import MEDIA_FORMATS
+from src import ali_codec
 from src.interfaces import Segment, WaveformInterface, TextDocumentInterface
 from src.settings import AUTOSAVE_FOLDER_NAME
 
@@ -88,24 +88,11 @@ class FileManager(QObject):
 
         try:
             with file_path.open('w', encoding="utf-8") as _fout:
-                if media_path:
-                    # Write media-path metadata if provided
-                    _fout.write(f"{{media-path: {media_path.name}}}\n")
-
-                for text, segment in blocks_data:
-                    # Remove the previous media-path metadata if necessary
-                    if media_path:
-                        match = re.search(r"{\s*(media|audio)\-path\s*:\s*(.*?)\s*}", text)
-                        if match:
-                            # Strip the audio-path metadata from the rest of the string
-                            text = text[:match.start()] + text[match.end():]
-                            media_path = None
-                            if not text.strip():
-                                continue
-                    if segment:
-                        start, end = segment
-                        text += f" {{start: {format_timecode(start)}; end: {format_timecode(end)}}}"
-                    _fout.write(text + '\n')
+                ali_codec.write_ali(
+                    _fout,
+                    blocks_data,
+                    media_path.name if media_path else None
+                )
 
         except IOError as e:
             self.log.error(f"Failed to save file: {e}")
@@ -129,36 +116,13 @@ class FileManager(QObject):
             FileOperationError
         """
         self.log.debug(f"Opening ALI file... {filepath}")
-        parsed_data = []
         media_path = None
         
         try:
-            with filepath.open('r', encoding="utf-8") as _fin:
-                # Find associated audio file in metadata
-                for line in _fin:
-                    line = line.strip()
-
-                    # Extact "audio_path/media-path" metadata
-                    _, metadata = extract_metadata(line)
-                    if not media_path:
-                        if "media-path" in metadata:
-                            media_path = (filepath.parent / metadata["media-path"]).resolve()
-                        elif "audio-path" in metadata:
-                            media_path = (filepath.parent / metadata["audio-path"]).resolve()
-
-                    # Check for aligned utterances
-                    match = re.search(
-                        r"{\s*start\s*:\s*([0-9\.]+)\s*;\s*end\s*:\s*([0-9\.]+)\s*}", line
-                    )
-                    if match:
-                        # Remove timecodes from text
-                        line = line[:match.start()] + line[match.end():]
-                        line = line.strip().replace(LINE_BREAK, "<br>")
-                        segment = [float(match[1]), float(match[2])]
-                        parsed_data.append((line, segment))
-                    else:
-                        # Regular text or comments or metadata only
-                        parsed_data.append((line, None))
+            parsed_data, relative_media_path = ali_codec.read_ali(filepath)
+            if relative_media_path:
+                # Associated audio file, found in metadata
+                media_path = (filepath.parent / relative_media_path).resolve()
         
         except IOError as e:
             self.log.error(f"Failed to open file: {e}")
@@ -0,0 +1,275 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Media fingerprinting service.
+
+Fingerprints are used as identifiers by the cache system.
+Computing one requires reading parts of the media file, so results are
+memoized in a persistent index, keyed by the file's absolute path and
+validated against its stat signature (size, mtime_ns, inode).
+A file replaced in place gets a new signature and is fingerprinted again.
+"""
+
+
+from typing import Dict, Iterable, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from src.utils import get_cache_directory
+from src.file_formats import MEDIA_FORMATS
+
+
+type Fingerprint = str
+type StatSignature = Tuple[int, int, int]   # (size, mtime_ns, inode)
+
+
+log = logging.getLogger(__name__)
+
+
+FINGERPRINT_BLOCK_SIZE = 4096
+FINGERPRINT_MAX_BLOCKS = 8
+
+
+
+def compute_fingerprint(file_path: Path) -> Fingerprint:
+    """
+    Calculate a unique fingerprint to use as identifiers
+    for the cache system.
+    To make it fast, it only calculates a checksum on
+    different parts of the file rather than the whole file.
+
+    Args:
+        file_path (Path)
+            A path to a audio file
+
+    Returns:
+        A unique fingerprint for any given file
+    """
+
+    file_size = file_path.stat().st_size
+    block_size = FINGERPRINT_BLOCK_SIZE
+    n_blocks = min(FINGERPRINT_MAX_BLOCKS, int(file_size / block_size))
+
+    sha256_hash = hashlib.sha256()
+    with file_path.open('rb') as _f:
+        if n_blocks == 0:
+            # File is smaller than a single block
+            sha256_hash.update(_f.read())
+            return sha256_hash.hexdigest()
+
+        loc_step = file_size // n_blocks
+        loc = 0
+        for i in range(n_blocks):
+            if loc + block_size > file_size:
+                _f.seek(loc)
+                sha256_hash.update(_f.read(file_size - loc))
+                break
+            _f.seek(loc)
+            sha256_hash.update(_f.read(block_size))
+            loc += loc_step
+
+    return sha256_hash.hexdigest()
+
+
+
+def _stat_signature(st: os.stat_result) -> StatSignature:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+
+class FingerprintIndex:
+    """
+    Persistent memo of media fingerprints.
+
+    The index is stored as an append-only jsonl file.
+    Each line holds a file path, its stat signature and its fingerprint.
+    Later lines override earlier ones for the same path.
+    The file is compacted on load when it holds too many stale lines.
+    """
+
+    COMPACT_RATIO = 2   # Compact when there are twice as many lines as entries
+
+    def __init__(self, index_path: Optional[Path] = None) -> None:
+        if index_path is None:
+            index_path = get_cache_directory() / "fingerprints.jsonl"
+        self.index_path = index_path
+        self._entries: Dict[str, Tuple[StatSignature, Fingerprint]] = dict()
+        self._lock = threading.Lock()
+        self._load()
+
+
+    def _load(self) -> None:
+        n_lines = 0
+        try:
+            with self.index_path.open('r', encoding="utf-8") as _f:
+                for line in _f:
+                    n_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        signature = (entry["size"], entry["mtime_ns"], entry["inode"])
+                        self._entries[entry["path"]] = (signature, entry["fingerprint"])
+                    except (json.JSONDecodeError, KeyError):
+                        # Probably a truncated last line, after a crash
+                        continue
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            log.error(f"Could not open fingerprint index: {e}")
+            return
+
+        if n_lines > self.COMPACT_RATIO * len(self._entries):
+            self.compact()
+
+
+    def _format_entry(self, key: str, signature: StatSignature, fingerprint: Fingerprint) -> str:
+        size, mtime_ns, inode = signature
+        return json.dumps({
+            "path": key,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "inode": inode,
+            "fingerprint": fingerprint,
+        })
+
+
+    def _append_to_disk(self, lines: Iterable[str]) -> None:
+        try:
+            with self.index_path.open('a', encoding="utf-8") as _f:
+                for line in lines:
+                    _f.write(line + '\n')
+        except OSError as e:
+            log.error(f"Couldn't write to fingerprint index ({e})")
+
+
+    def compact(self) -> None:
+        """Rewrite the index file with a single line per path"""
+        log.info("Compacting fingerprint index")
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with self._lock:
+            try:
+                with tmp_path.open('w', encoding="utf-8") as _f:
+                    for key, (signature, fingerprint) in self._entries.items():
+                        _f.write(self._format_entry(key, signature, fingerprint) + '\n')
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                log.error(f"Couldn't compact fingerprint index ({e})")
+
+
+    def lookup(self, file_path: Path) -> Optional[Fingerprint]:
+        """
+        Return the memoized fingerprint for this file, if its stat is unchanged.
+        Never reads the file's content.
+        """
+        key = str(file_path.absolute())
+        signature = _stat_signature(file_path.stat())
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == signature:
+            return entry[1]
+        return None
+
+
+    def _fingerprint(self, file_path: Path) -> Tuple[Fingerprint, Optional[str]]:
+        """
+        Return the fingerprint of a file and the index line to persist,
+        or None if the fingerprint was already memoized.
+        """
+        key = str(file_path.absolute())
+        signature = _stat_signature(file_path.stat())
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == signature:
+            return entry[1], None
+
+        fingerprint = compute_fingerprint(file_path)
+        with self._lock:
+            self._entries[key] = (signature, fingerprint)
+        return fingerprint, self._format_entry(key, signature, fingerprint)
+
+
+    def get(self, file_path: Path) -> Fingerprint:
+        """Return the fingerprint of a file, computing it only if its stat has changed"""
+        fingerprint, line = self._fingerprint(file_path)
+        if line is not None:
+            self._append_to_disk([line])
+        return fingerprint
+
+
+    def get_many(
+            self,
+            file_paths: Iterable[Path],
+            max_workers: Optional[int] = None
+        ) -> Dict[Path, Fingerprint]:
+        """
+        Fingerprint many files concurrently, on a thread pool.
+        Files that can't be read are left out of the returned dictionary.
+        """
+        file_paths = list(file_paths)
+        results: Dict[Path, Fingerprint] = dict()
+        new_lines = []
+
+        def _task(path: Path):
+            try:
+                return path, self._fingerprint(path)
+            except OSError as e:
+                log.warning(f"Could not fingerprint {path}: {e}")
+                return path, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for path, res in executor.map(_task, file_paths):
+                if res is None:
+                    continue
+                fingerprint, line = res
+                results[path] = fingerprint
+                if line is not None:
+                    new_lines.append(line)
+
+        if new_lines:
+            self._append_to_disk(new_lines)
+        return results
+
+
+    def get_directory(
+            self,
+            dir_path: Path,
+            recursive: bool = False,
+            max_workers: Optional[int] = None
+        ) -> Dict[Path, Fingerprint]:
+        """Fingerprint every media file in a directory"""
+        pattern = "**/*" if recursive else "*"
+        media_files = [
+            p for p in dir_path.glob(pattern)
+            if p.suffix.lower() in MEDIA_FORMATS and p.is_file()
+        ]
+        return self.get_many(media_files, max_workers)
+
+
+
+# Global fingerprint index instance
+fingerprints = FingerprintIndex()
+
+
+def calculate_fingerprint(file_path: Path) -> Fingerprint:
+    """Return a unique fingerprint for any given file, using the persistent index"""
+    return fingerprints.get(file_path)
@@ -0,0 +1,102 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Import time report of the application modules.
+
+    python3 main.py --import-time
+
+The main module is imported in a fresh interpreter with `-X importtime`,
+the output is then summed up by top-level package.
+"""
+
+
+from typing import Dict, List, NamedTuple
+import subprocess
+import sys
+
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int        # Time spent in the module itself, in microseconds
+    cumulative_us: int  # Including the modules it imported
+    depth: int          # Nesting level in the import tree
+
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parse the stderr output of `python -X importtime`"""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue # Header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        records.append(
+            ImportRecord(stripped, int(fields[0]), int(fields[1]), depth)
+        )
+    return records
+
+
+def measure_import_time(module: str = "src.main") -> List[ImportRecord]:
+    """Import a module in a new interpreter and return its import records"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return parse_importtime(proc.stderr)
+
+
+def package_totals(records: List[ImportRecord]) -> Dict[str, int]:
+    """Self time of all modules, summed by top-level package (in microseconds)"""
+    totals: Dict[str, int] = {}
+    for record in records:
+        package = record.module.split('.')[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def format_report(records: List[ImportRecord], limit: int = 20) -> str:
+    total = sum(r.self_us for r in records)
+    lines = [f"Total import time: {total / 1000:.1f} ms", ""]
+
+    lines.append("Packages (self time)")
+    for package, us in list(package_totals(records).items())[:limit]:
+        lines.append(f"  {us / 1000:8.1f} ms  {package}")
+
+    lines.append("")
+    lines.append("Application modules (cumulative time)")
+    app_modules = [r for r in records if r.module.startswith("src.")]
+    app_modules.sort(key=lambda r: r.cumulative_us, reverse=True)
+    for record in app_modules[:limit]:
+        lines.append(f"  {record.cumulative_us / 1000:8.1f} ms  {record.module}")
+
+    return '\n'.join(lines)
+
+
+def main() -> int:
+    print(format_report(measure_import_time()))
+    return 0
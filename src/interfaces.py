@@ -20,6 +20,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from typing import (
     Protocol,
     Dict, List, Tuple, Any,
+    Iterable, Iterator, MutableMapping,
     Optional
 )
 from enum import Enum
@@ -78,17 +79,23 @@ class MainWindowInterface(Protocol):
 class DocumentInterface(Protocol):
     media_path: Path | None
     undo_stack: QUndoStack
-    segments: Dict[SegmentId, Segment]
+    segments: MutableMapping[SegmentId, Segment]
     must_sort: bool
 
     def getSegment(self, segment_id: SegmentId) -> Optional[Segment]: ...
 
     def addSegment(self, segment: Segment, segment_id: Optional[SegmentId] = None) -> SegmentId: ...
+
+    def addSegments(self, segments: Dict[SegmentId, Segment]) -> None: ...
     
     def updateSegment(self, segment_id: SegmentId, segment: Segment) -> None: ...
 
+    def updateSegments(self, segments: Dict[SegmentId, Segment]) -> None: ...
+
     def removeSegment(self, segment_id: SegmentId) -> None: ...
 
+    def removeSegments(self, segment_ids: List[SegmentId]) -> None: ...
+
     def deleteUtterances(self, segment_ids: List[SegmentId]) -> None: ...
     
     def getSortedSegments(self) -> List[Tuple[SegmentId, Segment]]: ...
@@ -122,6 +129,14 @@ class DocumentInterface(Protocol):
     def getUtteranceDensity(self, segment_id: SegmentId) -> float: ...
     
     def updateUtteranceDensity(self, segment_id: SegmentId) -> None: ...
+
+    def invalidateUtterances(self, first_block: QTextBlock, last_block: QTextBlock) -> None: ...
+
+    def invalidateBlocks(self, first_block_number: int, last_block_number: int) -> None: ...
+
+    def getSegmentIdAtTime(self, position_sec: float) -> SegmentId: ...
+
+    def getCaptionAtTime(self, position_sec: float) -> str: ...
     
     def getSelectedBlocksAndTimeRange(self) -> Tuple[List[QTextBlock], List] | None: ...
 
@@ -167,6 +182,8 @@ class TextDocumentInterface(Protocol):
             segment_id: Optional[SegmentId]
         ) -> QTextBlock: ...
     
+    def appendSentences(self, sentences: Iterable[Tuple[str, Optional[SegmentId]]]) -> None: ...
+
     def insertBlock(self, text: str, data: Optional[dict], pos: int) -> QTextBlock: ...
 
     def insertSentenceWithId(
@@ -178,7 +195,11 @@ class TextDocumentInterface(Protocol):
     
     def setSentenceText(self, text: str, segment_id: SegmentId) -> None: ...
 
+    def insertSentencesWithIds(self, text: str, segment_ids: List[SegmentId]) -> None: ...
+
     def deleteSentence(self, seg_id: SegmentId) -> None: ...
+
+    def deleteSentences(self, segment_ids: List[SegmentId]) -> None: ...
         
     def deactivateSentence(self, seg_id: SegmentId) -> None: ...
     
@@ -192,6 +213,10 @@ class TextDocumentInterface(Protocol):
 
     def updateLineNumberArea(self) -> None: ...
 
+    def invalidateLineNumbers(self, block_number: int = 0) -> None: ...
+
+    def getVisibleBlocks(self) -> Iterator[QTextBlock]: ...
+
     def getCursorState(self) -> dict: ...
     
     def setCursorState(self, cursor_state: dict) -> None: ...
@@ -200,6 +225,6 @@ class TextDocumentInterface(Protocol):
     
     def signalsBlocked(self) -> bool: ...
     
-    def highlightUtterance(self, segment_id: SegmentId) -> None: ...
+    def highlightUtterance(self, segment_id: SegmentId, scroll_text: bool = True) -> None: ...
 
     def printDocumentStructure(self) -> None: ...
\ No newline at end of file
@@ -26,14 +26,16 @@ Terminology
     Utterance: The association of an audio `Segment` and a text `Sentence`
 """
 
+import time
+_t_start = time.perf_counter()
+
 import os.path
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Iterator
 import logging
-import time
 import re
 
-from ostilhou.audio.audio_numpy import get_samples
+import numpy as np
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QDialog,
@@ -69,29 +71,18 @@ from src.ui.icons import icons, loadIcons, IconWidget
 from src.ui.theme import theme
 from src.services.media_player_controller import MediaPlayerController
 from src.waveform_widget import WaveformWidget, ResizeSegmentCommand
-from src.text_widget import (
-    TextEditWidget, Highlighter,
-    LINE_BREAK
-)
+from src.text_widget import TextEditWidget, Highlighter
 from src.splitter import CustomSplitter
 from src.video_widget import VideoWidget
 from src.document_controller import DocumentController
-from src.transcriber import TranscriptionService
-from src.scene_detector import SceneDetectWorker
-from src.aligner import TextAligner
 from src.actions import ActionManager
 from src.commands import (
     ReplaceTextCommand,
     CreateNewEmptyUtteranceCommand,
+    CreateUtterancesBatchCommand,
     AlignWithSelectionCommand
 )
 from src.ui.timecode_display import TimecodeWidget
-from src.ui.parameters_dialog import ParametersDialog
-from src.ui.about_page import AboutDialog
-from src.exports.textual_exporter import export, exportSignals
-from src.exports import segment_exporter
-from src.auto_segment import auto_segment
-from src.hunspell import HunspellLoader
 from src.settings import (
     APP_NAME, DEFAULT_LANGUAGE, FUTURE,
     app_settings, shortcuts,
@@ -102,16 +93,20 @@ from src.settings import (
     BUTTON_MARGIN, BUTTON_LABEL_SIZE, DIAL_SIZE,
     FFMPEG_SCENE_DETECTOR_THRESHOLD,
     AUTOSAVE_DEFAULT_INTERVAL, AUTOSAVE_BACKUP_NUMBER, AUTOSAVE_FOLDER_NAME,
+    AUTOSAVE_MAX_BACKLOG,
+    EXPORT_AUDIO_SEGMENTS_MODE,
     RECENT_FILES_LIMIT
 )
 import src.lang as lang
-from src.interfaces import Segment, SegmentId, BlockType
+from src.interfaces import Segment, SegmentId
 from src.cache_system import cache
 from src.strings import app_strings
+from src.tracing import tracer, traced
 
 
 
 log = logging.getLogger(__name__)
+log.info(f"Modules imported in {time.perf_counter() - _t_start:.3f}s")
 
 
 
@@ -208,19 +203,18 @@ class MainWindow(QMainWindow):
         self.media_controller = MediaPlayerController(self)
         self.media_controller.connectVideoWidget(self.video_widget)
 
-        # Transcription service
-        self.recognizer = TranscriptionService(self)
-
-        # Aligner
-        self.aligner = TextAligner(
-            self, self.document_controller, self.media_controller, self.recognizer
-        )
+        # Transcription service and aligner, created on first use
+        # (see the `recognizer` and `aligner` properties)
+        self._recognizer = None
+        self._aligner = None
 
         # Scenes
         self.scene_detector = None
 
-        # Audio segment extractor
-        segment_exporter.initAudioSegmentExtractor(self)
+        # Auto-segmentation
+        self.auto_segmenter = None
+        self._auto_segment_run = 0
+        self._auto_segment_count = 0
 
         # Undo stack
         self.undo_stack = self.document_controller.undo_stack
@@ -232,6 +226,13 @@ class MainWindow(QMainWindow):
         self._autosave_timer.timeout.connect(self.autoSave)
         self._last_saved_index = 0
         self._last_saved_time = time.time()
+        self._autosave_running = False
+
+        # Density summary, refreshed shortly after the last edit
+        self._density_status_timer = QTimer(self)
+        self._density_status_timer.setSingleShot(True)
+        self._density_status_timer.setInterval(500)
+        self._density_status_timer.timeout.connect(self.updateDensityStatus)
 
 
     def _configureWindow(self) -> None:
@@ -283,6 +284,12 @@ class MainWindow(QMainWindow):
         self.status_label.setTextFormat(Qt.TextFormat.RichText)
         self.statusBar().addWidget(self.status_label)
 
+        # Utterances denser than the target
+        self.status_density_label = QLabel()
+        self.status_density_label.setTextFormat(Qt.TextFormat.RichText)
+        self.status_density_label.setContentsMargins(0, 0, 16, 0)
+        self.statusBar().addPermanentWidget(self.status_density_label, stretch=0)
+
         # Media duration
         self.status_media_duration_label = QLabel()
         self.status_media_duration_label.setContentsMargins(0, 0, 16, 0)
@@ -367,17 +374,8 @@ class MainWindow(QMainWindow):
         self.document_controller.message.connect(self.setStatusMessage)
         self.document_controller.refresh_segment_info.connect(self.updateSegmentInfo)
 
-        # Recognizer
-        self.recognizer.message.connect(self.setStatusMessage)
-        self.recognizer.segment_transcribed.connect(self.updateUtteranceTranscription)
-        self.recognizer.new_segment_transcribed.connect(self.newSegmentTranscribed)
-        self.recognizer.progress.connect(self.updateProgressBar)
-        self.recognizer.finished.connect(self.finishTranscriptionAction)
-        self.recognizer.end_of_file.connect(self.onRecognizerEOF)
-
         # Aligner
-        self.action.request_auto_align.connect(self.aligner.autoAlign)
-        self.aligner.error_msg.connect(self.setErrorMessage)
+        self.action.request_auto_align.connect(self.onAutoAlign)
 
         # Text widgets
         self.text_widget.auto_transcribe.connect(self.action.transcribe.trigger)
@@ -612,7 +610,7 @@ class MainWindow(QMainWindow):
         # self.model_selection.addItems(self.available_models)
         self.model_selection.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToContents)
         self.model_selection.setToolTip(self.tr("Speech-to-text model"))
-        self.model_selection.currentTextChanged.connect(self.recognizer.loadModel)
+        self.model_selection.currentTextChanged.connect(self.onModelSelected)
         transcription_buttons_layout.addWidget(self.model_selection)
 
         transcription_buttons_layout.addWidget(
@@ -851,6 +849,61 @@ class MainWindow(QMainWindow):
         return media_toolbar_layout
 
 
+    @property
+    def recognizer(self):
+        """
+        The transcription service, created on first access.
+        Starting it spawns the recognizer thread and loads the selected model,
+        so it is kept out of the window construction.
+        """
+        if self._recognizer is None:
+            from src.transcriber import TranscriptionService
+
+            self._recognizer = TranscriptionService(self)
+            self._recognizer.message.connect(self.setStatusMessage)
+            self._recognizer.segment_transcribed.connect(self.updateUtteranceTranscription)
+            self._recognizer.new_segment_transcribed.connect(self.newSegmentTranscribed)
+            self._recognizer.progress.connect(self.updateProgressBar)
+            self._recognizer.finished.connect(self.finishTranscriptionAction)
+            self._recognizer.end_of_file.connect(self.onRecognizerEOF)
+
+            if (model_name := self.model_selection.currentText()):
+                self._recognizer.loadModel(model_name)
+        return self._recognizer
+
+
+    @property
+    def aligner(self):
+        """The text aligner, created on first access"""
+        if self._aligner is None:
+            from src.aligner import TextAligner
+
+            self._aligner = TextAligner(
+                self, self.document_controller, self.media_controller, self.recognizer
+            )
+            self._aligner.error_msg.connect(self.setErrorMessage)
+        return self._aligner
+
+
+    def startServices(self) -> None:
+        """
+        Start the background services that are not needed to display the window.
+        Called once the main window is shown.
+        """
+        self.recognizer
+
+
+    @Slot(str)
+    def onModelSelected(self, model_name: str) -> None:
+        # A model will be loaded when the recognizer is created
+        if self._recognizer is not None and model_name:
+            self._recognizer.loadModel(model_name)
+
+
+    def onAutoAlign(self) -> None:
+        self.aligner.autoAlign()
+
+
     def check_models(self) -> None:
         if len(self.available_models) == 0:
             # Ask user to download a first model
@@ -995,34 +1048,27 @@ class MainWindow(QMainWindow):
         Raise:
             FileOperationError
         """
-        blocks_data = []
-        doc = self.text_widget.document()
-
-        block = doc.firstBlock()
-        while block.isValid():
-            text = self.text_widget.getBlockHtml(block)[0]
-            utt_id = self.document_controller.getBlockId(block)
-
-            segment = None
-            if utt_id != -1:
-                segment = self.document_controller.getSegment(utt_id)
-
-            blocks_data.append( (text, segment) )
-            block = block.next()
-        
-        self.file_manager.save_ali_file(file_path, blocks_data, media_path)
+        snapshot = self.document_controller.getSnapshot()
+        self.file_manager.save_ali_file(file_path, snapshot.getBlocksData(), media_path)
 
         self._last_saved_index = self.undo_stack.index()
         self._last_saved_time = time.time()
 
 
     def autoSave(self):
+        """
+        A snapshot of the document is taken here,
+        it is written to the autosave file in the background
+        """
         current_index = self.undo_stack.index()
         if not self.file_path:
             return
         if current_index == self._last_saved_index:
             return
-        if self.media_controller.isPlaying(): # Don't save during playback
+        if self._autosave_running:
+            return
+        if self.document_controller.getSnapshotBacklog() > AUTOSAVE_MAX_BACKLOG:
+            # Blocks are still being read in the background, after loading a document
             return
         
         autosave_interval_second = 60.0 * app_settings.value("autosave/interval_minute", AUTOSAVE_DEFAULT_INTERVAL, type=float)
@@ -1033,23 +1079,34 @@ class MainWindow(QMainWindow):
         time_tag = time.strftime("%Y%m%d_%H%M%S")
         autosave_folder = self.file_path.parent / AUTOSAVE_FOLDER_NAME
         autosave_path = autosave_folder / f"{self.file_path.stem}@{time_tag}.ali"
-        try:
-            self.setStatusMessage("Autosaving...", 1000) # Display for 1 second
+        max_backups = int(app_settings.value("autosave/backup_number", AUTOSAVE_BACKUP_NUMBER, type=int))
+        self.setStatusMessage("Autosaving...", 1000) # Display for 1 second
+
+        from src.autosave_writer import AutosaveWriter
+        writer = AutosaveWriter(
+            self.file_manager,
+            self.document_controller.getSnapshot(),
+            autosave_path,
+            max_backups
+        )
+        writer.signals.finished.connect(self.onAutosaveFinished)
+        writer.signals.error.connect(self.onAutosaveFailed)
+        self._autosave_running = True
+        self._last_saved_index = current_index
+        self._last_saved_time = time.time()
+        QThreadPool.globalInstance().start(writer)
 
-            autosave_folder.mkdir(exist_ok=True)  # Create "autosave" folder, if necessary
-            self._performSave(autosave_path)
 
-            # Remove old backups, if necessary
-            old_backups = sorted(autosave_folder.glob(str(self.file_path.stem) + "@*.ali"))
-            max_backups = int(app_settings.value("autosave/backup_number", AUTOSAVE_BACKUP_NUMBER, type=int))
-            if len(old_backups) > max_backups:
-                for i in range(len(old_backups) - max_backups):
-                    old_backups[i].unlink()                               
-        except Exception as e:
-            log.error(f"Autosave failed {e}")
-            self.setErrorMessage(
-                self.tr("Autosave failed: {exception}").format(exception=str(e))
-            )
+    def onAutosaveFinished(self, autosave_path: Path) -> None:
+        self._autosave_running = False
+
+
+    def onAutosaveFailed(self, error: str) -> None:
+        self._autosave_running = False
+        self._last_saved_index = -1 # Try again on next autosave
+        self.setErrorMessage(
+            self.tr("Autosave failed: {exception}").format(exception=error)
+        )
 
 
     def getOpenFileDialog(self, title: str, filter: str) -> Optional[str]:
@@ -1066,6 +1123,7 @@ class MainWindow(QMainWindow):
         return file_path
 
 
+    @traced("open file", "io")
     def onOpenFile(
             self,
             file_path: Optional[Path] = None,
@@ -1087,7 +1145,12 @@ class MainWindow(QMainWindow):
         self._last_saved_index = 0
         self._last_saved_time = 0.0
         
+        # Segments found in the previous media must not reach the new document
+        self.stopAutoSegment()
+
         self.document_controller.clear()
+        # Refreshed once the new document is loaded
+        self._density_status_timer.start()
         if not keep_media:
             self.waveform.clear()
             self.document_controller.setMediaPath(None)
@@ -1424,6 +1487,7 @@ class MainWindow(QMainWindow):
         self.updateRecentMenu()
 
 
+    @traced("open media", "io")
     def openMediaFile(self, file_path: Path):
         """
         Load a Media File and update the Media Player and Waveform Widget.
@@ -1439,9 +1503,18 @@ class MainWindow(QMainWindow):
         if self.transcribe_button.isChecked():
             self.transcribe_button.setChecked(False)
         
+        # Stop the auto-segmentation
+        self.stopAutoSegment()
+        
         if self.media_controller.loadMedia(file_path):
             self.media_path = file_path
         
+        # Release the memory-mapped waveform of the previous media,
+        # so it can be removed from cache
+        self.audio_samples = None
+        self.waveform.setSamples(np.zeros(0, dtype=np.float16), WAVEFORM_SAMPLERATE)
+        cache.set_active_media(file_path)
+        
         if self.file_path is None:
             self.file_path = file_path
         
@@ -1452,7 +1525,10 @@ class MainWindow(QMainWindow):
             self.audio_samples = cached_waveform
         else:
             self.log.info("Rendering waveform...")
-            self.audio_samples = get_samples(str(file_path), WAVEFORM_SAMPLERATE)
+            from ostilhou.audio.audio_numpy import get_samples
+            with tracer.span("waveform build", "media"):
+                # Same dtype as the cached waveforms
+                self.audio_samples = get_samples(str(file_path), WAVEFORM_SAMPLERATE).astype(np.float16)
             cache.set_waveform(file_path, self.audio_samples)
         
         self.log.info(f"Loaded {len(self.audio_samples)} audio samples")
@@ -1571,6 +1647,17 @@ class MainWindow(QMainWindow):
         self.transcription_led.setVisible(True)
         self.waveform.must_redraw = True
 
+        # A new waveform may have been added to the cache
+        self.cleanCache()
+
+
+    def cleanCache(self) -> None:
+        """Evict least recently used media from cache, in a background thread"""
+        from src.cache_janitor import CacheJanitor
+        janitor = CacheJanitor()
+        janitor.signals.message.connect(self.setStatusMessage)
+        QThreadPool.globalInstance().start(janitor)
+
 
     def onImportRTF(self):
         from src.imports.rtf_importer import RTFImporter
@@ -1578,61 +1665,65 @@ class MainWindow(QMainWindow):
 
 
     def onExportSrt(self):
+        from src.exports.textual_exporter import export, exportSignals
         exportSignals.message.connect(self.setStatusMessage)
         export(self, str(self.media_path), self.getUtterancesForExport(), "srt")
         exportSignals.message.disconnect()
 
     def onExportEaf(self):
+        from src.exports.textual_exporter import export, exportSignals
         exportSignals.message.connect(self.setStatusMessage)
         export(self, str(self.media_path), self.getUtterancesForExport(), "eaf")
         exportSignals.message.disconnect()
 
     def onExportTxt(self):
+        from src.exports.textual_exporter import export, exportSignals
         exportSignals.message.connect(self.setStatusMessage)
         export(self, str(self.media_path), self.getUtterancesForExport(), "txt")
         exportSignals.message.disconnect()
 
 
-    def getUtterancesForExport(self) -> List[Tuple[str, Segment]]:
-        """Return all sentences and segments for export"""
-        utterances = []
-        block = self.text_widget.document().firstBlock()
-        while block.isValid():            
-            if self.document_controller.getBlockType(block) == BlockType.ALIGNED:
-                text = self.text_widget.getBlockHtml(block)[0]
-
-                # Remove extra spaces
-                lines = [' '.join(l.split()) for l in text.split(LINE_BREAK)]
-                text = LINE_BREAK.join(lines)
-            
-                block_id = self.document_controller.getBlockId(block)
-                segment = self.document_controller.getSegment(block_id)
-                if segment:
-                    utterances.append( (text, segment) )
-            
-            block = block.next()
-        
-        return utterances
+    def getUtterancesForExport(self) -> Iterator[Tuple[str, Segment]]:
+        """Generate all sentences and segments for export"""
+        return self.document_controller.iterUtterancesForExport()
 
 
     def onExportAudioSegments(self):
         log.info("Export audio segments")
         if self.media_path is None:
             return
+
+        from src.exports import segment_exporter
+        if segment_exporter.audio_extractor is None:
+            segment_exporter.initAudioSegmentExtractor(self)
         
+        mode_name = app_settings.value("export/audio_segments_mode", EXPORT_AUDIO_SEGMENTS_MODE, type=str)
+        mode = segment_exporter.ExtractionMode.__members__.get(
+            mode_name.upper(), segment_exporter.ExtractionMode.COPY
+        )
+        texts = None
+
         if self.waveform.selection_is_active:
             selection = self.waveform.getSelection()
             if selection is None:
                 return
             selected_segments = [selection]
         else:
-            selected_segments = [
-                self.document_controller.getSegment(seg_id)
-                for seg_id in self.waveform.active_segments
+            seg_ids = [
+                seg_id for seg_id in self.waveform.active_segments
+                if self.document_controller.getSegment(seg_id)
             ]
-            selected_segments = list(filter(None, selected_segments))
-
-        segment_exporter.startAudioSegmentExtractor(self.media_path, selected_segments)
+            selected_segments = [self.document_controller.getSegment(seg_id) for seg_id in seg_ids]
+            if mode == segment_exporter.ExtractionMode.PCM:
+                # Aligned text is exported alongside the audio
+                texts = []
+                for seg_id in seg_ids:
+                    block = self.document_controller.getBlockById(seg_id)
+                    texts.append(block.text() if block else '')
+
+        segment_exporter.startAudioSegmentExtractor(
+            self.media_path, selected_segments, mode, texts
+        )
 
 
     def showParametersDialog(self, tab_idx: int = 0)  -> None:
@@ -1651,6 +1742,8 @@ class MainWindow(QMainWindow):
         def _onUpdateUiLanguage(lang: str) -> None:
             QApplication.instance().switch_language(lang)
 
+        from src.ui.parameters_dialog import ParametersDialog
+
         old_language = lang.getCurrentLanguage()
         dialog = ParametersDialog(self, self.media_path)
 
@@ -1668,17 +1761,23 @@ class MainWindow(QMainWindow):
 
         dialog.exec()
 
+        # Apply the cache size limit, if it was changed
+        self.cleanCache()
+
         self.changeLanguage(old_language)
 
 
     def showAboutDialog(self):
+        from src.ui.about_page import AboutDialog
         about_dialog = AboutDialog(self)
         about_dialog.exec()
 
 
     def onTargetDensityChanged(self, cps: float) -> None:
         self.waveform.changeTargetDensity(cps)
+        self.text_widget.highlighter.changeTargetDensity(cps)
         self._target_density = cps
+        self._density_status_timer.start()
 
 
     def onCachedSceneCleared(self) -> None:
@@ -1694,50 +1793,21 @@ class MainWindow(QMainWindow):
             self._autosave_timer.stop()
 
 
-    def getSubtitleAtPosition(self, time: float) -> Tuple[SegmentId, str]:
-        """
-        Return (seg_id, sentence) or None
-        if there is any utterance at that time position
-
-        Args:
-            time (float):
-                Time position (in seconds)
-        
-        Return:
-            seg_id, sentence (tuple):
-                Segment ID and HTML formatted sentence
-        """
-
-        seg_ids = self.document_controller.getSegmentsAtTime(time)
-        if not seg_ids:
-            return (-1, "")
-        seg_id = seg_ids[0]
-        
-        # Remove metadata from subtitle text
-        block = self.document_controller.getBlockById(seg_id)
-        if block is None:
-            return (-1, "")
-
-        html, _ = self.text_widget.getBlockHtml(block)
-        # html = extract_metadata(html)[0] if block else ""
-
-        return (seg_id, html)
-    
-
     def updateSubtitle(self, position_sec: float) -> None:
         """Called at every player position changes"""
 
         if not self.video_widget.isVisible():
             return
         
-        seg_id, text = self.getSubtitleAtPosition(position_sec)
-
-        self.video_widget.setCaption(text, position_sec)
+        caption = self.document_controller.getCaptionAtTime(position_sec)
+        self.video_widget.setCaption(caption, position_sec)
 
 
+    @traced("player position", "playback")
     def onPlayerPositionChanged(self, position_sec: int) -> None:
         """
-        Called every time the position is changed in the QMediaPlayer
+        Called when the position of the QMediaPlayer changes,
+        once per display frame at most during playback
         Updates the head position on the waveform and highlight the sentence
         in the text widget if play head is above an aligned segment
         """
@@ -1792,11 +1862,9 @@ class MainWindow(QMainWindow):
                     return
 
         # Highlight text sentence at this time position
-        if (seg_ids := self.document_controller.getSegmentsAtTime(self.waveform.playhead)) != -1:
-            if seg_ids and (seg_ids[0] != self.text_widget.highlighted_sentence_id):
-                self.text_widget.highlightUtterance(seg_ids[0], scroll_text=False)
-        else:
-            self.text_widget.deactivateSentence()
+        segment_id = self.document_controller.getSegmentIdAtTime(self.waveform.playhead)
+        if segment_id >= 0 and segment_id != self.text_widget.highlighted_sentence_id:
+            self.text_widget.highlightUtterance(segment_id, scroll_text=False)
         
         self.updateSubtitle(position_sec)
     
@@ -2033,6 +2101,7 @@ class MainWindow(QMainWindow):
                     self.waveform.scenes = cached_scenes
                 else:
                     self.log.info("Start scene changes detection")
+                    from src.scene_detector import SceneDetectWorker
                     self.scene_detector = SceneDetectWorker()
                     self.scene_detector.setMediaPath(self.media_path)
                     self.scene_detector.setThreshold(FFMPEG_SCENE_DETECTOR_THRESHOLD)
@@ -2083,11 +2152,17 @@ class MainWindow(QMainWindow):
             self.redo_button.setEnabled(True)
         else:
             self.redo_button.setEnabled(False)
+        
+        self._density_status_timer.start()
 
 
     def onAutoSegment(self) -> None:
         if self.audio_samples is None:
             return
+        if self.auto_segmenter is not None:
+            # Stop the running segmentation instead
+            self.auto_segmenter.stop()
+            return
         
         # Check if there is an active selection
         start_frame = 0
@@ -2098,23 +2173,79 @@ class MainWindow(QMainWindow):
             end_frame = int(selection_end * WAVEFORM_SAMPLERATE)
             self.waveform.removeSelection()
 
-        segments = auto_segment(self.audio_samples, start_frame, end_frame)
+        from src.auto_segment import AutoSegmentWorker
+        self.auto_segmenter = AutoSegmentWorker(self.audio_samples, start_frame, end_frame)
+        self.auto_segmenter.segments_found.connect(self.onAutoSegmentsFound)
+        self.auto_segmenter.progress.connect(self.onAutoSegmentProgress)
+        self.auto_segmenter.message.connect(self.setStatusMessage)
+        self.auto_segmenter.finished.connect(self.onAutoSegmentFinished)
+        self._auto_segment_run += 1
+        self._auto_segment_count = 0
+        self.auto_segmenter.start()
 
-        self.setStatusMessage(self.tr("{n} segments found").format(n=len(segments)))
 
-        self.undo_stack.beginMacro("Auto segment")
-        for start, end in segments:
-            self.undo_stack.push(
-                CreateNewEmptyUtteranceCommand(
-                    self.media_controller,
-                    self.document_controller,
-                    self.text_widget,
-                    self.waveform,
-                    [start, end],
-                    None
-                )
+    def stopAutoSegment(self) -> None:
+        """Stop a running segmentation and drop the segments not yet added"""
+        if self.auto_segmenter is None:
+            return
+        self.auto_segmenter.stop()
+        self.auto_segmenter.wait()
+        self._disconnectAutoSegmenter()
+
+
+    def _isAutoSegmenterSignal(self) -> bool:
+        """
+        Signals queued by a stopped segmentation are still delivered,
+        without a sender once disconnected
+        """
+        sender = self.sender()
+        return sender is not None and sender is self.auto_segmenter
+
+
+    def _disconnectAutoSegmenter(self) -> None:
+        self.auto_segmenter.segments_found.disconnect(self.onAutoSegmentsFound)
+        self.auto_segmenter.progress.disconnect(self.onAutoSegmentProgress)
+        self.auto_segmenter.message.disconnect(self.setStatusMessage)
+        self.auto_segmenter.finished.disconnect(self.onAutoSegmentFinished)
+        self.auto_segmenter.deleteLater()
+        self.auto_segmenter = None
+
+
+    def onAutoSegmentsFound(self, segments: List[Segment]) -> None:
+        """Segments of a single run are merged in a single undo command"""
+        if not self._isAutoSegmenterSignal():
+            return
+        self._auto_segment_count += len(segments)
+        self.undo_stack.push(
+            CreateUtterancesBatchCommand(
+                self.media_controller,
+                self.document_controller,
+                self.text_widget,
+                self.waveform,
+                [ [start, end] for start, end in segments ],
+                merge_key=self._auto_segment_run
+            )
+        )
+
+
+    def onAutoSegmentProgress(self, progress: float) -> None:
+        if not self._isAutoSegmenterSignal():
+            return
+        self.setStatusMessage(
+            self.tr("Finding segments... {percent}%").format(percent=round(100 * progress))
+        )
+
+
+    def onAutoSegmentFinished(self, success: bool) -> None:
+        if not self._isAutoSegmenterSignal():
+            return
+        if success:
+            self.setStatusMessage(self.tr("{n} segments found").format(n=self._auto_segment_count))
+        else:
+            self.setStatusMessage(
+                self.tr("Segmentation stopped, {n} segments found").format(n=self._auto_segment_count)
             )
-        self.undo_stack.endMacro()
+        self._disconnectAutoSegmenter()
 
     
     def adaptToSubtitle(self) -> None:
@@ -2132,6 +2263,12 @@ class MainWindow(QMainWindow):
     @Slot()
     def onTextChanged(self) -> None:
         #log.debug("onTextChanged()")
+        if self.text_widget.highlighter.isRehighlighting():
+            # Nothing was modified
+            return
+
+        self._density_status_timer.start()
+
         # Update the utterance density field
         with QSignalBlocker(self.text_widget.document()):
             cursor = self.text_widget.textCursor()
@@ -2255,14 +2392,15 @@ class MainWindow(QMainWindow):
                 self.toggleHiddenTranscription(toggled)
             else:
                 self.transcribeAction()
-        else:
-            self.recognizer.stop()
+        elif self._recognizer is not None:
+            self._recognizer.stop()
 
 
     def toggleHiddenTranscription(self, checked: bool):
         log.debug(f"toggleHiddenTranscription({checked})")
         if not checked:
-            self.recognizer.stop()
+            if self._recognizer is not None:
+                self._recognizer.stop()
             return
 
         if self.media_path is None:
@@ -2362,6 +2500,7 @@ class MainWindow(QMainWindow):
         self.text_widget.highlighter.show_misspelling = checked
         
         if checked:
+            from src.hunspell import HunspellLoader
             loader = HunspellLoader()
             loader.signals.finished.connect(self.text_widget.highlighter.setHunspellDictionary)
             loader.signals.message.connect(self.setStatusMessage)
@@ -2495,15 +2634,22 @@ class MainWindow(QMainWindow):
             # Save media cache
             if self.media_path:
                 cache.update_media_metadata(self.media_path)
+            
+            # Wait for cache files still being written
+            cache.flush()
 
             # Save window geometry and state
             app_settings.setValue("main_window/geometry", self.saveGeometry())
             app_settings.setValue("main_window/window_state", self.saveState())
 
             # Stop and destroy the recognizer
-            self.recognizer.stop()
-            self.recognizer.cleanup()
+            if self._recognizer is not None:
+                self._recognizer.stop()
+                self._recognizer.cleanup()
             
+            # Stop the auto-segmentation
+            self.stopAutoSegment()
+
             # Stop and destroy the scene detector
             if self.scene_detector:
                 self.scene_detector.stop()
@@ -2538,6 +2684,25 @@ class MainWindow(QMainWindow):
         self.updateSegmentInfoResizing(segment_id, segment, density)
 
 
+    def updateDensityStatus(self) -> None:
+        """Show the number of utterances denser than the target and the highest density"""
+        stats = self.document_controller.getDensityStatistics(self._target_density, num_worst=0)
+        if stats.num_utterances == 0:
+            self.status_density_label.clear()
+            self.status_density_label.setToolTip("")
+            return
+        
+        warning_style = "background-color: red; color: white;"
+        over_str = self.tr("dense: {}/{}").format(stats.over_target, stats.num_utterances)
+        max_str = self.tr("max: {}").format(f"{stats.max_density:.1f}{app_strings.TR_UNIT_CPS}")
+        if stats.over_target > 0:
+            over_str = f"<span style='{warning_style}'>{over_str}</span>"
+        self.status_density_label.setText("&nbsp;&nbsp;".join([over_str, max_str]))
+        self.status_density_label.setToolTip(
+            self.tr("Utterances denser than {}").format(f"{self._target_density:.1f}{app_strings.TR_UNIT_CPS}")
+        )
+
+
     def updateSegmentInfoResizing(self, seg_id:SegmentId, segment:Segment, density:float) -> None:
         """
         Rehighlight sentence in text widget and update status bar info
@@ -2701,8 +2866,19 @@ def main(argv: list):
         app_strings.initialize() # Load strings
 
     loadIcons()
-    window = MainWindow(file_path)
-    window.show()
+    with tracer.span("create main window", "startup"):
+        window = MainWindow(file_path)
+        window.show()
+    log.info(f"Main window shown in {time.perf_counter() - _t_start:.3f}s")
+    tracer.instant("window shown", "startup")
+
+    if tracer.enabled:
+        # Save the trace buffer without quitting
+        save_trace_shortcut = QShortcut(QKeySequence("Ctrl+Alt+Shift+T"), window)
+        save_trace_shortcut.activated.connect(lambda: tracer.save())
+
+    # Load the speech-to-text model once the window is on screen
+    QTimer.singleShot(0, window.startServices)
 
     # Close splash screen
     try:
@@ -0,0 +1,252 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Journaled key-value store for the cache metadata.
+
+The store is made of two files:
+    * A snapshot, in jsonl format (one entry per line)
+    * An append-only journal of the changes made since the snapshot
+
+Every change appends a single line to the journal, so updating an entry
+costs the same whatever the number of entries.
+When the journal grows bigger than the snapshot, it is folded back into
+a new snapshot (written to a temp file, then renamed over the old one).
+A line torn by a crash is simply ignored when replaying the journal.
+
+A read-only store keeps its changes in memory and never writes its files,
+so it can be used by processes sharing the files with a writer process.
+"""
+
+
+from typing import Dict, Set, Optional, Callable
+from pathlib import Path
+import os
+import json
+import logging
+import threading
+
+
+log = logging.getLogger(__name__)
+
+
+
+class JournaledStore:
+    COMPACT_MIN_RECORDS = 256   # Never compact smaller journals
+
+    def __init__(
+            self,
+            snapshot_path: Path,
+            key_field: str,
+            keep_key: bool = False,
+            sort_field: Optional[str] = None,
+            lock: Optional[threading.RLock] = None
+        ) -> None:
+        """
+        Args:
+            snapshot_path (Path): Path to the jsonl snapshot file
+            key_field (str): Entry field holding the key, in the snapshot
+            keep_key (bool): Keep the key field in the entries, once loaded
+            sort_field (str): Entries are sorted by this field (descending)
+                in the snapshot file
+            lock: Lock shared with the owner of the store, if entries
+                are modified from outside
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path.with_suffix(".journal")
+        self.key_field = key_field
+        self.keep_key = keep_key
+        self.sort_field = sort_field
+
+        self.entries: Dict[str, dict] = dict()
+        self._pending: Set[str] = set()     # Keys with unsaved changes
+        self._n_records = 0                 # Number of lines in the journal
+        self._lock = lock or threading.RLock()
+        self.read_only = False              # Changes are kept in memory only
+
+
+    def load(self, upgrade: Optional[Callable[[dict], bool]] = None) -> None:
+        """
+        Load the snapshot and replay the journal.
+
+        Args:
+            upgrade: Called on every loaded entry, returns True if the entry
+                was modified and should be saved again
+        """
+        with self._lock:
+            self.entries.clear()
+            self._pending.clear()
+            self._n_records = 0
+
+            try:
+                with self.snapshot_path.open('r', encoding="utf-8") as _f:
+                    for line in _f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self.entries[self._pop_key(entry)] = entry
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.error(f"Could not open {self.snapshot_path}: {e}")
+
+            try:
+                with self.journal_path.open('r', encoding="utf-8") as _f:
+                    for line in _f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Torn write
+                            continue
+                        self._replay(record)
+                        self._n_records += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.error(f"Could not open {self.journal_path}: {e}")
+
+            if upgrade is not None:
+                for key, entry in self.entries.items():
+                    if upgrade(entry):
+                        self._pending.add(key)
+
+
+    def _pop_key(self, entry: dict) -> str:
+        if self.keep_key:
+            return entry[self.key_field]
+        return entry.pop(self.key_field)
+
+
+    def _replay(self, record: dict) -> None:
+        if "set" in record:
+            self.entries[record["set"]] = record["entry"]
+        elif "del" in record:
+            self.entries.pop(record["del"], None)
+
+
+    def _serialize(self, key: str, entry: dict) -> dict:
+        return {**entry, self.key_field: key}
+
+
+    def _append(self, records: list) -> None:
+        """Append records to the journal"""
+        if self.read_only:
+            return
+        try:
+            with self.journal_path.open('a', encoding="utf-8") as _f:
+                _f.write(''.join(json.dumps(r) + '\n' for r in records))
+            self._n_records += len(records)
+        except OSError as e:
+            log.error(f"Couldn't write to {self.journal_path} ({e})")
+            return
+
+        if self._n_records > max(self.COMPACT_MIN_RECORDS, len(self.entries)):
+            self.compact()
+
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+
+    def __getitem__(self, key: str) -> dict:
+        return self.entries[key]
+
+
+    def get(self, key: str, default=None):
+        return self.entries.get(key, default)
+
+
+    def put(self, key: str, entry: Optional[dict] = None) -> None:
+        """
+        Set an entry and write it to the journal, along with pending changes.
+        If no entry is given, the entry currently in memory is written.
+        """
+        with self._lock:
+            if entry is not None:
+                self.entries[key] = entry
+            self._pending.add(key)
+            self.flush()
+
+
+    def mark_dirty(self, key: str) -> None:
+        """Mark an entry as modified, it will be saved with the next flush"""
+        with self._lock:
+            self._pending.add(key)
+
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pending.discard(key)
+            if self.entries.pop(key, None) is not None:
+                self._append([{"del": key}])
+
+
+    def clear(self) -> None:
+        """Remove all entries, and their files on disk"""
+        with self._lock:
+            self.entries.clear()
+            self._pending.clear()
+            self._n_records = 0
+            if self.read_only:
+                return
+            self.snapshot_path.unlink(missing_ok=True)
+            self.journal_path.unlink(missing_ok=True)
+
+
+    def flush(self) -> None:
+        """Write pending changes to the journal"""
+        with self._lock:
+            if not self._pending:
+                return
+            records = [
+                {"set": key, "entry": self.entries[key]}
+                for key in self._pending if key in self.entries
+            ]
+            self._pending.clear()
+            if records:
+                self._append(records)
+
+
+    def compact(self) -> None:
+        """Fold the journal into a new snapshot file"""
+        with self._lock:
+            if self.read_only:
+                return
+            log.info(f"Compacting {self.snapshot_path.name}")
+            keys = self.entries.keys()
+            if self.sort_field:
+                keys = sorted(
+                    keys,
+                    key=lambda k: self.entries[k].get(self.sort_field, 0.0),
+                    reverse=True
+                )
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            try:
+                with tmp_path.open('w', encoding="utf-8") as _f:
+                    for key in keys:
+                        json.dump(self._serialize(key, self.entries[key]), _f)
+                        _f.write('\n')
+                    _f.flush()
+                    os.fsync(_f.fileno())
+                os.replace(tmp_path, self.snapshot_path)
+                # The journal is only truncated once the new snapshot is in place
+                self.journal_path.unlink(missing_ok=True)
+                self._n_records = 0
+            except OSError as e:
+                log.error(f"Couldn't compact {self.snapshot_path} ({e})")
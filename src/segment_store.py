@@ -0,0 +1,253 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Segments of a document, stored in arrays.
+
+The start, end and ID of every segment are kept in parallel arrays,
+with a map from segment ID to row. Rows of removed segments are reused.
+Copying the store is a copy of its arrays.
+The store behaves like a `Dict[SegmentId, Segment]`, segments are returned
+as new `[start, end]` lists, so modifying them doesn't change the store.
+"""
+
+
+from collections.abc import MutableMapping
+import operator
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.interfaces import Segment, SegmentId
+
+
+
+class SegmentStore(MutableMapping):
+    """
+    Segment IDs are non-negative integers, given by a counter,
+    so the map from segment ID to row is an array too.
+    NumPy integers are the same keys as Python integers.
+    Iteration is in increasing order of segment IDs.
+    """
+
+    initial_capacity = 256
+
+    def __init__(self, segments: Optional[Dict[SegmentId, Segment]] = None) -> None:
+        self.clear()
+        if segments:
+            self.update(segments)
+
+
+    def clear(self) -> None:
+        self._num_segments = 0
+        self._rows = np.full(self.initial_capacity, -1, dtype=np.int64) # Indexed by segment ID
+        self._free_rows: List[int] = []
+        self._segment_ids = np.full(self.initial_capacity, -1, dtype=np.int64)
+        self._starts = np.zeros(self.initial_capacity, dtype=np.float64)
+        self._ends = np.zeros(self.initial_capacity, dtype=np.float64)
+
+
+    def _grow(self) -> None:
+        capacity = len(self._segment_ids)
+        self._segment_ids = np.concatenate((self._segment_ids, np.full(capacity, -1, dtype=np.int64)))
+        self._starts = np.concatenate((self._starts, np.zeros(capacity, dtype=np.float64)))
+        self._ends = np.concatenate((self._ends, np.zeros(capacity, dtype=np.float64)))
+
+
+    def _getRow(self, segment_id) -> int:
+        """Return the row of a segment, or -1"""
+        try:
+            segment_id = operator.index(segment_id)
+        except TypeError:
+            return -1
+        if 0 <= segment_id < len(self._rows):
+            return int(self._rows[segment_id])
+        return -1
+
+
+    def __len__(self) -> int:
+        return self._num_segments
+
+
+    def __contains__(self, segment_id) -> bool:
+        return self._getRow(segment_id) >= 0
+
+
+    def __iter__(self) -> Iterator[SegmentId]:
+        return iter(np.flatnonzero(self._rows >= 0).tolist())
+
+
+    def __getitem__(self, segment_id: SegmentId) -> Segment:
+        row = self._getRow(segment_id)
+        if row < 0:
+            raise KeyError(segment_id)
+        return [float(self._starts[row]), float(self._ends[row])]
+
+
+    def __setitem__(self, segment_id: SegmentId, segment: Segment) -> None:
+        segment_id = operator.index(segment_id)
+        start, end = segment
+        row = self._getRow(segment_id)
+        if row < 0:
+            if segment_id < 0:
+                raise KeyError(segment_id)
+            if segment_id >= len(self._rows):
+                capacity = max(2 * len(self._rows), segment_id + 1)
+                self._rows = np.concatenate((self._rows, np.full(capacity - len(self._rows), -1, dtype=np.int64)))
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row = self._num_segments
+                if row >= len(self._segment_ids):
+                    self._grow()
+            self._rows[segment_id] = row
+            self._segment_ids[row] = segment_id
+            self._num_segments += 1
+        self._starts[row] = start
+        self._ends[row] = end
+
+
+    def __delitem__(self, segment_id: SegmentId) -> None:
+        row = self._getRow(segment_id)
+        if row < 0:
+            raise KeyError(segment_id)
+        self._rows[segment_id] = -1
+        self._segment_ids[row] = -1
+        self._free_rows.append(row)
+        self._num_segments -= 1
+
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())})"
+
+
+    def get(self, segment_id: SegmentId, default=None):
+        row = self._getRow(segment_id)
+        if row < 0:
+            return default
+        return [float(self._starts[row]), float(self._ends[row])]
+
+
+    def _getItems(self, rows: np.ndarray) -> List[Tuple[SegmentId, Segment]]:
+        return [
+            (segment_id, [start, end])
+            for segment_id, start, end in zip(
+                self._segment_ids[rows].tolist(),
+                self._starts[rows].tolist(),
+                self._ends[rows].tolist()
+            )
+        ]
+
+
+    def items(self) -> List[Tuple[SegmentId, Segment]]:
+        """Return a list of (SegmentId, Segment), by increasing segment ID"""
+        return self._getItems(self._rows[self._rows >= 0])
+
+
+    def values(self) -> List[Segment]:
+        return [segment for _, segment in self.items()]
+
+
+    def copy(self) -> "SegmentStore":
+        """A snapshot of the store, independent of later changes"""
+        store = SegmentStore.__new__(SegmentStore)
+        store._num_segments = self._num_segments
+        store._rows = self._rows.copy()
+        store._free_rows = self._free_rows.copy()
+        store._segment_ids = self._segment_ids.copy()
+        store._starts = self._starts.copy()
+        store._ends = self._ends.copy()
+        return store
+
+
+    def __copy__(self) -> "SegmentStore":
+        return self.copy()
+
+
+    def __deepcopy__(self, memo) -> "SegmentStore":
+        return self.copy()
+
+
+    def getArrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the IDs, starts and ends of all segments, sorted by start then end"""
+        used = self._segment_ids >= 0
+        segment_ids = self._segment_ids[used]
+        starts = self._starts[used]
+        ends = self._ends[used]
+        order = np.lexsort((ends, starts))
+        return segment_ids[order], starts[order], ends[order]
+
+
+    def getSortedItems(self) -> List[Tuple[SegmentId, Segment]]:
+        """Return the list of (SegmentId, Segment), sorted by start time"""
+        rows = np.flatnonzero(self._segment_ids >= 0)
+        rows = rows[np.lexsort((self._ends[rows], self._starts[rows]))]
+        return self._getItems(rows)
+
+
+    def getItemsInRange(self, t_start: float, t_end: float) -> List[Tuple[SegmentId, Segment]]:
+        """Return the segments intersecting with [t_start, t_end], sorted by start time"""
+        in_range = (self._segment_ids >= 0) & (self._starts <= t_end) & (self._ends >= t_start)
+        rows = np.flatnonzero(in_range)
+        rows = rows[np.lexsort((self._ends[rows], self._starts[rows]))]
+        return self._getItems(rows)
+
+
+    def getDurations(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the IDs of all segments and their durations"""
+        used = self._segment_ids >= 0
+        return self._segment_ids[used], self._ends[used] - self._starts[used]
+
+
+    def _getCoverage(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Segments sorted by start time, with the end of the time range covered
+        by all the segments before them and the index of the segment reaching it
+        """
+        segment_ids, starts, ends = self.getArrays()
+        covered_until = np.maximum.accumulate(ends)
+        indices = np.arange(len(ends))
+        reaching = np.maximum.accumulate(np.where(ends == covered_until, indices, 0))
+        return segment_ids, starts, covered_until, reaching
+
+
+    def getOverlaps(self) -> List[Tuple[SegmentId, SegmentId]]:
+        """
+        Return the pairs of overlapping segments.
+        Every segment starting before the end of a previous one is paired
+        with the previous segment ending last.
+        """
+        if len(self) < 2:
+            return []
+        segment_ids, starts, covered_until, reaching = self._getCoverage()
+        overlapping = np.flatnonzero(starts[1:] < covered_until[:-1]) + 1
+        return list(zip(
+            segment_ids[reaching[overlapping - 1]].tolist(),
+            segment_ids[overlapping].tolist()
+        ))
+
+
+    def getGaps(self, min_duration: float = 0.0) -> List[Segment]:
+        """Return the time ranges between segments, longer than `min_duration`"""
+        if len(self) < 2:
+            return []
+        _, starts, covered_until, _ = self._getCoverage()
+        gap_starts = covered_until[:-1]
+        gap_ends = starts[1:]
+        is_gap = gap_ends - gap_starts > min_duration
+        return np.column_stack((gap_starts[is_gap], gap_ends[is_gap])).tolist()
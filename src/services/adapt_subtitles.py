@@ -17,6 +17,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 
+from typing import Dict
 from math import ceil, floor
 
 from PySide6.QtCore import Qt
@@ -30,9 +31,14 @@ from PySide6.QtGui import QUndoStack, QTextBlock
 
 from src.document_controller import DocumentController
 from src.text_widget import TextEditWidget, LINE_BREAK
-from src.commands import ResizeSegmentCommand, ReplaceTextCommand
+from src.interfaces import Segment, SegmentId
+from src.commands import ResizeSegmentsCommand, ReplaceTextsCommand
 from src.utils import splitForSubtitle
-from src.settings import app_settings, SUBTITLES_MARGIN_SIZE, SUBTITLES_MIN_INTERVAL
+from src.settings import (
+    app_settings,
+    SUBTITLES_MARGIN_SIZE, SUBTITLES_MIN_INTERVAL, SUBTITLES_CPS
+)
+from src.strings import app_strings
 import src.lang as lang
 
 
@@ -88,6 +94,21 @@ class AdaptUtterancesDialog(QDialog):
 
         self.subtitle_rules_checkbox = QCheckBox(self.tr("Apply subtitles length and interval rules"))
         segment_options_layout.addWidget(self.subtitle_rules_checkbox)
+
+        # Density of the whole document
+        target_density = app_settings.value("subtitles/cps", SUBTITLES_CPS, type=float)
+        stats = self.document_controller.getDensityStatistics(target_density, num_worst=1)
+        if stats.num_utterances > 0:
+            density_label = QLabel(
+                self.tr("{n} of {total} segments exceed {cps} (densest: {max_cps})").format(
+                    n=stats.over_target,
+                    total=stats.num_utterances,
+                    cps=f"{target_density:.1f}{app_strings.TR_UNIT_CPS}",
+                    max_cps=f"{stats.max_density:.1f}{app_strings.TR_UNIT_CPS}"
+                )
+            )
+            density_label.setEnabled(False)
+            segment_options_layout.addWidget(density_label)
         dialog_layout.addWidget(segment_options_group)
         
         # Text options
@@ -252,46 +273,70 @@ def apply_subtitle_rules(
         undo_stack: QUndoStack,
         fps: float,
     ):
-    print("applying subs rules")
+    """
+    Snap segment boundaries on frame positions and split long sentences in two lines.
+    All changes are computed in a single pass, then applied in two batch commands.
+    """
     text_widget = document_controller.text_widget
 
     line_max_size: int = app_settings.value("subtitles/margin_size", SUBTITLES_MARGIN_SIZE, type=int)
+    min_interval: int = app_settings.value("subtitles/min_interval", SUBTITLES_MIN_INTERVAL, type=int)
+
+    # Position of segments in the timeline, to find their neighbours
+    sorted_segments = document_controller.getSortedSegments()
+    timeline_index = { seg_id: i for i, (seg_id, _) in enumerate(sorted_segments) }
+
+    new_segments: Dict[SegmentId, Segment] = dict()
+    new_texts: Dict[int, str] = dict()
+
+    def get_segment(i: int) -> Segment:
+        # Neighbouring segments may have been adjusted already
+        seg_id, segment = sorted_segments[i]
+        return new_segments.get(seg_id, segment)
     
     block = start_block
     while True:
         seg_id = document_controller.getBlockId(block)
         if seg_id != -1:
-            if fps > 0.0:
+            if fps > 0.0 and seg_id in timeline_index:
                 # Adjust segment boundaries on frame positions
-                seg_start, seg_end = document_controller.getSegment(seg_id)
+                i = timeline_index[seg_id]
+                seg_start, seg_end = sorted_segments[i][1]
                 frame_start = round(seg_start * fps) / fps
                 frame_end = round(seg_end * fps) / fps
-                prev_segment_id = document_controller.getPrevSegmentId(seg_id)
-                if segment := document_controller.getSegment(prev_segment_id):
-                    if frame_start < segment[1]:
-                        # The previous frame position overlaps the previous segment,
-                        # choose next frame
-                        frame_start = ceil(seg_start * fps) / fps
+                if i > 0 and frame_start < get_segment(i - 1)[1]:
+                    # The previous frame position overlaps the previous segment,
+                    # choose next frame
+                    frame_start = ceil(seg_start * fps) / fps
                 
-                next_segment_id = document_controller.getNextSegmentId(seg_id)
-                if segment := document_controller.getSegment(next_segment_id):
-                    right_boundary = round(segment[0] * fps) / fps
-                    right_boundary -= app_settings.value("subtitles/min_interval", SUBTITLES_MIN_INTERVAL, type=int) / fps
+                if i < len(sorted_segments) - 1:
+                    right_boundary = round(get_segment(i + 1)[0] * fps) / fps
+                    right_boundary -= min_interval / fps
                     if frame_end > right_boundary:
                         # The next frame position overlaps the next segment,
                         # choose previous frame
                         frame_end = right_boundary
-                undo_stack.push(ResizeSegmentCommand(document_controller, seg_id, frame_start, frame_end))
+                
+                if [frame_start, frame_end] != [seg_start, seg_end]:
+                    new_segments[seg_id] = [frame_start, frame_end]
 
-            text = block.text()
-            splits = splitForSubtitle(text, line_max_size)
+            splits = splitForSubtitle(block.text(), line_max_size)
             if len(splits) > 1:
-                text = LINE_BREAK.join([ s.strip() for s in splits ])
-                undo_stack.push(ReplaceTextCommand(text_widget, block, text))
+                new_texts[block.blockNumber()] = LINE_BREAK.join([ s.strip() for s in splits ])
             
         if block == end_block:
             break
         block = block.next()
+    
+    if not new_segments and not new_texts:
+        return
+    
+    undo_stack.beginMacro("Apply subtitle rules")
+    if new_segments:
+        undo_stack.push(ResizeSegmentsCommand(document_controller, new_segments))
+    if new_texts:
+        undo_stack.push(ReplaceTextsCommand(text_widget, new_texts))
+    undo_stack.endMacro()
 
 
 def remove_fillers(
@@ -299,6 +344,7 @@ def remove_fillers(
         text_widget: TextEditWidget,
         undo_stack: QUndoStack,
     ) -> None:
+    new_texts: Dict[int, str] = dict()
     block = start_block
     while block.isValid() and block != end_block.next():
         html_text, map = text_widget.getBlockHtml(block)
@@ -326,10 +372,13 @@ def remove_fillers(
             new_text_parts.append(html_text[region_start_idx:])
 
         new_text = ''.join(new_text_parts)
-
-        undo_stack.push(ReplaceTextCommand(text_widget, block, new_text))
+        if new_text != html_text:
+            new_texts[block.blockNumber()] = new_text
 
         block = block.next()
+    
+    if new_texts:
+        undo_stack.push(ReplaceTextsCommand(text_widget, new_texts))
 
 
 def convert_quotation_marks(
@@ -341,6 +390,7 @@ def convert_quotation_marks(
     # to use the right quotation marks depending on language
     quotation_open = False
 
+    new_texts: Dict[int, str] = dict()
     block = start_block
     while block.isValid() and block != end_block.next():
         html_text, _ = text_widget.getBlockHtml(block)
@@ -353,9 +403,12 @@ def convert_quotation_marks(
                 quotation_open = not quotation_open
                 idx += next_idx + 1
             new_text += html_text[idx:]
-            undo_stack.push(ReplaceTextCommand(text_widget, block, new_text))
+            new_texts[block.blockNumber()] = new_text
         
         block = block.next()
+    
+    if new_texts:
+        undo_stack.push(ReplaceTextsCommand(text_widget, new_texts))
 
 
 def convert_apostrophes(
@@ -377,13 +430,16 @@ def convert_apostrophes(
         to_replace = "’" # Unicode: U+2019
         replacement = "'"
 
+    new_texts: Dict[int, str] = dict()
     block = start_block
     while block.isValid() and block != end_block.next():
         # text = block.text()
         html_text, _ = text_widget.getBlockHtml(block)
         if to_replace in html_text:
             # We asume that there is no apostrophe in the formatting HTML elements
-            html_text = html_text.replace(to_replace, replacement)
-            undo_stack.push(ReplaceTextCommand(text_widget, block, html_text))
+            new_texts[block.blockNumber()] = html_text.replace(to_replace, replacement)
         
-        block = block.next()
\ No newline at end of file
+        block = block.next()
+    
+    if new_texts:
+        undo_stack.push(ReplaceTextsCommand(text_widget, new_texts))
\ No newline at end of file
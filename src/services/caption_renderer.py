@@ -21,6 +21,7 @@ from src.text_widget import LINE_BREAK
 from src.document_controller import DocumentController
 from src.aligner import align_text_with_vosk_tokens, print_alignment
 from src.utils import get_audiofile_info, find_system_fonts
+from src.tracing import traced
 
 
 log = logging.getLogger(__name__)
@@ -199,6 +200,7 @@ class CaptionRenderer:
             self.segment_properties[segment_id] = properties
        
 
+    @traced("render frame", "render")
     def render_frame(self, frame_number: int) -> None:
         """Render a full-size frame with open captions overlaid"""
         if not self.output_dir.exists():
@@ -31,6 +31,7 @@ from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 
 from src.interfaces import Segment, SegmentId
 from src.video_widget import VideoWidget
+from src.services.playback_clock import PlaybackClock
 from src.cache_system import cache
 
 # To trace the segmentation error when playing problematic segments
@@ -64,7 +65,8 @@ class MediaPlayerController(QObject):
     Handles all media playback operations.
     
     Signals:
-        position_changed: Emitted when playback position changes (position_sec: float)
+        position_changed: Emitted when playback position changes (position_sec: float),
+            once per display frame at most during playback
         playback_started: Emitted when playback starts
         playback_stopped: Emitted when playback stops
         segment_ended: Emitted when a segment finishes playing (segment_id: int)
@@ -94,6 +96,10 @@ class MediaPlayerController(QObject):
         self.media_path: Optional[Path] = None
         self.media_duration: float = 0.0  # in seconds
         self.media_metadata: dict = {}
+
+        # Coalesces the position updates from the player to the display refresh rate
+        self.clock = PlaybackClock(self)
+        self.clock.position_changed.connect(self.position_changed.emit)
         
         # Connect internal signals
         self.player.positionChanged.connect(self._onPositionChanged)
@@ -248,6 +254,7 @@ class MediaPlayerController(QObject):
         position_ms = int(position_sec * 1000)
         self.player.setPosition(position_ms)
         self.state.current_position = position_sec
+        self.clock.seek(position_sec)
         self.log.debug(f"Seeked to {position_sec:.3f}s")
     
 
@@ -292,6 +299,7 @@ class MediaPlayerController(QObject):
         """
         rate = max(0.1, min(4.0, rate))  # Reasonable bounds
         self.player.setPlaybackRate(rate)
+        self.clock.setRate(rate)
         self.log.debug(f"Playback rate set to {rate:.2f}x")
     
 
@@ -381,18 +389,18 @@ class MediaPlayerController(QObject):
         """Handle position changes from the media player"""
         position_sec = position_ms / 1000.0
         self.state.current_position = position_sec
-        
-        # Emit position update
-        self.position_changed.emit(position_sec)
+        self.clock.setPosition(position_sec)
     
 
     def _onPlaybackStateChanged(self, state: QMediaPlayer.PlaybackState) -> None:
         """Handle playback state changes"""
         if state == QMediaPlayer.PlaybackState.PlayingState:
             self.state.is_playing = True
+            self.clock.start(self.player.playbackRate())
             self.playback_started.emit()
         elif state in (QMediaPlayer.PlaybackState.PausedState, QMediaPlayer.PlaybackState.StoppedState):
             self.state.is_playing = False
+            self.clock.stop()
             self.playback_stopped.emit()
     
 
@@ -0,0 +1,139 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Playback clock.
+
+The media player reports its position irregularly, sometimes many times
+per displayed frame. During playback, the clock emits the position once
+per display frame instead, interpolated from the last reported position,
+so the UI is updated at a steady rate and the playhead moves smoothly.
+"""
+
+
+import logging
+from typing import Callable
+import time
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from src.animation_controller import frame_interval_ms
+
+
+
+log = logging.getLogger(__name__)
+
+
+# Don't extrapolate further than this from the last reported position,
+# in case the player stalls (in seconds)
+MAX_EXTRAPOLATION = 0.25
+
+# Reported positions slightly behind the interpolated position
+# are not shown, so the playhead never steps backward (in seconds)
+BACKWARD_TOLERANCE = 0.1
+
+
+
+class PlaybackClock(QObject):
+    """
+    Signals:
+        position_changed: Emitted at most once per display frame,
+            when the position has changed (position_sec: float)
+    """
+
+    position_changed = Signal(float)
+
+
+    def __init__(self, parent=None, time_source: Callable[[], float] = time.perf_counter):
+        super().__init__(parent)
+        self.time_source = time_source
+
+        self.is_playing = False
+        self.rate = 1.0
+        self._anchor_position = 0.0  # Last position reported by the player
+        self._anchor_time = 0.0
+        self._last_emitted = -1.0
+        self._discontinuity = True
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.onFrame)
+
+
+    def start(self, rate: float = 1.0) -> None:
+        """Playback has started"""
+        self.rate = rate
+        self.is_playing = True
+        self._anchor_time = self.time_source()
+        self.timer.start(frame_interval_ms())
+
+
+    def stop(self) -> None:
+        """Playback has stopped, the last reported position is emitted"""
+        self.is_playing = False
+        self.timer.stop()
+        self._emit(self._anchor_position)
+
+
+    def setRate(self, rate: float) -> None:
+        # Re-anchor, so the elapsed time is interpolated at the new rate
+        self._anchor_position = self.getPosition()
+        self._anchor_time = self.time_source()
+        self.rate = rate
+
+
+    def setPosition(self, position_sec: float) -> None:
+        """
+        A position reported by the media player.
+        While paused, it is emitted immediately.
+        """
+        self._anchor_position = position_sec
+        self._anchor_time = self.time_source()
+        if not self.is_playing:
+            self._emit(position_sec)
+
+
+    def seek(self, position_sec: float) -> None:
+        """The position jumped, the next frame may go backward"""
+        self._anchor_position = position_sec
+        self._anchor_time = self.time_source()
+        self._discontinuity = True
+
+
+    def getPosition(self) -> float:
+        """Current position, interpolated during playback"""
+        if not self.is_playing:
+            return self._anchor_position
+        elapsed = min(self.time_source() - self._anchor_time, MAX_EXTRAPOLATION)
+        return self._anchor_position + elapsed * self.rate
+
+
+    def onFrame(self) -> None:
+        position = self.getPosition()
+        if not self._discontinuity and self._last_emitted - BACKWARD_TOLERANCE < position < self._last_emitted:
+            # Hold the playhead until the player catches up
+            return
+        self._emit(position)
+
+
+    def _emit(self, position_sec: float) -> None:
+        if position_sec == self._last_emitted:
+            return
+        self._last_emitted = position_sec
+        self._discontinuity = False
+        self.position_changed.emit(position_sec)
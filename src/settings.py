@@ -43,9 +43,12 @@ UI_LANGUAGES = [
 app_settings = QSettings("OTilde", APP_NAME)
 
 
-WAVEFORM_SAMPLERATE = 1500 # The cached waveforms break if this value is changed
+WAVEFORM_SAMPLERATE = 1500 # Cached waveforms are computed again when this value is changed
+WAVEFORM_STORAGE_DTYPE = "float16" # "float16" (memory-mapped) or "int8" (smaller files)
 STATUS_BAR_TIMEOUT = 4000 # Display time of status bar messages (in ms)
 RECENT_FILES_LIMIT = 10  # Number of files kept in "Recent files" menu
+MEDIA_CACHE_DEFAULT_SIZE = 500  # Media cache size limit (in Mo)
+UI_MAX_FPS = 60         # Refresh rate of the playback and animations, at most
 
 
 # UI settings
@@ -74,6 +77,13 @@ SUBTITLES_BLOCK_DEFAULT_COLOR = QColor(0, 0, 0, 100)
 # Autosave settings
 AUTOSAVE_DEFAULT_INTERVAL = 0.2    # 1 minute
 AUTOSAVE_BACKUP_NUMBER = 3         # Number of files to keep at most
+AUTOSAVE_MAX_BACKLOG = 500         # Wait until fewer blocks are left to read for the snapshot
+
+# Audio segments export, settings key "export/audio_segments_mode"
+# "copy": concurrent FFmpeg processes, stream copy
+# "split": single FFmpeg process with the segment muxer, stream copy
+# "pcm": decode once to 16kHz mono WAV files, with the aligned text alongside
+EXPORT_AUDIO_SEGMENTS_MODE = "copy"
 
 
 shortcuts: Dict[str, QKeySequence] = {
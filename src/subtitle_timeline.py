@@ -0,0 +1,136 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Captions displayed over the video, indexed by time.
+
+The timeline is a sorted list of change points, so finding the caption
+at a given time during playback is a single bisection.
+Captions are stripped of their metadata once, on first display,
+and kept until the text of their utterance is modified.
+"""
+
+
+from typing import Callable, Dict, List, Optional, Tuple
+from bisect import bisect_right
+from math import inf
+
+from ostilhou.asr.dataset import MetadataParser
+
+from src.interfaces import Segment, SegmentId
+
+
+
+NO_CAPTION = ""
+
+# A segment is displayed slightly before its start, to absorb rounding errors
+START_TOLERANCE = 0.001
+
+
+
+class SubtitleTimeline:
+    """
+    The caption of segment `segment_ids[i]` is displayed from `times[i]`
+    to `times[i+1]`, a segment ID of -1 means no caption.
+    When segments overlap, the one starting first is displayed.
+    """
+
+    def __init__(self) -> None:
+        self.metadata_parser = MetadataParser()
+        self.metadata_parser.set_filter_out({"subtitles": False, "st": False})
+        self.clear()
+
+
+    def clear(self) -> None:
+        self._sorted_segments: Optional[List[Tuple[SegmentId, Segment]]] = None
+        self._times: List[float] = []
+        self._segment_ids: List[SegmentId] = []
+        self._captions: Dict[SegmentId, str] = dict()
+
+
+    def isOutdated(self, sorted_segments: List[Tuple[SegmentId, Segment]]) -> bool:
+        """The sorted list of segments is a new object every time a segment changes"""
+        return sorted_segments is not self._sorted_segments
+
+
+    def build(self, sorted_segments: List[Tuple[SegmentId, Segment]]) -> None:
+        """Compute the change points from segments sorted by start time"""
+        times = []
+        segment_ids = []
+        covered_until = -inf
+        for segment_id, (start, end) in sorted_segments:
+            # Parts already covered by a previous segment are skipped
+            start = max(start - START_TOLERANCE, covered_until)
+            if start >= end:
+                continue
+            if segment_ids and start > covered_until:
+                times.append(covered_until)
+                segment_ids.append(-1)
+            times.append(start)
+            segment_ids.append(segment_id)
+            covered_until = end
+        if segment_ids:
+            times.append(covered_until)
+            segment_ids.append(-1)
+
+        self._times = times
+        self._segment_ids = segment_ids
+        self._sorted_segments = sorted_segments
+
+        # Forget the captions of removed segments
+        self._captions = {
+            segment_id: self._captions[segment_id]
+            for segment_id in segment_ids if segment_id in self._captions
+        }
+
+
+    def getSegmentAt(self, position_sec: float) -> SegmentId:
+        i = bisect_right(self._times, position_sec) - 1
+        if i < 0:
+            return -1
+        return self._segment_ids[i]
+
+
+    def getCaption(self, segment_id: SegmentId, get_html: Callable[[SegmentId], str]) -> str:
+        """
+        Return the caption of a segment.
+        `get_html` is called to get the text of the utterance, if the caption isn't known yet.
+        """
+        if segment_id < 0:
+            return NO_CAPTION
+        caption = self._captions.get(segment_id)
+        if caption is None:
+            caption = self.formatCaption(get_html(segment_id))
+            self._captions[segment_id] = caption
+        return caption
+
+
+    def formatCaption(self, html: str) -> str:
+        """Remove metadata from a sentence, keep the subtitle text only"""
+        if not html:
+            return NO_CAPTION
+        data = self.metadata_parser.parse_sentence(html)
+        if data is None:
+            return NO_CAPTION
+        regions, _ = data
+        return ''.join([region["text"] for region in regions if "text" in region]).strip()
+
+
+    def invalidateCaption(self, segment_id: SegmentId) -> None:
+        """The text of an utterance has changed"""
+        self._captions.pop(segment_id, None)
@@ -17,9 +17,10 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 from enum import Enum
 import logging
+import re
 
 from PySide6.QtWidgets import (
     QApplication, QMenu, QTextEdit, QWidget
@@ -27,7 +28,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import (
     Qt, Signal, Slot, QMimeData,
     QRegularExpression,
-    QRect, QSize
+    QRect, QSize, QPoint
 )
 from PySide6.QtGui import (
     QAction, QColor, QFont, QIcon,
@@ -66,6 +67,12 @@ from src.settings import app_settings, SUBTITLES_MARGIN_SIZE
 log = logging.getLogger(__name__)
 
 
+# Special tokens ("<C'HOARZH>", "<LAU>"...)
+SPECIAL_TOKEN_PATTERN = QRegularExpression(r"<([a-zA-Z\']+)>")
+# Text with tags, entities or successive whitespaces must be inserted as HTML
+HTML_CHARS_PATTERN = re.compile(r"[<&]|\s\s")
+
+
 
 class LineNumberArea(QWidget):
     """The widget that displays line numbers on the left"""
@@ -108,6 +115,9 @@ class TextEditWidget(QTextEdit):
         self.document_controller = document_controller
         self.action = action
         self.line_number_area = LineNumberArea(self)
+        # Number of aligned utterances before each block, for the line number area
+        self._aligned_counts: List[int] = [0]
+        self._aligned_counts_block_count = 1
 
         # Disable default undo stack to use our own instead
         self.setUndoRedoEnabled(False)
@@ -118,6 +128,7 @@ class TextEditWidget(QTextEdit):
 
         # Signals to update the sidebar        
         self.document().blockCountChanged.connect(self.updateLineNumberAreaWidth)
+        self.document().contentsChange.connect(self.onContentsChange)
         self.verticalScrollBar().valueChanged.connect(self.updateLineNumberArea)
         self.document().contentsChanged.connect(self.updateLineNumberArea)
         self.updateLineNumberAreaWidth()
@@ -140,11 +151,13 @@ class TextEditWidget(QTextEdit):
     def updateThemeColors(self):        
         self._margin_color = theme.colors.margin
         self.highlighter.updateThemeColors()
-        self.highlighter.rehighlight()
+        self.highlighter.rehighlightLazily()
 
 
     def clear(self):
+        self.highlighter.cancelLazyRehighlight()
         self.document().clear()
+        self.invalidateLineNumbers()
     
 
     def getCursorState(self):
@@ -209,18 +222,43 @@ class TextEditWidget(QTextEdit):
         return new_block
 
 
-    def insertBlock(self, text: str, data: dict | None, pos: int) -> QTextBlock:
-        """Insert a block, with user data, at a given position"""
-        log.debug(f"text_widget.insertBlock({text=}, {data=}, {pos=})")
+    def appendSentences(self, sentences: Iterable[Tuple[str, SegmentId | None]]) -> None:
+        """
+        Insert many utterances at the end of the document, in a single edit block.
+        Highlighting is done lazily, starting with the blocks in the viewport.
+        """
+        document = self.document()
+        is_first_block = document.isEmpty()
+        block_format = QTextBlockFormat()
+        char_format = QTextCharFormat()
+
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.invalidateLineNumbers(cursor.blockNumber())
+        cursor.beginEditBlock()
+        for text, segment_id in sentences:
+            if is_first_block: # Account for the first preexisting block
+                is_first_block = False
+            else:
+                cursor.insertBlock(block_format, char_format)
 
-        cursor = self.textCursor()
-        cursor.setPosition(pos)
-        if pos > 0: # Account for the first preexisting block
-            cursor.insertBlock()
+            if HTML_CHARS_PATTERN.search(text):
+                cursor.insertHtml(self._escapeSpecialTokens(text))
+            else:
+                cursor.insertText(text, char_format)
+            
+            if segment_id is not None:
+                cursor.block().setUserData(MyTextBlockUserData({"seg_id": segment_id}))
+            # Block formats are cheap to set while in the edit block
+            cursor.setBlockFormat(self.highlighter.getBlockFormat(cursor.block()))
+        cursor.endEditBlock()
+
+        self.highlighter.rehighlightLazily()
 
-        # Escape the special tokens ("<C'HOARZH>", "<LAU>"...)
-        expression = QRegularExpression(r"<([a-zA-Z\']+)>")
-        matches = expression.globalMatch(text)
+
+    def _escapeSpecialTokens(self, text: str) -> str:
+        """Escape the special tokens ("<C'HOARZH>", "<LAU>"...) before inserting HTML"""
+        matches = SPECIAL_TOKEN_PATTERN.globalMatch(text)
         escaped_string = ""
         i = 0
         while matches.hasNext():
@@ -231,10 +269,23 @@ class TextEditWidget(QTextEdit):
                 escaped_string += "&lt;" + tag + "&gt;"
                 i = match.capturedEnd()
         escaped_string += text[i:]
+        return escaped_string
+
+
+    def insertBlock(self, text: str, data: dict | None, pos: int) -> QTextBlock:
+        """Insert a block, with user data, at a given position"""
+        log.debug(f"text_widget.insertBlock({text=}, {data=}, {pos=})")
+
+        cursor = self.textCursor()
+        cursor.setPosition(pos)
+        if pos > 0: # Account for the first preexisting block
+            cursor.insertBlock()
 
-        cursor.insertHtml(escaped_string)
+        cursor.insertHtml(self._escapeSpecialTokens(text))
         if data:
             cursor.block().setUserData(MyTextBlockUserData(data))
+        self.invalidateLineNumbers(cursor.blockNumber())
+        self.document_controller.invalidateBlocks(max(cursor.blockNumber() - 1, 0), cursor.blockNumber())
         
         return cursor.block()
 
@@ -286,6 +337,8 @@ class TextEditWidget(QTextEdit):
                     cursor.insertBlock()
                     cursor.insertText(text)
                     cursor.block().setUserData(MyTextBlockUserData({"seg_id": segment_id}))
+                    self.invalidateLineNumbers(cursor.blockNumber())
+                    self.document_controller.invalidateBlocks(cursor.blockNumber() - 1, cursor.blockNumber())
                     self.highlighter.rehighlightBlock(cursor.block())
                     if with_cursor:
                         # cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
@@ -330,6 +383,8 @@ class TextEditWidget(QTextEdit):
         new_block = cursor.block()
         if not new_block.text():
             new_block.setUserData(None)
+        self.invalidateLineNumbers(new_block.blockNumber())
+        self.document_controller.invalidateBlocks(new_block.blockNumber(), new_block.blockNumber())
         
         self.setTextCursor(cursor)
         
@@ -337,6 +392,140 @@ class TextEditWidget(QTextEdit):
         self.highlighted_sentence_id = -1
     
 
+    def insertSentencesWithIds(self, text: str, segment_ids: List[SegmentId]) -> None:
+        """
+        Create many new utterances from existing segment ids,
+        inserted based on their segment's timecodes.
+        The document is walked only once and rehighlighted once.
+
+        This action won't be added to the undo stack.
+        """
+        new_segments = sorted(
+            [
+                (self.document_controller.segments[segment_id], segment_id)
+                for segment_id in segment_ids
+                if segment_id in self.document_controller.segments
+            ]
+        )
+        if not new_segments:
+            return
+        new_ids = { segment_id for _, segment_id in new_segments }
+        doc = self.document()
+
+        was_blocked = doc.blockSignals(True) # Prevent segment info display
+        cursor = QTextCursor(doc)
+        cursor.beginEditBlock()
+
+        first_block_number = doc.blockCount()
+        last_block_number = 0
+        i = 0
+        block = doc.firstBlock()
+        while block.isValid() and i < len(new_segments):
+            other_id = self.document_controller.getBlockId(block)
+            if other_id in self.document_controller.segments and other_id not in new_ids:
+                other_start, _ = self.document_controller.segments[other_id]
+                while i < len(new_segments) and other_start > new_segments[i][0][1]:
+                    # Insert new utterance right before this one
+                    segment_id = new_segments[i][1]
+                    if block.previous().isValid():
+                        cursor.setPosition(block.position() - 1)
+                        cursor.insertBlock()
+                        cursor.insertText(text)
+                        cursor.block().setUserData(MyTextBlockUserData({"seg_id": segment_id}))
+                    else:
+                        # First block of the document, its user data stays in the first half
+                        other_data = block.userData().data
+                        cursor.setPosition(0)
+                        cursor.insertText(text)
+                        cursor.insertBlock()
+                        doc.firstBlock().setUserData(MyTextBlockUserData({"seg_id": segment_id}))
+                        cursor.block().setUserData(MyTextBlockUserData(other_data))
+                        block = cursor.block()
+                    first_block_number = min(first_block_number, block.blockNumber() - 1)
+                    last_block_number = max(last_block_number, block.blockNumber() - 1)
+                    i += 1
+            block = block.next()
+        
+        # Insert the remaining utterances at the end
+        for _, segment_id in new_segments[i:]:
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            if cursor.position() > 0: # Account for the first preexisting block
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertText(text)
+            cursor.block().setUserData(MyTextBlockUserData({"seg_id": segment_id}))
+            first_block_number = min(first_block_number, cursor.blockNumber())
+            last_block_number = max(last_block_number, cursor.blockNumber())
+
+        cursor.endEditBlock()
+        doc.blockSignals(was_blocked)
+
+        self.invalidateLineNumbers(first_block_number)
+        self.document_controller.invalidateBlocks(first_block_number, last_block_number)
+        self.highlighter.rehighlightRange(
+            doc.findBlockByNumber(first_block_number),
+            doc.findBlockByNumber(last_block_number)
+        )
+
+
+    def deleteSentences(self, segment_ids: List[SegmentId]) -> None:
+        """
+        Delete the sentences of many utterances, and their metadata.
+        This is not a undoable command.
+        """
+        segment_ids = set(segment_ids)
+        blocks = [
+            block for block in self.document_controller.getAllBlocks()
+            if self.document_controller.getBlockId(block) in segment_ids
+        ]
+        if not blocks:
+            return
+        first_block_number = blocks[0].blockNumber()
+        last_block_number = blocks[-1].blockNumber()
+        block_count = self.document().blockCount()
+        
+        was_blocked = self.document().blockSignals(True)
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+
+        # Remove blocks from the end, so that the other blocks don't move
+        for block in reversed(blocks):
+            cursor = QTextCursor(block)
+            if not block.previous().isValid() and block.next().isValid():
+                # First block of the document, remove the following separator instead
+                # and keep the user data of the next block
+                next_data = block.next().userData()
+                next_data = next_data.data if next_data else None
+                cursor.setPosition(block.next().position(), QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+                cursor.block().setUserData(MyTextBlockUserData(next_data) if next_data else None)
+                continue
+            
+            if block.text() == '':
+                cursor.deletePreviousChar()
+            else:
+                cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
+                cursor.removeSelectedText()
+
+            new_block = cursor.block()
+            if not new_block.text():
+                new_block.setUserData(None)
+        
+        cursor.endEditBlock()
+        self.document().blockSignals(was_blocked)
+
+        self.invalidateLineNumbers(first_block_number - 1)
+        # Blocks were merged with the block before them, or with the next one for the first block
+        num_removed = block_count - self.document().blockCount()
+        self.document_controller.invalidateBlocks(
+            max(first_block_number - 1, 0),
+            max(last_block_number - num_removed, first_block_number - 1, 0)
+        )
+        if first_block_number == 0:
+            first_block = self.document().firstBlock()
+            self.highlighter.rehighlightRange(first_block, first_block)
+        self.highlighted_sentence_id = -1
+
+
     def deleteSelectedText(self, cursor: QTextCursor):
         """Delete a selected portion of text, using an undoable command"""
         log.debug(f"deleteSelectedText(cursor)")
@@ -1502,11 +1691,65 @@ class TextEditWidget(QTextEdit):
         self.setViewportMargins(width, 0, 0, 0)
 
 
+    def getVisibleBlocks(self) -> Iterator[QTextBlock]:
+        """Iterate over the blocks shown in the viewport"""
+        doc_layout = self.document().documentLayout()
+        page_bottom = self.verticalScrollBar().value() + self.viewport().height()
+
+        block = self.cursorForPosition(QPoint(0, 0)).block()
+        while block.isValid() and doc_layout.blockBoundingRect(block).top() <= page_bottom:
+            yield block
+            block = block.next()
+
+
     def updateLineNumberArea(self) -> None:
         """Repaints the sidebar area."""
         self.line_number_area.update()
 
 
+    def invalidateLineNumbers(self, block_number: int = 0) -> None:
+        """
+        Utterance numbers must be recounted after this block.
+        Should be called when the alignment of a block changes.
+        """
+        del self._aligned_counts[max(block_number, 0) + 1:]
+
+
+    def onContentsChange(self, position: int, chars_removed: int, chars_added: int) -> None:
+        if self.highlighter.isRehighlighting():
+            # Nothing was modified
+            return
+        first_block = self.document().findBlock(position)
+        self.invalidateLineNumbers(first_block.blockNumber())
+        self._aligned_counts_block_count = self.document().blockCount()
+
+        last_block = self.document().findBlock(position + chars_added)
+        if not last_block.isValid():
+            last_block = self.document().lastBlock()
+        self.document_controller.invalidateUtterances(first_block, last_block)
+
+
+    def _getAlignedCount(self, block: QTextBlock) -> int:
+        """Return the number of aligned utterances before this block"""
+        if self._aligned_counts_block_count != self.document().blockCount():
+            # Blocks were added or removed with the document signals blocked
+            self.invalidateLineNumbers()
+            self._aligned_counts_block_count = self.document().blockCount()
+        
+        aligned_counts = self._aligned_counts
+        block_number = block.blockNumber()
+        if block_number >= len(aligned_counts):
+            # Count from the last valid block
+            counted_block = self.document().findBlockByNumber(len(aligned_counts) - 1)
+            count = aligned_counts[-1]
+            while len(aligned_counts) <= block_number:
+                if self.isAligned(counted_block):
+                    count += 1
+                aligned_counts.append(count)
+                counted_block = counted_block.next()
+        return aligned_counts[block_number]
+
+
     def lineNumberAreaPaintEvent(self, event) -> None:
         """ Paints the line numbers in the sidebar """
 
@@ -1516,11 +1759,13 @@ class TextEditWidget(QTextEdit):
         doc_layout = self.document().documentLayout()
         
         offset_y = self.verticalScrollBar().value()
-        # page_bottom = offset_y + self.viewport().height()
+        viewport_height = self.viewport().height()
         
-        # Iterate over all text blocks (could be optimized)
-        block = self.document().begin()
-        utterance_number = 0
+        # Start from the block before the first visible one, its bottom margin could be in view
+        block = self.cursorForPosition(QPoint(0, 0)).block()
+        if block.previous().isValid():
+            block = block.previous()
+        utterance_number = self._getAlignedCount(block)
 
         while block.isValid():
             is_aligned = False
@@ -1535,7 +1780,7 @@ class TextEditWidget(QTextEdit):
             bottom_of_block = rect.bottom() - offset_y
 
             # If the block is visible
-            if top_of_block <= self.viewport().height() and bottom_of_block >= 0:
+            if top_of_block <= viewport_height and bottom_of_block >= 0:
                 if block.isVisible():
                     if is_aligned:
                         # Paint the number
@@ -1551,7 +1796,7 @@ class TextEditWidget(QTextEdit):
                                         int(self.fontMetrics().height()),
                                         Qt.AlignmentFlag.AlignRight, '*')
 
-            if top_of_block > self.viewport().height():
+            if top_of_block > viewport_height:
                 break
 
             block = block.next()
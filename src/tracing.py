@@ -0,0 +1,220 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Performance trace recorder.
+
+Named spans are recorded around hot code paths, in a fixed size ring buffer,
+and can be saved in the Chrome trace event format, to be opened in
+https://ui.perfetto.dev or chrome://tracing.
+
+    python3 main.py --trace[=FILE]
+
+Recording is disabled by default, a disabled span costs a single attribute check.
+
+    from src.tracing import tracer, traced
+
+    with tracer.span("waveform build", "media"):
+        ...
+
+    @traced("draw", "waveform")
+    def draw(self):
+        ...
+"""
+
+
+from typing import Optional, Callable
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+
+
+log = logging.getLogger(__name__)
+
+
+DEFAULT_CAPACITY = 200_000
+DEFAULT_TRACE_FILE = "anaouder_trace.json"
+
+_NULL_SPAN = nullcontext()
+
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "category", "args", "start")
+
+    def __init__(self, recorder: "TraceRecorder", name: str, category: str, args: Optional[dict]):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        self.recorder._record(
+            'X', self.name, self.category, self.start, end - self.start, self.args
+        )
+        return False
+
+
+
+class TraceRecorder:
+    """Record timed events in a ring buffer, the oldest events are dropped first"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.enabled = False
+        self.output_path = Path(DEFAULT_TRACE_FILE)
+        self._events = deque(maxlen=capacity)
+        self._thread_names = {}
+        self._origin = time.perf_counter_ns()
+
+
+    @property
+    def capacity(self) -> int:
+        return self._events.maxlen
+
+
+    def enable(self, capacity: Optional[int] = None, output_path: Optional[Path] = None) -> None:
+        if output_path is not None:
+            self.output_path = Path(output_path)
+        if capacity is not None and capacity != self.capacity:
+            self._events = deque(self._events, maxlen=capacity)
+        self.enabled = True
+
+
+    def disable(self) -> None:
+        self.enabled = False
+
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._thread_names.clear()
+        self._origin = time.perf_counter_ns()
+
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+    def span(self, name: str, category: str = "app", args: Optional[dict] = None):
+        """Context manager timing the enclosed block"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+
+    def instant(self, name: str, category: str = "app", args: Optional[dict] = None) -> None:
+        """Mark a single point in time"""
+        if self.enabled:
+            self._record('i', name, category, time.perf_counter_ns(), 0, args)
+
+
+    def counter(self, name: str, **values: float) -> None:
+        """Record the value of one or more counters (e.g. a queue length)"""
+        if self.enabled:
+            self._record('C', name, "counter", time.perf_counter_ns(), 0, values)
+
+
+    def _record(
+            self,
+            phase: str,
+            name: str,
+            category: str,
+            start_ns: int,
+            duration_ns: int,
+            args: Optional[dict]
+        ) -> None:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        # Appending to a bounded deque is thread-safe
+        self._events.append((phase, name, category, start_ns, duration_ns, tid, args))
+
+
+    def getTraceEvents(self) -> list:
+        """Return the recorded events in the Chrome trace event format"""
+        pid = os.getpid()
+        origin = self._origin
+        # Small and stable thread ids are easier to read in the viewers
+        tids = {tid: i for i, tid in enumerate(self._thread_names)}
+
+        trace_events = [
+            {
+                "ph": 'M', "name": "thread_name", "pid": pid, "tid": tids[tid],
+                "args": {"name": thread_name},
+            }
+            for tid, thread_name in list(self._thread_names.items())
+        ]
+        for phase, name, category, start_ns, duration_ns, tid, args in list(self._events):
+            event = {
+                "ph": phase,
+                "name": name,
+                "cat": category,
+                "ts": (start_ns - origin) / 1000,
+                "pid": pid,
+                "tid": tids.get(tid, 0),
+            }
+            if phase == 'X':
+                event["dur"] = duration_ns / 1000
+            elif phase == 'i':
+                event["s"] = 't'
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return trace_events
+
+
+    def save(self, path: Optional[Path] = None) -> None:
+        """Write the recorded events to a JSON file"""
+        path = path or self.output_path
+        trace_events = self.getTraceEvents()
+        with open(path, 'w', encoding="utf-8") as _fout:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, _fout)
+        log.info(f"Saved {len(trace_events)} trace events to {path}")
+
+
+
+tracer = TraceRecorder()
+
+
+
+def traced(name: Optional[str] = None, category: str = "app") -> Callable:
+    """Decorator recording a span for every call of the function"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, span_name, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
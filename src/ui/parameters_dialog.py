@@ -56,7 +56,9 @@ from src.settings import (
     SUBTITLES_AUTO_EXTEND, SUBTITLES_AUTO_EXTEND_MAX_GAP,
     SUBTITLES_MARGIN_SIZE, SUBTITLES_CPS,
     SUBTITLES_DEFAULT_COLOR, SUBTITLES_BLOCK_DEFAULT_COLOR,
-    AUTOSAVE_DEFAULT_INTERVAL, AUTOSAVE_BACKUP_NUMBER
+    AUTOSAVE_DEFAULT_INTERVAL, AUTOSAVE_BACKUP_NUMBER,
+    EXPORT_AUDIO_SEGMENTS_MODE,
+    MEDIA_CACHE_DEFAULT_SIZE
 )
 from src.strings import app_strings
 from src.cache_system import cache
@@ -412,9 +414,28 @@ class GeneralPanel(QWidget):
 
         autosave_group.setLayout(autosave_layout)
 
+        # Audio segments export
+        export_group = QGroupBox(self.tr("Audio segments export"))
+        export_layout = QHBoxLayout()
+        export_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+        self.export_mode_selection = QComboBox()
+        self.export_mode_selection.addItem(self.tr("Copy audio stream"), "copy")
+        self.export_mode_selection.addItem(self.tr("Copy audio stream, single process"), "split")
+        self.export_mode_selection.addItem(self.tr("16kHz mono WAV, with text"), "pcm")
+        current_mode = app_settings.value("export/audio_segments_mode", EXPORT_AUDIO_SEGMENTS_MODE, type=str)
+        self.export_mode_selection.setCurrentIndex(
+            max(0, self.export_mode_selection.findData(current_mode))
+        )
+        self.export_mode_selection.currentIndexChanged.connect(self.updateExportMode)
+        export_layout.addWidget(self.export_mode_selection)
+
+        export_group.setLayout(export_layout)
+
         main_layout.addWidget(ui_lang_group)
         main_layout.addWidget(ui_subs_group)
         main_layout.addWidget(autosave_group)
+        main_layout.addWidget(export_group)
         main_layout.addStretch()
         self.setLayout(main_layout)
     
@@ -500,6 +521,10 @@ class GeneralPanel(QWidget):
         app_settings.setValue("autosave/backup_number", backup_num)
 
 
+    def updateExportMode(self, index):
+        app_settings.setValue("export/audio_segments_mode", self.export_mode_selection.itemData(index))
+
+
 
 class ModelsPanel(QWidget):
     def __init__(self, *args, **kwargs):
@@ -932,9 +957,10 @@ class CachePanel(QWidget):
         self.global_size_spinbox = QSpinBox()
         self.global_size_spinbox.setSuffix(' ' + app_strings.TR_UNIT_MEGA_OCTED)
         self.global_size_spinbox.setRange(0, 2000)
-        self.global_size_spinbox.setValue(int(app_settings.value("cache/media_cache_size", 500)))
+        self.global_size_spinbox.setValue(
+            int(app_settings.value("cache/media_cache_size", MEDIA_CACHE_DEFAULT_SIZE))
+        )
         self.global_size_spinbox.valueChanged.connect(self.changeCacheSize)
-        self.global_size_spinbox.setEnabled(False) # TODO
         
         global_size_layout.addWidget(self.global_size_spinbox)
         global_layout.addLayout(global_size_layout)
@@ -968,18 +994,19 @@ class CachePanel(QWidget):
 
 
     def update(self):
-        """Update values of cache sizes by calculating its footprint on the hard-drive"""
+        """Update values of cache sizes, from the running totals of the cache system"""
         
         if self.current_media_group.isEnabled():
             fingerprint = self.media_metadata["fingerprint"]
+            media_sizes = cache.get_media_cache_sizes(fingerprint)
             size_strings = []
-            size_current_waveform = self.media_metadata.get("waveform_size", 0)
+            size_current_waveform = media_sizes["waveform"]
             current_total_size = size_current_waveform
             size_strings.append(
                 f"{app_strings.TR_WAVEFORM} ({self.simplifySize(size_current_waveform)})"
             )
-            if cache._get_transcription_path(fingerprint).exists():
-                size_current_transcription = cache._get_transcription_path(fingerprint).stat().st_size
+            if media_sizes["transcription"]:
+                size_current_transcription = media_sizes["transcription"]
                 current_total_size += size_current_transcription
                 size_strings.append(
                     f"{app_strings.TR_TRANSCRIPTION} ({self.simplifySize(size_current_transcription)})"
@@ -988,8 +1015,8 @@ class CachePanel(QWidget):
             else:
                 self.current_transcription.setHidden(True)
             
-            if cache._get_scenes_path(fingerprint).exists():
-                size_current_scenes = cache._get_scenes_path(fingerprint).stat().st_size
+            if media_sizes["scenes"]:
+                size_current_scenes = media_sizes["scenes"]
                 current_total_size += size_current_scenes
                 size_strings.append(
                     f"{app_strings.TR_SCENES} ({self.simplifySize(size_current_scenes)})"
@@ -1002,15 +1029,16 @@ class CachePanel(QWidget):
             self.current_size_label.setToolTip('\n'.join([f"* {s}" for s in size_strings]))
 
         size_strings = []
-        size_all_waveforms = self.getSizeAllWaveforms()
-        size_all_transcriptions = self.getSizeAllTranscriptions()
-        size_all_scenes = self.getSizeAllScenes()
+        cache_sizes = cache.get_cache_sizes()
+        size_all_waveforms = cache_sizes["waveform"]
+        size_all_transcriptions = cache_sizes["transcription"]
+        size_all_scenes = cache_sizes["scenes"]
 
         total_cache_size = size_all_waveforms + size_all_transcriptions + size_all_scenes
-        if cache.media_cache_path.exists():
-            total_cache_size += cache.media_cache_path.stat().st_size
-        if cache.doc_cache_path.exists():
-            total_cache_size += cache.doc_cache_path.stat().st_size
+        for store in (cache.media_store, cache.doc_store):
+            for path in (store.snapshot_path, store.journal_path):
+                if path.exists():
+                    total_cache_size += path.stat().st_size
 
         size_strings = [
             f"{app_strings.TR_WAVEFORMS} ({self.simplifySize(size_all_waveforms)})",
@@ -1030,28 +1058,6 @@ class CachePanel(QWidget):
         size = round(size, 1)
         return f"{size} {units[unit_i]}"
 
-    def getSizeAllWaveforms(self) -> int:
-        total_size = 0
-        for file in cache.waveforms_dir.iterdir():
-            if file.suffix == '.npy':
-                total_size += file.stat().st_size
-        return total_size
-
-    def getSizeAllTranscriptions(self) -> int:
-        total_size = 0
-        for file in cache.transcriptions_dir.iterdir():
-            if file.suffix == '.tsv':
-                total_size += file.stat().st_size
-        return total_size
-    
-    def getSizeAllScenes(self) -> int:
-        total_size = 0
-        for file in cache.scenes_dir.iterdir():
-            if file.suffix == '.tsv':
-                total_size += file.stat().st_size
-        return total_size
-    
-
     def openCacheDirectory(self):
         file_url = QUrl.fromLocalFile(get_cache_directory())
         QDesktopServices.openUrl(file_url)
@@ -1060,7 +1066,6 @@ class CachePanel(QWidget):
     def changeCacheSize(self):
         cache_size = int(self.global_size_spinbox.value())
         app_settings.setValue("cache/media_cache_size", cache_size)
-        app_settings.value("cache/media_cache_size", 500)
     
 
     def clearCurrentCache(self):
@@ -1069,28 +1074,18 @@ class CachePanel(QWidget):
         fingerprint = self.media_metadata["fingerprint"]
 
         if self.current_waveform.isChecked():
-            waveform_path = cache._get_waveform_path(fingerprint)
-            waveform_path.unlink(missing_ok=True)
-            if fingerprint in cache.media_cache:
-                cache.media_cache[fingerprint].pop("waveform_size", None)
-                cache._media_cache_dirty = True
+            cache.remove_media_artifacts(fingerprint, ["waveform"])
             self.media_metadata.pop("waveform_size", None)
 
         if self.current_transcription.isChecked():
-            transcription_path = cache._get_transcription_path(fingerprint)
-            transcription_path.unlink(missing_ok=True)
-            if fingerprint in cache.media_cache:
-                cache.media_cache[fingerprint].pop("transcription_progress", None)
-                cache.media_cache[fingerprint].pop("transcription_completed", None)
-                cache._media_cache_dirty = True
+            cache.remove_media_artifacts(fingerprint, ["transcription"])
             self.media_metadata.pop("transcription", None)
             self.media_metadata.pop("transcription_progress", None)
             self.media_metadata.pop("transcription_completed", None)
             self.parent_dialog.signals.cache_transcription_cleared.emit()
         
         if self.current_scenes.isChecked():
-            transcription_path = cache._get_transcription_path(fingerprint)
-            transcription_path.unlink(missing_ok=True)
+            cache.remove_media_artifacts(fingerprint, ["scenes"])
             self.media_metadata.pop("scenes", None)
             self.parent_dialog.signals.cache_scenes_cleared.emit()
         
@@ -1100,8 +1095,7 @@ class CachePanel(QWidget):
             self.current_scenes.isChecked()
         ):
             # Remove media record from cache root
-            cache.media_cache.pop(fingerprint, None)
-            cache._media_cache_dirty = True
+            cache.remove_media_metadata(fingerprint)
 
         cache._save_root_cache_to_disk()
         self.update()
@@ -1111,29 +1105,17 @@ class CachePanel(QWidget):
         log.info("Clearing global media cache")
 
         if self.global_waveform.isChecked():
-            for file in cache.waveforms_dir.iterdir():
-                if file.suffix == '.npy':
-                    file.unlink()
-                fingerprint = file.stem
-                if fingerprint in cache.media_cache:
-                    cache.media_cache[fingerprint].pop("waveform_size", None)
-                    cache._media_cache_dirty = True
+            for fingerprint in cache.get_cached_fingerprints("waveform"):
+                cache.remove_media_artifacts(fingerprint, ["waveform"])
         
         if self.global_transcription.isChecked():
-            for file in cache.transcriptions_dir.iterdir():
-                if file.suffix == '.tsv':
-                    file.unlink()
-                fingerprint = file.stem
-                if fingerprint in cache.media_cache:
-                    cache.media_cache[fingerprint].pop("transcription_progress", None)
-                    cache.media_cache[fingerprint].pop("transcription_completed", None)
-                    cache._media_cache_dirty = True
+            for fingerprint in cache.get_cached_fingerprints("transcription"):
+                cache.remove_media_artifacts(fingerprint, ["transcription"])
             self.parent_dialog.signals.cache_transcription_cleared.emit()
         
         if self.global_scenes.isChecked():
-            for file in cache.scenes_dir.iterdir():
-                if file.suffix == '.tsv':
-                    file.unlink()
+            for fingerprint in cache.get_cached_fingerprints("scenes"):
+                cache.remove_media_artifacts(fingerprint, ["scenes"])
             self.parent_dialog.signals.cache_scenes_cleared.emit()
         
         if (
@@ -1142,9 +1124,7 @@ class CachePanel(QWidget):
             self.global_scenes.isChecked()
         ):
             # Remove media cache root
-            cache.media_cache.clear()
-            cache.media_cache_path.unlink()
-            cache._media_cache_dirty = False
+            cache.clear_media_metadata()
         else:
             cache._save_root_cache_to_disk()
         
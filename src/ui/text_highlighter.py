@@ -23,24 +23,35 @@ import logging
 
 from PySide6.QtCore import (
     Qt, QRegularExpression,
+    QTimer, QElapsedTimer,
 )
 from PySide6.QtGui import (
     QColor, QFont,
-    QTextCursor,
+    QTextCursor, QTextBlock,
     QTextBlockFormat, QTextCharFormat,
     QSyntaxHighlighter,
 )
 
 from src.interfaces import DocumentInterface, TextDocumentInterface
 from src.ui.theme import theme
-from src.utils import extract_sentence_regions
+from src.utils import (
+    extract_sentence_regions,
+    METADATA_REGEX, SPECIAL_TOKEN_REGEX
+)
 from src.settings import app_settings, SUBTITLES_CPS
+from src.tracing import traced
 
 
 
 log = logging.getLogger(__name__)
 
 
+WORD_REGEX = QRegularExpression(
+    r'\b([\w’\']+)\b',
+    QRegularExpression.PatternOption.UseUnicodePropertiesOption
+)
+
+
 
 class Highlighter(QSyntaxHighlighter):
 
@@ -49,6 +60,7 @@ class Highlighter(QSyntaxHighlighter):
         DENSITY = 1
 
     utt_block_margin = 8
+    lazy_slice_ms = 10  # Time spent rehighlighting on each idle step
 
     def __init__(self, parent, text_edit, document_controller):
         super().__init__(parent)
@@ -57,6 +69,7 @@ class Highlighter(QSyntaxHighlighter):
         self.mode = self.ColorMode.ALIGNMENT
         self.hunspell = None
         self.show_misspelling = False
+        self._target_density = app_settings.value("subtitles/cps", SUBTITLES_CPS, type=float)
 
         self.ali_metadata_format = QTextCharFormat()
         self.ali_metadata_format.setForeground(QColor(165, 0, 165)) # semi-dark magenta
@@ -73,6 +86,8 @@ class Highlighter(QSyntaxHighlighter):
         self.mispell_format.setUnderlineColor(QColor("red"))
         self.mispell_format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.SpellCheckUnderline)
 
+        self.default_block_format = QTextBlockFormat()
+
         self.aligned_block_format = QTextBlockFormat()
         self.aligned_block_format.setTopMargin(self.utt_block_margin)
         self.aligned_block_format.setBottomMargin(self.utt_block_margin)
@@ -97,21 +112,146 @@ class Highlighter(QSyntaxHighlighter):
         self.active_red_block_format.setTopMargin(self.utt_block_margin)
         self.active_red_block_format.setBottomMargin(self.utt_block_margin)
 
+        # Rehighlight the document in small slices, when idle
+        self._lazy_block_number = -1
+        self._lazy_block_formats_only = False
+        self._lazy_slice_size = 32    # Number of blocks, adapted to the time budget
+        self._lazy_timer = QTimer(self)
+        self._lazy_timer.setInterval(0)
+        self._lazy_timer.timeout.connect(self._rehighlightNextSlice)
+
+        # Set while a range is rehighlighted through a no-op content change
+        self._rehighlighting_range = False
+
 
     def setMode(self, mode: ColorMode):
         log.info(f"Set highlighter to {mode}")
         self.mode = mode
+        # Only the background colors depend on the mode
+        self.rehighlightLazily(block_formats_only=True)
+
+
+    def rehighlightLazily(self, block_formats_only=False) -> None:
+        """
+        Rehighlight the blocks in the viewport right away.
+        The rest of the document is rehighlighted in small slices, when idle.
+        A pending pass is restarted from the first block.
+
+        Args:
+            block_formats_only (bool): Update the block formats only,
+                leaving the character formats untouched.
+        """
+        if self._lazy_timer.isActive() and not self._lazy_block_formats_only:
+            # Don't downgrade a pending full rehighlight
+            block_formats_only = False
+        self._lazy_block_formats_only = block_formats_only
+
+        visible_blocks = list(self.text_edit.getVisibleBlocks())
+        if visible_blocks:
+            self._rehighlightSlice(visible_blocks[0], visible_blocks[-1])
+
+        self._lazy_block_number = 0
+        self._lazy_timer.start()
+
+
+    def cancelLazyRehighlight(self) -> None:
+        self._lazy_timer.stop()
+        self._lazy_block_number = -1
+
+
+    def rehighlightRange(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        """
+        Rehighlight a range of blocks, updating the document layout only once.
+
+        'rehighlightBlock' relayouts the rest of the document after every block,
+        whereas blocks highlighted in response to a content change are laid out together.
+        Merging an empty block format is a content change that modifies nothing.
+        Handlers of the document signals should ignore it (see 'isRehighlighting').
+        """
+        document = self.text_edit.document()
+        cursor = QTextCursor(first_block)
+        cursor.setPosition(
+            last_block.position() + last_block.length() - 1,
+            QTextCursor.MoveMode.KeepAnchor
+        )
+
+        was_blocked = document.blockSignals(False)
+        self._rehighlighting_range = True
+        try:
+            cursor.beginEditBlock()
+            self._setBlockFormats(first_block, last_block)
+            cursor.mergeBlockFormat(QTextBlockFormat())
+            cursor.endEditBlock()
+        finally:
+            self._rehighlighting_range = False
+            document.blockSignals(was_blocked)
+
+
+    def isRehighlighting(self) -> bool:
+        """True if the document signals come from 'rehighlightRange', not from an edit"""
+        return self._rehighlighting_range
+
+
+    def updateBlockFormats(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        """Update the block formats of a range of blocks, without rehighlighting their text"""
+        document = self.text_edit.document()
+        was_blocked = document.blockSignals(True)
+        cursor = QTextCursor(first_block)
+        cursor.beginEditBlock()
+        self._setBlockFormats(first_block, last_block)
+        cursor.endEditBlock()
+        document.blockSignals(was_blocked)
+
+
+    def _setBlockFormats(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        # Setting a block format is cheap within an edit block
+        block = first_block
+        for _ in range(last_block.blockNumber() - first_block.blockNumber() + 1):
+            block_format = self.getBlockFormat(block)
+            if block.blockFormat() != block_format:
+                QTextCursor(block).setBlockFormat(block_format)
+            block = block.next()
+
+
+    def _rehighlightSlice(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        if self._lazy_block_formats_only:
+            self.updateBlockFormats(first_block, last_block)
+        else:
+            self.rehighlightRange(first_block, last_block)
+
 
-        # Rehighlight the whole document
-        was_blocked = self.text_edit.document().blockSignals(True)
-        self.rehighlight()
-        self.text_edit.document().blockSignals(was_blocked)
+    def _rehighlightNextSlice(self) -> None:
+        document = self.text_edit.document()
+        first_block = document.findBlockByNumber(self._lazy_block_number)
+        if not first_block.isValid():
+            self.cancelLazyRehighlight()
+            return
+        last_number = min(self._lazy_block_number + self._lazy_slice_size, document.blockCount()) - 1
+        last_block = document.findBlockByNumber(last_number)
+
+        elapsed = QElapsedTimer()
+        elapsed.start()
+        self._rehighlightSlice(first_block, last_block)
+
+        # Adapt the number of blocks per slice to the time budget
+        if elapsed.elapsed() < self.lazy_slice_ms // 2:
+            self._lazy_slice_size *= 2
+        elif elapsed.elapsed() > self.lazy_slice_ms:
+            self._lazy_slice_size = max(self._lazy_slice_size // 2, 1)
+        
+        self._lazy_block_number = last_number + 1
 
 
     def getMode(self) -> ColorMode:
         return self.mode
 
 
+    def changeTargetDensity(self, cps: float) -> None:
+        self._target_density = cps
+        if self.mode == self.ColorMode.DENSITY:
+            self.rehighlightLazily(block_formats_only=True)
+
+
     def updateThemeColors(self):
         print("Hightligher updateTheme", theme.mode)
         self.green_block_format.setBackground(theme.colors.green)
@@ -131,49 +271,47 @@ class Highlighter(QSyntaxHighlighter):
         return False
 
 
-    def highlightAlignment(self, sentence_splits):
-        block = self.currentBlock()
+    def getBlockFormat(self, block: QTextBlock) -> QTextBlockFormat:
+        """Return the block format (background color and margins) of a block"""
+        if self.mode == self.ColorMode.DENSITY:
+            return self.getDensityBlockFormat(block)
+        return self.getAlignmentBlockFormat(block)
+
+
+    def getAlignmentBlockFormat(self, block: QTextBlock) -> QTextBlockFormat:
         block_id = self.document_controller.getBlockId(block)
-        cursor = QTextCursor(block)
 
-        if self.currentBlockUserData():
+        if block.userData():
             if self.text_edit.isAligned(block):
                 if self.text_edit.highlighted_sentence_id == block_id:
-                    cursor.setBlockFormat(self.active_green_block_format)
+                    return self.active_green_block_format
                 else:
-                    cursor.setBlockFormat(self.green_block_format)
-            else:
-                cursor.setBlockFormat(QTextBlockFormat())
-        else:
-            cursor.setBlockFormat(QTextBlockFormat())
+                    return self.green_block_format
+        return self.default_block_format
 
 
-    def highlightDensity(self):
-        block = self.currentBlock()
+    def getDensityBlockFormat(self, block: QTextBlock) -> QTextBlockFormat:
         block_id = self.document_controller.getBlockId(block)
-        cursor = QTextCursor(block)
 
-        if self.currentBlockUserData():
+        if block.userData():
             if self.text_edit.isAligned(block):
-                utt_id = block_id
-                density = self.document_controller.getUtteranceDensity(utt_id)
-                target_density: float = app_settings.value("subtitles/cps", SUBTITLES_CPS, type=float)
-                if density < target_density:
+                density = self.document_controller.getUtteranceDensity(block_id)
+                if density < self._target_density:
                     if self.text_edit.highlighted_sentence_id == block_id:
-                        cursor.setBlockFormat(self.active_green_block_format)
+                        return self.active_green_block_format
                     else:
-                        cursor.setBlockFormat(self.green_block_format)
+                        return self.green_block_format
                 else:
                     if self.text_edit.highlighted_sentence_id == block_id:
-                        cursor.setBlockFormat(self.active_red_block_format)
+                        return self.active_red_block_format
                     else:
-                        cursor.setBlockFormat(self.red_block_format)
+                        return self.red_block_format
             else:
-                cursor.setBlockFormat(self.aligned_block_format)
-        else:
-            cursor.setBlockFormat(QTextBlockFormat())
+                return self.aligned_block_format
+        return self.default_block_format
 
 
+    @traced("highlightBlock", "text")
     def highlightBlock(self, text):
         doc_was_blocked = self.text_edit.document().blockSignals(True)
         was_blocked = self.text_edit.blockSignals(True)
@@ -192,15 +330,13 @@ class Highlighter(QSyntaxHighlighter):
         #     return
 
         # Ali DSL Metadata  
-        expression = QRegularExpression(r"{\s*(.+?)\s*}")
-        matches = expression.globalMatch(text)
+        matches = METADATA_REGEX.globalMatch(text)
         while matches.hasNext():
             match = matches.next()
             self.setFormat(match.capturedStart(), match.capturedLength(), self.ali_metadata_format)
         
         # Special tokens
-        expression = QRegularExpression(r"<[a-zA-Z \'\/]+>")
-        matches = expression.globalMatch(text)
+        matches = SPECIAL_TOKEN_REGEX.globalMatch(text)
         while matches.hasNext():
             match = matches.next()
             self.setFormat(match.capturedStart(), match.capturedLength(), self.special_token_format)
@@ -208,10 +344,11 @@ class Highlighter(QSyntaxHighlighter):
         sentence_splits = extract_sentence_regions(text)
 
         # Background color
-        if self.mode == self.ColorMode.ALIGNMENT:
-            self.highlightAlignment(sentence_splits)
-        elif self.mode == self.ColorMode.DENSITY:
-            self.highlightDensity()
+        # Changing a block format relayouts the rest of the document, avoid it when possible
+        block = self.currentBlock()
+        block_format = self.getBlockFormat(block)
+        if block.blockFormat() != block_format:
+            QTextCursor(block).setBlockFormat(block_format)
         
 
         # Check misspelled words
@@ -220,8 +357,7 @@ class Highlighter(QSyntaxHighlighter):
             self.text_edit.blockSignals(was_blocked)
             return
         
-        expression = QRegularExpression(r'\b([\w’\']+)\b', QRegularExpression.PatternOption.UseUnicodePropertiesOption)
-        matches = expression.globalMatch(text)
+        matches = WORD_REGEX.globalMatch(text)
         while matches.hasNext():
             match = matches.next()
             if not self.isSubsentence(sentence_splits, match.capturedStart(), match.capturedStart()+match.capturedLength()):
@@ -236,5 +372,6 @@ class Highlighter(QSyntaxHighlighter):
 
     def setHunspellDictionary(self, hunspell) -> None:
         self.hunspell = hunspell
-        if self.show_misspelling:
-            self.rehighlight()
\ No newline at end of file
+        # Also clears the misspelled words when the dictionary is unset
+        if self.show_misspelling or hunspell is None:
+            self.rehighlightLazily()
\ No newline at end of file
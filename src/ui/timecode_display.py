@@ -84,7 +84,8 @@ class TimecodeWidget(QLineEdit):
         ff = int(remainder * self.fps)
 
         formatted_tc = f"{hh:02d}:{mm:02d}:{ss:02d}:{ff:02d}"
-        self.setText(formatted_tc)
+        if formatted_tc != self.text():
+            self.setText(formatted_tc)
     
 
     def updateThemeColors(self) -> None:
@@ -34,15 +34,16 @@ import zipfile
 from PySide6.QtCore import QRegularExpression
 from PySide6.QtGui import QColor
 
+from src.file_formats import MEDIA_FORMATS, ALL_COMPATIBLE_FORMATS, SUBTITLES_FILE_FORMATS
+
 
 EM_DASH = '–'
 LINE_BREAK = '\u2028'
 PUNCTUATION = '.?!,‚;:«»“”"()[]{}/\…–—-_~^•'
 STOP_CHARS = PUNCTUATION + ' \t\u2028'
 
-MEDIA_FORMATS = (".mp3", ".wav", ".m4a", ".ogg", ".mp4", ".mkv", ".webm", ".mov")
-ALL_COMPATIBLE_FORMATS = MEDIA_FORMATS + (".ali", ".seg", ".split", ".srt")
-SUBTITLES_FILE_FORMATS = (".srt",)
+METADATA_REGEX = QRegularExpression(r"{\s*(.+?)\s*}")
+SPECIAL_TOKEN_REGEX = QRegularExpression(r"<[a-zA-Z \'\/]+>")
 
 
 
@@ -141,8 +142,7 @@ def extract_sentence_regions(text: str) -> List[tuple]:
     sentence_splits = [(0, len(text))]  # Used so that spelling checker doesn't check metadata parts
 
     # Metadata  
-    expression = QRegularExpression(r"{\s*(.+?)\s*}")
-    matches = expression.globalMatch(text)
+    matches = METADATA_REGEX.globalMatch(text)
     while matches.hasNext():
         match = matches.next()
         sentence_splits = _cutSentence(
@@ -152,8 +152,7 @@ def extract_sentence_regions(text: str) -> List[tuple]:
         )
     
     # Special tokens
-    expression = QRegularExpression(r"<[a-zA-Z \'\/]+>")
-    matches = expression.globalMatch(text)
+    matches = SPECIAL_TOKEN_REGEX.globalMatch(text)
     while matches.hasNext():
         match = matches.next()
         sentence_splits = _cutSentence(
@@ -33,8 +33,6 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtMultimedia import QMediaPlayer
 
-from ostilhou.asr.dataset import MetadataParser
-
 
 from settings import app_settings
 
@@ -118,13 +116,9 @@ class VideoWidget(QGraphicsView):
         self.background_rect.setBrush(app_settings.value("subtitles/rect_color", QColor(0, 0, 0, 100)))
 
         self.current_caption = ""
-        self.current_caption_postproc = ""
         self.subtitle_margin = 6  # Margin from bottom of video
         self.max_subtitle_height_ratio = 0.2  # Max 20% of video height for subtitles
 
-        self.metadata_parser = MetadataParser()
-        self.metadata_parser.set_filter_out({"subtitles": False, "st": False})
-
         self.setAcceptDrops(False)
 
 
@@ -232,28 +226,22 @@ class VideoWidget(QGraphicsView):
 
 
     def setCaption(self, caption_text: str, position_sec: float):
-        """Set the caption text"""
-        if caption_text != self.current_caption:
-            self.current_caption = caption_text
-            if not caption_text:
-                self.background_rect.setVisible(False)
-                self.text_item.updateText("", position_sec)
-                return
-            data = self.metadata_parser.parse_sentence(caption_text)
-            if data is None:
-                self.background_rect.setVisible(False)
-                self.text_item.updateText("", position_sec)
-                return
-            regions = data[0]
-            text = ''.join([region["text"] for region in regions if "text" in region])
-            self.current_caption_postproc = text.strip()
-        
-        if caption_text:
-            self.text_item.updateText(self.current_caption_postproc, position_sec)
+        """
+        Set the caption text, already stripped of its metadata.
+        Nothing is done if the caption hasn't changed.
+        """
+        if caption_text == self.current_caption:
+            return
+        self.current_caption = caption_text
+        self.text_item.updateText(caption_text, position_sec)
+
+        if not caption_text:
+            self.background_rect.setVisible(False)
+            return
         
         # Show/hide background based on whether there's text
-        if self.background_rect_visible and caption_text:
-            self.background_rect.setVisible(bool(self.current_caption_postproc))
+        if self.background_rect_visible:
+            self.background_rect.setVisible(True)
         
         self.updateLayout()
 
@@ -0,0 +1,151 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+File format of the cached waveforms.
+
+    magic       b"\\x93AWF"
+    header_len  uint16, little-endian
+    header      JSON, padded with spaces so the samples are 64-bytes aligned
+    samples     raw little-endian array
+
+The header holds:
+    version     WAVEFORM_FILE_VERSION
+    samplerate  samples per second
+    dtype       "float16" or "int8"
+    scale       amplitude of a sample of value 1 (1.0 for float16)
+    length      number of samples
+
+Files written with another version or samplerate are ignored.
+Float16 samples are memory-mapped, so they are only read from disk
+when they are displayed. Int8 samples take half the space on disk,
+but they are converted to float16 in memory when the file is opened.
+"""
+
+
+from typing import BinaryIO
+from pathlib import Path
+import json
+
+import numpy as np
+
+
+
+MAGIC = b"\x93AWF"
+WAVEFORM_FILE_VERSION = 1
+ALIGNMENT = 64
+
+STORAGE_DTYPES = {
+    "float16": np.dtype("<f2"),
+    "int8": np.dtype("i1"),
+}
+
+
+
+class WaveformFileError(Exception):
+    """The file is not a waveform, or not a usable one"""
+    pass
+
+
+
+def write_waveform(
+        _f: BinaryIO,
+        samples: np.ndarray,
+        samplerate: int,
+        dtype: str = "float16"
+    ) -> None:
+    """
+    Write samples, with amplitudes between -1.0 and 1.0, to a binary file object
+    """
+    samples = np.asarray(samples)
+    if dtype == "int8":
+        samples = samples.astype(np.float32, copy=False)
+        peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+        scale = peak / 127 if peak > 0.0 else 1.0
+        data = np.round(samples / scale).astype(STORAGE_DTYPES[dtype])
+    elif dtype == "float16":
+        scale = 1.0
+        data = samples.astype(STORAGE_DTYPES[dtype], copy=False)
+    else:
+        raise ValueError(f"Unknown waveform dtype: {dtype}")
+
+    header = json.dumps({
+        "version": WAVEFORM_FILE_VERSION,
+        "samplerate": samplerate,
+        "dtype": dtype,
+        "scale": scale,
+        "length": len(data),
+    }).encode("utf-8")
+    prefix_len = len(MAGIC) + 2
+    padding = -(prefix_len + len(header) + 1) % ALIGNMENT
+    header += b' ' * padding + b'\n'
+
+    _f.write(MAGIC)
+    _f.write(len(header).to_bytes(2, "little"))
+    _f.write(header)
+    _f.write(np.ascontiguousarray(data).data)
+
+
+def read_waveform_header(_f: BinaryIO) -> dict:
+    """
+    Read the header of a waveform file, the file position is left at the samples
+
+    Raise:
+        WaveformFileError
+    """
+    if _f.read(len(MAGIC)) != MAGIC:
+        raise WaveformFileError("Not a waveform file")
+    header_len = int.from_bytes(_f.read(2), "little")
+    try:
+        header = json.loads(_f.read(header_len))
+    except ValueError:
+        raise WaveformFileError("Corrupted header")
+    if header.get("version") != WAVEFORM_FILE_VERSION:
+        raise WaveformFileError(f"Unsupported version: {header.get('version')}")
+    if header.get("dtype") not in STORAGE_DTYPES:
+        raise WaveformFileError(f"Unknown dtype: {header.get('dtype')}")
+    return header
+
+
+def open_waveform(path: Path, samplerate: int) -> np.ndarray:
+    """
+    Open a waveform file, memory-mapped when possible
+
+    Raise:
+        WaveformFileError
+        OSError
+    """
+    with path.open('rb') as _f:
+        header = read_waveform_header(_f)
+        offset = _f.tell()
+
+    if header["samplerate"] != samplerate:
+        raise WaveformFileError(f"Samplerate is {header['samplerate']}, {samplerate} was expected")
+
+    length = header["length"]
+    dtype = STORAGE_DTYPES[header["dtype"]]
+    if offset + length * dtype.itemsize > path.stat().st_size:
+        raise WaveformFileError("Truncated file")
+    if length == 0:
+        return np.zeros(0, dtype=np.float16)
+
+    samples = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(length,))
+    if header["dtype"] == "int8":
+        return samples.astype(np.float16) * np.float16(header["scale"])
+    # A plain array view keeps the mapping, with faster element access than a memmap
+    return samples.view(np.ndarray)
@@ -18,7 +18,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
 from typing import List, Tuple, Optional
-from math import ceil
+from math import ceil, exp
 from enum import Enum
 import numpy as np
 import logging
@@ -27,7 +27,7 @@ from PySide6.QtWidgets import (
     QMenu, QWidget
 )
 from PySide6.QtCore import (
-    Qt, QTimer,
+    Qt,
     QPointF, QPoint, QRect,
     Signal,
 )
@@ -45,6 +45,8 @@ from src.utils import lerpColor, mapNumber
 from src.commands import ResizeSegmentCommand
 from src.interfaces import Segment, SegmentId, DocumentInterface
 from src.strings import app_strings
+from src.tracing import traced
+from src.animation_controller import AnimationController
 
 
 ZOOM_Y = 3.5    # In pixels per second
@@ -52,6 +54,13 @@ ZOOM_MIN = 0.2  # In pixels per second
 ZOOM_MAX = 512  # In pixels per second
 SNAPPING_RADIUS = 4 # In pixels (not used !)
 
+# Animation time constants, in seconds
+ZOOM_TIME_CONSTANT = 0.15
+SCROLL_FRICTION = 0.12          # Inertia after dragging the waveform
+SCROLL_GOAL_DAMPING = 0.034
+SCROLL_GOAL_STIFFNESS = 360.0   # Acceleration towards the scroll goal (per second squared)
+SCROLL_MIN_VELOCITY = 0.03      # In seconds per second
+
 
 Handle = Enum("Handle", ["LEFT", "RIGHT", "MIDDLE"])
 SegmentSide = Enum("SegmentSide", ["LEFT", "RIGHT"])
@@ -235,10 +244,8 @@ class WaveformWidget(QWidget):
         # self.handle_right_pen_shadow = QPen(QColor(80, 255, 100, 50), 5)
         # self.handle_right_pen_shadow.setCapStyle(Qt.PenCapStyle.RoundCap)
         
-        # Animate the rendering loop
-        self.timer = QTimer()
-        self.timer.timeout.connect(self._update)
-        self.timer.start(1000 // 30)   # 30 FPS (canvas refresh rate)
+        # Rendering loop, running only while the waveform is animated
+        self.animation = AnimationController(self._animate, parent=self, name="waveform")
 
         # Actions and Keyboard shortcuts
         self.create_segment_action = QAction(self.tr("Add utterance"), self)
@@ -423,6 +430,8 @@ class WaveformWidget(QWidget):
         This method is called continuously from MainWindow.
         """
         log.debug(f"updatePlayHead({position_sec=}, {is_playing=})")
+        prev_playhead_x = round((self.playhead - self.t_left) * self.ppsec)
+        prev_left_x = round(self.t_left * self.ppsec)
         self.playhead = position_sec
 
         # if self.follow_playhead and is_playing:
@@ -437,7 +446,13 @@ class WaveformWidget(QWidget):
         #     ):
         #     # Slide waveform window
         #     self.t_left = t
-        self.must_redraw = True
+
+        # Redraw only when the playhead or the view moved by a pixel at least
+        if (
+            round((self.playhead - self.t_left) * self.ppsec) != prev_playhead_x
+            or round(self.t_left * self.ppsec) != prev_left_x
+        ):
+            self.must_redraw = True
     
 
     def removeSelection(self):
@@ -452,30 +467,91 @@ class WaveformWidget(QWidget):
         return self.t_left + self.width() / self.ppsec
     
 
-    def _update(self):
-        # Zooming        
+    # Setting any of these properties starts the rendering loop
+
+    @property
+    def must_redraw(self) -> bool:
+        return self._must_redraw
+
+    @must_redraw.setter
+    def must_redraw(self, value: bool) -> None:
+        self._must_redraw = value
+        if value:
+            self.animation.wake()
+
+
+    @property
+    def ppsec_goal(self) -> float:
+        return self._ppsec_goal
+
+    @ppsec_goal.setter
+    def ppsec_goal(self, value: float) -> None:
+        self._ppsec_goal = value
+        if value != self.ppsec:
+            self.animation.wake()
+
+
+    @property
+    def scroll_goal(self) -> float:
+        """Timecode to scroll the left border to, or -1"""
+        return self._scroll_goal
+
+    @scroll_goal.setter
+    def scroll_goal(self, value: float) -> None:
+        self._scroll_goal = value
+        if value >= 0.0:
+            self.animation.wake()
+
+
+    @property
+    def scroll_vel(self) -> float:
+        """Scrolling velocity, in seconds per second"""
+        return self._scroll_vel
+
+    @scroll_vel.setter
+    def scroll_vel(self, value: float) -> None:
+        self._scroll_vel = value
+        if value != 0.0:
+            self.animation.wake()
+
+
+    def _animate(self, dt: float) -> bool:
+        """
+        Advance the animations by `dt` seconds and redraw if needed.
+        Returns True while zooming or scrolling.
+        """
+        # Zooming
         if self.ppsec_goal != self.ppsec:
-            self.ppsec += (self.ppsec_goal - self.ppsec) * 0.2
+            self.ppsec += (self.ppsec_goal - self.ppsec) * (1.0 - exp(-dt / ZOOM_TIME_CONSTANT))
+            if abs(self.ppsec_goal - self.ppsec) < 0.1:
+                self.ppsec = self.ppsec_goal
             self.waveform.ppsec = self.ppsec
+            self.must_redraw = True
 
         if self.scroll_vel != 0.0 or self.scroll_goal >= 0.0:
-            self._updateScroll()
+            self._updateScroll(dt)
 
         if self.must_redraw:
             self.draw()
             self.must_redraw = False
+        
+        return (
+            self.ppsec_goal != self.ppsec
+            or self.scroll_vel != 0.0
+            or self.scroll_goal >= 0.0
+        )
 
 
-    def _updateScroll(self):
+    def _updateScroll(self, dt: float):
         if self.scroll_goal >= 0.0:
             # Scrolling
             dist = self.scroll_goal - self.t_left
-            self.scroll_vel += 0.4 * dist
-            self.scroll_vel *= 0.5
-        
-        self.scroll_vel *= 0.75
+            self.scroll_vel += SCROLL_GOAL_STIFFNESS * dist * dt
+            self.scroll_vel *= exp(-dt / SCROLL_GOAL_DAMPING)
+        else:
+            self.scroll_vel *= exp(-dt / SCROLL_FRICTION)
 
-        self.t_left += self.scroll_vel
+        self.t_left += self.scroll_vel * dt
         # Check for outside of wavefom positions
         if self.getTimeRight() >= self.audio_len:
             self.t_left = self.audio_len - self.width() / self.ppsec
@@ -485,7 +561,7 @@ class WaveformWidget(QWidget):
             self.scroll_vel = 0.0
         
         # Stop updating if we're centered
-        if abs(self.scroll_vel) < 0.001 and abs(self.ppsec_goal - self.ppsec) < 0.1:
+        if abs(self.scroll_vel) < SCROLL_MIN_VELOCITY and abs(self.ppsec_goal - self.ppsec) < 0.1:
             self.scroll_goal = -1
             self.scroll_vel = 0.0
             self.ppsec = self.ppsec_goal
@@ -570,9 +646,8 @@ class WaveformWidget(QWidget):
             return None
 
         t = self.t_left + position.x() / self.ppsec
-        for id, (start, end) in self.document_controller.segments.items():
-            if start <= t <= end:
-                return (id, SegmentSide.LEFT if (t-start) < (end-t) else SegmentSide.RIGHT)
+        for id, (start, end) in self.document_controller.segments.getItemsInRange(t, t):
+            return (id, SegmentSide.LEFT if (t-start) < (end-t) else SegmentSide.RIGHT)
         return None
 
 
@@ -1014,7 +1089,7 @@ class WaveformWidget(QWidget):
             # Stop movement if drag direction is opposite
             if -1 * mouse_dpos * self.scroll_vel < 0.0:
                 self.scroll_vel = 0.0
-            self.scroll_vel += -0.16 * mouse_dpos / self.ppsec
+            self.scroll_vel += -4.8 * mouse_dpos / self.ppsec
             self.scroll_goal = -1 # Deactivate auto scroll
             
             if self.follow_playhead:
@@ -1236,13 +1311,9 @@ class WaveformWidget(QWidget):
 
     def _drawSegments(self, t_right: float):
         # Draw inactive segments
-        for id, (start, end) in self.document_controller.segments.items():
+        for id, (start, end) in self.document_controller.segments.getItemsInRange(self.t_left, t_right):
             if id in self.active_segments:
                 continue
-            if end <= self.t_left:
-                continue
-            if start >= t_right:
-                continue
             if (end - start) * self.ppsec < 1:
                 continue
             
@@ -1482,6 +1553,7 @@ class WaveformWidget(QWidget):
             self.painter.drawText(t_x-8 * len(t_string) // 2, 12, t_string)
 
 
+    @traced("draw", "waveform")
     def draw(self):
         if not self.pixmap:
             return
@@ -0,0 +1,222 @@
+"""
+Anaouder - Automatic transcription and subtitling for the Breton language
+Copyright (C) 2025-2026 Gweltaz Duval-Guennoc (gwel@ik.me)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+----
+
+Write-behind queue for cache files.
+
+Writes are handed to a dedicated I/O thread so the caller never blocks on disk.
+Pending writes to the same file are coalesced: only the latest data is written.
+Files are written to a temporary file first, then renamed over the target,
+so a crash can never leave a half-written file behind.
+
+Items can also be appended to an existing file, without rewriting it.
+Pending appends to the same file are written together.
+"""
+
+
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+import os
+import logging
+import threading
+
+
+log = logging.getLogger(__name__)
+
+
+type Serializer = Callable[[BinaryIO, Any], None]
+
+
+
+@dataclass
+class _WriteJob:
+    data: Any
+    serialize: Serializer
+    on_done: Optional[Callable[[Path], None]] = None
+    appended: List[Any] = field(default_factory=list)   # Items written after `data`
+    append_only: bool = False   # Only `appended` is written, at the end of the file
+
+
+
+class WriteBehindQueue:
+
+    def __init__(self, name: str = "cache-writer") -> None:
+        self._pending: Dict[Path, _WriteJob] = dict()
+        self._in_flight: Dict[Path, _WriteJob] = dict()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+
+    def submit(
+            self,
+            path: Path,
+            data: Any,
+            serialize: Serializer,
+            on_done: Optional[Callable[[Path], None]] = None
+        ) -> None:
+        """
+        Schedule a write of `data` to `path`.
+        A write already pending for the same path is replaced.
+
+        Args:
+            path (Path): Target file
+            data: Object to write, must not be mutated afterwards
+            serialize: Function writing `data` to a binary file object
+            on_done: Called from the I/O thread once the file is in place
+        """
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Write-behind queue is stopped")
+            self._pending[path] = _WriteJob(data, serialize, on_done)
+            self._cond.notify_all()
+
+
+    def append(
+            self,
+            path: Path,
+            items: Iterable[Any],
+            serialize: Serializer,
+            on_done: Optional[Callable[[Path], None]] = None
+        ) -> None:
+        """
+        Schedule the writing of `items` at the end of `path`.
+        If a write is pending for the same path, the items are added to it.
+        Items are dropped if the file doesn't exist when they are written.
+
+        Args:
+            path (Path): Target file
+            items: Items to append, copied
+            serialize: Function writing a list of items to a binary file object
+            on_done: Called from the I/O thread once the items are written
+        """
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Write-behind queue is stopped")
+            job = self._pending.get(path)
+            if job is None:
+                job = _WriteJob(None, serialize, on_done, append_only=True)
+                self._pending[path] = job
+            job.appended.extend(items)
+            self._cond.notify_all()
+
+
+    def get_pending(self, path: Path) -> Optional[Any]:
+        """
+        Return the data not yet written to this path, if any.
+        Data with appended items is returned as a tuple.
+        Pending appends alone are not returned, as the file holds the rest.
+        """
+        with self._cond:
+            job = self._pending.get(path)
+            appended = []
+            if job is None or job.append_only:
+                # Items appended to a file still being written
+                appended = job.appended if job else []
+                job = self._in_flight.get(path)
+            if job is None or job.append_only:
+                return None
+            if job.appended or appended:
+                return (*job.data, *job.appended, *appended)
+            return job.data
+
+
+    def is_pending(self, path: Path) -> bool:
+        with self._cond:
+            return path in self._pending or path in self._in_flight
+
+
+    def cancel(self, path: Path) -> None:
+        """
+        Drop a pending write to this path.
+        A write already in progress will still complete.
+        """
+        with self._cond:
+            self._pending.pop(path, None)
+
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all pending writes are done.
+
+        Returns:
+            False if the timeout expired before
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._in_flight,
+                timeout
+            )
+
+
+    def shutdown(self) -> None:
+        """Write all pending data and stop the I/O thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending:
+                    # Stopped and nothing left to write
+                    return
+                path = next(iter(self._pending))
+                job = self._pending.pop(path)
+                self._in_flight[path] = job
+
+            try:
+                self._write(path, job)
+            except Exception as e:
+                log.error(f"Couldn't write {path} ({e})")
+            else:
+                if job.on_done is not None:
+                    try:
+                        job.on_done(path)
+                    except Exception as e:
+                        log.error(f"Error after writing {path} ({e})")
+            finally:
+                with self._cond:
+                    del self._in_flight[path]
+                    self._cond.notify_all()
+
+
+    def _write(self, path: Path, job: _WriteJob) -> None:
+        if job.append_only:
+            # Fails if the file was removed in the meantime
+            with path.open('r+b') as _f:
+                _f.seek(0, os.SEEK_END)
+                job.serialize(_f, job.appended)
+            return
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with tmp_path.open('wb') as _f:
+                job.serialize(_f, job.data)
+                if job.appended:
+                    job.serialize(_f, job.appended)
+            os.replace(tmp_path, path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
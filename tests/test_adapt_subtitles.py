@@ -10,7 +10,7 @@ from src.ui.icons import loadIcons
 from src.lang import lang
 from src.services.adapt_subtitles import (
     convert_apostrophes, convert_quotation_marks,
-    remove_fillers,
+    remove_fillers, apply_subtitle_rules,
 )
 from src.strings import app_strings
 
@@ -114,4 +114,30 @@ def test_remove_fillers(main_window):
     # Make sure the apostrophe conversion didn't supress the formatting elements
     block_html, _ = main_window.text_widget.getBlockHtml(third_block)
     print(block_html)
-    assert block_html == "<I>... mont a ra ?</I>"
\ No newline at end of file
+    assert block_html == "<I>... mont a ra ?</I>"
+
+def test_apply_subtitle_rules(main_window):
+    load_document(main_window)
+    document_controller = main_window.document_controller
+    document = main_window.text_widget.document()
+    old_segments = { seg_id: seg[:] for seg_id, seg in document_controller.segments.items() }
+    fps = 25.0
+
+    apply_subtitle_rules(
+        document_controller,
+        document.firstBlock(), document.lastBlock(),
+        main_window.undo_stack,
+        fps
+    )
+
+    sorted_segments = document_controller.getSortedSegments()
+    for seg_id, (start, end) in sorted_segments:
+        assert start * fps == pytest.approx(round(start * fps))
+        assert end * fps == pytest.approx(round(end * fps))
+    for (_, (_, prev_end)), (_, (next_start, _)) in zip(sorted_segments, sorted_segments[1:]):
+        assert prev_end < next_start
+    assert document_controller.getSegment(0) == pytest.approx([0.44, 2.24])
+
+    # All changes are undone at once
+    main_window.undo_stack.undo()
+    assert document_controller.segments == old_segments
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from src import ali_codec
+
+
+test_dir = Path(__file__).parent
+
+
+def test_decode_line():
+    assert ali_codec.decode_line("Demat d'an holl\n") == ("Demat d'an holl", None, None)
+    assert ali_codec.decode_line("Eil linenn. {start: 16.05; end: 21.6}") == \
+        ("Eil linenn.", [16.05, 21.6], None)
+    assert ali_codec.decode_line("{media-path: Meli.wav}") == \
+        ("{media-path: Meli.wav}", None, "Meli.wav")
+
+
+def test_read_ali():
+    data, media_path = ali_codec.read_ali(test_dir / "MeliMilaMalou.ali")
+    assert media_path is None
+    assert data[0] == ("{metadata: yes}", None)
+    assert data[4] == ("brozhioù kotoñs gant roudennoù<BR>gwer ha gwenn hañv", [31.95, 35.4])
+
+
+def test_write_ali_roundtrip(tmp_path):
+    blocks_data = [
+        ("{media-path: old.wav} # comment", None),
+        ("Linenn kentañ", [0.45, 2.25]),
+        ("", None),
+        ("Eil linenn.", [16.05, 21.6]),
+    ]
+    file_path = tmp_path / "test.ali"
+    with file_path.open('w', encoding="utf-8") as _fout:
+        ali_codec.write_ali(_fout, blocks_data, "new.wav")
+
+    data, media_path = ali_codec.read_ali(file_path)
+    assert media_path == "new.wav"
+    assert data == [
+        ("{media-path: new.wav}", None),
+        ("# comment", None),
+        ("Linenn kentañ", [0.45, 2.25]),
+        ("", None),
+        ("Eil linenn.", [16.05, 21.6]),
+    ]
@@ -0,0 +1,61 @@
+from src.animation_controller import AnimationController, IDLE_TIMEOUT, MAX_FRAME_DT
+
+
+class FakeTime:
+    def __init__(self):
+        self.t = 10.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_frame_loop_stops_when_idle():
+    now = FakeTime()
+    steps = []
+    remaining = [3]
+
+    def step(dt):
+        steps.append(dt)
+        remaining[0] -= 1
+        return remaining[0] > 0
+
+    animation = AnimationController(step, time_source=now)
+    assert not animation.isRunning()
+    animation.wake()
+    assert animation.isRunning()
+
+    for _ in range(3):
+        now.t += 0.02
+        animation.onFrame()
+    assert animation.isRunning()
+    assert all(abs(dt - 0.02) < 1e-9 for dt in steps)
+
+    # Idle frames keep the loop running for a while
+    now.t += IDLE_TIMEOUT / 2
+    animation.onFrame()
+    assert animation.isRunning()
+    now.t += IDLE_TIMEOUT
+    animation.onFrame()
+    assert not animation.isRunning()
+
+    # Time steps are bounded
+    assert steps[-1] == MAX_FRAME_DT
+
+
+def test_frame_stats():
+    now = FakeTime()
+    animation = AnimationController(lambda dt: True, time_source=now)
+    stats = animation.getFrameStats()
+    assert stats.frames == 0 and stats.fps == 0.0
+
+    animation.wake()
+    for interval in (0.01, 0.02, 0.03):
+        now.t += interval
+        animation.onFrame()
+    animation.stop()
+    stats = animation.getFrameStats()
+    assert stats.frames == 3
+    assert abs(stats.mean_interval_ms - 20.0) < 1e-6
+    assert abs(stats.max_interval_ms - 30.0) < 1e-6
+    assert abs(stats.fps - 50.0) < 1e-6
+    assert stats.max_step_ms == 0.0
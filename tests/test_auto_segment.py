@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from PySide6.QtCore import QCoreApplication
+
+from src.auto_segment import (
+    auto_segment, frame_levels, find_regions,
+    AutoSegmentWorker, SEGMENTS_MAXIMUM_LENGTH,
+)
+
+
+SAMPLERATE = 1500
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QCoreApplication.instance()
+    if app is None:
+        app = QCoreApplication([])
+    yield app
+
+
+def make_speech(bursts, duration: float) -> np.ndarray:
+    """Noise bursts over a quiet background"""
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-0.001, 0.001, int(duration * SAMPLERATE))
+    for start, end in bursts:
+        i, j = int(start * SAMPLERATE), int(end * SAMPLERATE)
+        samples[i:j] += rng.uniform(-0.5, 0.5, j - i)
+    return samples.astype(np.float16)
+
+
+
+def test_frame_levels():
+    samples = np.ones(100, dtype=np.float16)
+    samples[50:] = 0.0
+    levels = frame_levels(samples, 30, 15)
+    assert len(levels) == (100 - 30) // 15 + 1
+    assert levels[0] == pytest.approx(1.0)
+    assert levels[-1] == 0.0
+
+
+def test_find_regions():
+    levels = np.array([0, 1, 1, 0, 1, 0, 0, 0, 0, 1, 1, 1, 0, 1], dtype=np.float32)
+    regions = find_regions(levels, 0.5, min_silence_frames=2, min_segment_frames=2)
+    assert regions.tolist() == [[1, 5], [9, 14]]
+
+
+def test_auto_segment():
+    bursts = [(1.0, 3.0), (5.0, 6.5), (6.6, 7.0), (10.0, 40.0)]
+    samples = make_speech(bursts, 45.0)
+    segments = auto_segment(samples, 0, len(samples), SAMPLERATE)
+
+    assert segments[0] == pytest.approx((1.0, 3.0), abs=0.03)
+    # Short pauses don't split segments
+    assert segments[1] == pytest.approx((5.0, 7.0), abs=0.03)
+    # Long segments are split
+    assert all(end - start <= SEGMENTS_MAXIMUM_LENGTH for start, end in segments)
+    assert segments[2][0] == pytest.approx(10.0, abs=0.03)
+    assert segments[-1][1] == pytest.approx(40.0, abs=0.03)
+
+    # Segments are relative to the beginning of the audio
+    offset = 4 * SAMPLERATE
+    assert auto_segment(samples, offset, len(samples), SAMPLERATE)[0] == pytest.approx(segments[1])
+
+
+def test_worker_same_as_single_pass(qapp):
+    bursts = [(t, t + 2.0 + (t % 7)) for t in range(5, 590, 13)]
+    samples = make_speech(bursts, 600.0)
+    start_frame, end_frame = 1000, len(samples) - 1000
+
+    worker = AutoSegmentWorker(samples, start_frame, end_frame, SAMPLERATE, max_workers=4)
+    batches = []
+    progress = []
+    finished = []
+    worker.segments_found.connect(batches.append)
+    worker.progress.connect(progress.append)
+    worker.finished.connect(finished.append)
+    worker.run()
+
+    assert finished == [True]
+    assert len(batches) > 1
+    assert progress[-1] == 1.0
+    found = [segment for batch in batches for segment in batch]
+    assert found == auto_segment(samples, start_frame, end_frame, SAMPLERATE)
+
+
+def test_worker_stop(qapp):
+    samples = make_speech([(1.0, 100.0)], 200.0)
+    worker = AutoSegmentWorker(samples, 0, len(samples), SAMPLERATE)
+    batches = []
+    finished = []
+    worker.segments_found.connect(batches.append)
+    worker.finished.connect(finished.append)
+    worker.stop()
+    worker.run()
+
+    assert finished == [False]
+    assert batches == []
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+from src import batch
+from src.batch import FileReport, find_media_files, find_text_file, read_sentences
+from src.settings import WAVEFORM_SAMPLERATE
+
+
+test_dir = Path(__file__).parent
+
+
+def test_find_media_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.wav", "b.mp3", "notes.txt", "sub/c.ogg"):
+        (tmp_path / name).touch()
+
+    assert [p.name for p in find_media_files([tmp_path])] == ["a.wav", "b.mp3"]
+    assert [p.name for p in find_media_files([tmp_path], recursive=True)] == ["a.wav", "b.mp3", "c.ogg"]
+    # No duplicates
+    assert len(find_media_files([tmp_path, tmp_path / "a.wav"])) == 2
+
+
+def test_read_sentences(tmp_path):
+    media_path = tmp_path / "a.wav"
+    media_path.touch()
+    assert find_text_file(media_path) is None
+
+    text_path = tmp_path / "a.txt"
+    text_path.write_text("# Comment\n{media-path: a.wav}\nKentañ  linenn\n\nEil linenn\n", encoding="utf-8")
+    assert find_text_file(media_path) == text_path
+    assert read_sentences(text_path) == ["Kentañ linenn", "Eil linenn"]
+
+
+def test_file_report():
+    report = FileReport("a.wav", duration=10.0, timings={"waveform": 0.5, "transcription": 1.5})
+    assert report.total_time == 2.0
+    assert report.rtf == 0.2
+    assert FileReport("b.wav").rtf == 0.0
+
+
+class FakeRecognizer(QObject):
+    new_segment_transcribed = Signal(str, list)
+    end_of_file = Signal()
+    message = Signal(str)
+
+    def transcribe_file(self, media_path: str, start_time: float, is_hidden=False) -> None:
+        # Errors are caught by the recognizer and sent as messages
+        self.message.emit("Transcribing whole file...")
+        self.message.emit("Error during transcription: ffmpeg not found")
+
+
+def test_process_media_transcription_error(tmp_path, monkeypatch):
+    from src.cache_system import cache
+
+    monkeypatch.setattr(batch, "_recognizer", FakeRecognizer())
+    monkeypatch.setattr(cache, "get_waveform", lambda media_path: np.zeros(WAVEFORM_SAMPLERATE, np.float16))
+
+    report = batch.process_media(test_dir / "MeliMilaMalou.wav", ["srt"], tmp_path, align=False)
+    assert report.error == "Error during transcription: ffmpeg not found"
+    assert report.outputs == []
+    assert list(tmp_path.iterdir()) == []
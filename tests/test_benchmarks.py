@@ -0,0 +1,36 @@
+from benchmarks.harness import Benchmark, compare, time_callable
+
+
+def _results(times: dict) -> dict:
+    return {"results": {name: {"min": t} for name, t in times.items()}}
+
+
+def test_compare():
+    baseline = _results({"a/fast": 1.0, "a/slow": 1.0, "b/x": 2.0, "removed": 1.0})
+    current = _results({"a/fast": 1.1, "a/slow": 1.5, "b/x": 2.9, "added": 1.0})
+
+    comparisons = {
+        c.name: c for c in compare(current, baseline, {"b/x": 0.5}, default_threshold=0.2)
+    }
+    assert set(comparisons) == {"a/fast", "a/slow", "b/x"}
+    assert not comparisons["a/fast"].is_regression
+    assert comparisons["a/slow"].is_regression
+    assert comparisons["a/slow"].ratio == 1.5
+    assert not comparisons["b/x"].is_regression
+
+
+def test_parametrized_thresholds():
+    assert Benchmark("a/x", None, 10).full_name == "a/x[10]"
+
+    baseline = _results({"a/x[10]": 1.0, "a/x[20]": 1.0})
+    current = _results({"a/x[10]": 1.3, "a/x[20]": 1.3})
+
+    # A threshold without parameter applies to every parameter
+    comparisons = compare(current, baseline, {"a/x": 0.5, "a/x[20]": 0.1})
+    assert [c.is_regression for c in comparisons] == [False, True]
+
+
+def test_time_callable():
+    result = time_callable(lambda: sum(range(100)), repeat=3, min_time=0.001)
+    assert result.repeat == 3
+    assert 0 < result.min <= result.median
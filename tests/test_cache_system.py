@@ -1,4 +1,8 @@
+import threading
 from pathlib import Path
+
+import numpy as np
+
 from src.cache_system import cache
 
 
@@ -52,4 +56,54 @@ def test_cache_transcription():
 
 def test_cache_waveform():
     media_path = test_dir / "MeliMilaMalou.wav"
-    waveform = cache.get_waveform(media_path)
\ No newline at end of file
+    waveform = cache.get_waveform(media_path)
+
+def test_media_metadata_threads():
+    media_path = test_dir / "MeliMilaMalou.wav"
+    errors = []
+
+    def update(field: str) -> None:
+        try:
+            for i in range(200):
+                cache.update_media_metadata(media_path, {field: i})
+                cache.get_media_metadata(media_path)
+        except Exception as e:
+            errors.append(e)
+
+    # Metadata is updated from the cache writer thread too
+    threads = [threading.Thread(target=update, args=(f"test_field_{i}",)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache.flush()
+
+    assert errors == []
+    metadata = cache.get_media_metadata(media_path)
+    assert metadata["test_field_0"] == metadata["test_field_1"] == 199
+
+    # A copy is returned
+    metadata["test_field_0"] = -1
+    assert cache.get_media_metadata(media_path)["test_field_0"] == 199
+
+
+def test_remove_active_waveform():
+    media_path = test_dir / "MeliMilaMalou.wav"
+    fingerprint = cache.get_media_metadata(media_path)["fingerprint"]
+    waveform_path = cache._get_waveform_path(fingerprint)
+
+    cache.set_waveform(media_path, np.linspace(-1.0, 1.0, 1000, dtype=np.float32))
+    assert cache.get_waveform(media_path).dtype == np.float16
+    cache.flush()
+    waveform = cache.get_waveform(media_path)
+    assert waveform.dtype == np.float16
+
+    # The waveform of the opened media is still mapped
+    cache.set_active_media(media_path)
+    cache.remove_media_artifacts(fingerprint, ["waveform"])
+    assert cache.get_waveform(media_path) is None
+    assert cache.get_media_cache_sizes(fingerprint)["waveform"] == 0
+
+    del waveform
+    cache.set_active_media(None)
+    assert not waveform_path.exists()
@@ -22,7 +22,8 @@ from src.commands import (
     DeleteTextCommand, DeleteUtterancesCommand, DeleteSegmentsCommand,
     JoinUtterancesCommand,
     InsertBlockCommand,
-    ReplaceTextCommand
+    ReplaceTextCommand,
+    CreateUtterancesBatchCommand, AlignBlocksBatchCommand,
 )
 from src.ui.icons import loadIcons
 from src.strings import app_strings
@@ -157,6 +158,48 @@ def test_create_new_utterance(main_window):
     )
 
 
+def test_create_utterances_batch(main_window):
+    load_document(main_window)
+    undo_redo_command(
+        main_window,
+        CreateUtterancesBatchCommand(
+            main_window.media_controller,
+            main_window.document_controller,
+            main_window.text_widget,
+            main_window.waveform,
+            [[0.1, 0.3], [10, 12], [13, 14], [50, 52]]
+        ),
+        random_cursor=True
+    )
+
+    document_controller = main_window.document_controller
+    starts = [
+        document_controller.getSegment(document_controller.getBlockId(block))[0]
+        for block in document_controller.getAllBlocks()
+    ]
+    assert starts == sorted(starts)
+    assert len(starts) == 9
+
+
+def test_align_blocks_batch(main_window):
+    load_document(main_window)
+    blocks = [
+        main_window.text_widget.appendSentence(text, None)
+        for text in ("C'hwec'hvet linenn", "Seizhvet linenn")
+    ]
+    undo_redo_command(
+        main_window,
+        AlignBlocksBatchCommand(
+            main_window.document_controller,
+            main_window.text_widget,
+            blocks,
+            [[42, 44], [45, 47]]
+        ),
+    )
+    for block in blocks:
+        assert main_window.text_widget.isAligned(block)
+
+
 def test_delete_utterances(main_window):
     load_document(main_window)
     undo_redo_command(
@@ -0,0 +1,49 @@
+from src.density import DensityIndex
+
+
+def test_density_index():
+    densities = DensityIndex()
+    densities.initial_capacity = 2
+    densities.clear()
+
+    for segment_id in range(5):
+        densities.setSegment(segment_id, [segment_id, segment_id + 2.0])
+        densities.setNumChars(segment_id, 10 * (segment_id + 1))
+    assert len(densities) == 5
+    assert densities.getDensity(0) == 5.0
+    assert densities.getDensity(4) == 25.0
+
+    # Resizing a segment keeps its number of characters
+    densities.setSegment(4, [4.0, 9.0])
+    assert densities.getDensity(4) == 10.0
+
+    densities.invalidateNumChars(1)
+    assert densities.getDensity(1) is None
+    assert densities.getInvalidSegmentIds() == [1]
+
+    densities.remove(2)
+    assert 2 not in densities
+    assert densities.getDensity(2) is None
+    densities.setSegment(7, [0.0, 1.0])
+    densities.setNumChars(7, 30)
+    assert densities.getDensity(7) == 30.0
+
+
+def test_density_statistics():
+    densities = DensityIndex()
+    for segment_id, (num_chars, duration) in enumerate([
+            (10, 2.0), (40, 2.0), (18, 1.0), (60, 2.0), (5, 0.0)
+        ]):
+        densities.setSegment(segment_id, [0.0, duration])
+        densities.setNumChars(segment_id, num_chars)
+
+    stats = densities.getStatistics(target_density=16.0, num_bins=4, num_worst=2)
+    # Null durations are ignored
+    assert stats.num_utterances == 4
+    assert stats.over_target == 3
+    assert stats.max_density == 30.0
+    assert stats.worst == [(3, 30.0), (1, 20.0)]
+    assert stats.bin_edges == [0.0, 8.0, 16.0, 24.0, 32.0]
+    assert stats.histogram == [1, 0, 2, 1]
+
+    assert densities.getStatistics(16.0).worst[-1] == (0, 5.0)
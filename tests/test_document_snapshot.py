@@ -0,0 +1,117 @@
+from pathlib import Path
+import pytest
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QTextDocument, QTextCursor
+
+from src.main import MainWindow
+from src.file_manager import FileManager
+from src.document_snapshot import BlockRecords
+from src.ui.icons import loadIcons
+from src.strings import app_strings
+
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    loadIcons()
+    app_strings.initialize()
+    yield app
+    app.quit()
+
+
+@pytest.fixture
+def main_window(qapp):
+    window = MainWindow()
+    data = FileManager().read_ali_file(Path("tests/MeliMilaMalou.ali"))
+    window.document_controller.loadDocumentData(data["document"])
+    yield window
+    window.undo_stack.clear()
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
+
+
+def record_all(main_window):
+    """Records of all blocks, computed from scratch"""
+    records = BlockRecords(lambda block: main_window.text_widget.getBlockHtml(block)[0])
+    return records.getRecords(main_window.text_widget.document())
+
+
+
+def test_invalidate(qapp):
+    document = QTextDocument()
+    document.setPlainText("a\nb\nc\nd")
+    records = BlockRecords(lambda block: block.text())
+    first = records.getRecords(document)
+
+    # Replace "b" with two blocks
+    cursor = QTextCursor(document.findBlockByNumber(1))
+    cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
+    cursor.insertText("\nx\ny")
+    records.invalidate(1, 2, document.blockCount())
+    second = records.getRecords(document)
+
+    assert [record.text for record in second] == ["a", "x", "y", "c", "d"]
+    assert second[0] is first[0]
+    assert second[3:] == first[2:]
+    assert second[3] is first[2]
+
+    # Remove "x" and "y"
+    cursor = QTextCursor(document.findBlockByNumber(1))
+    cursor.setPosition(document.findBlockByNumber(2).position() + 1, QTextCursor.MoveMode.KeepAnchor)
+    cursor.removeSelectedText()
+    records.invalidate(1, 1, document.blockCount())
+    assert [record.text for record in records.getRecords(document)] == ["a", "", "c", "d"]
+
+
+def test_invalidate_out_of_range(qapp):
+    document = QTextDocument()
+    document.setPlainText("a\nb")
+    records = BlockRecords(lambda block: block.text())
+    records.getRecords(document)
+    document.setPlainText("a\nb\nc")
+    records.invalidate(3, 5, document.blockCount())
+    assert [record.text for record in records.getRecords(document)] == ["a", "b", "c"]
+
+
+def test_snapshot_after_edits(main_window):
+    controller = main_window.document_controller
+    first = controller.getSnapshot()
+    assert first.blocks == record_all(main_window)
+
+    segment_ids = list(controller.segments)
+    controller.deleteUtterances(segment_ids[2:4])
+    controller.deleteUtterances(segment_ids[:1])
+    second = controller.getSnapshot()
+    assert second.blocks == record_all(main_window)
+    assert second.blocks[-1] is first.blocks[-1]
+
+    for _ in range(main_window.undo_stack.index()):
+        main_window.undo_stack.undo()
+    restored = controller.getSnapshot()
+    assert restored.blocks == record_all(main_window)
+    assert dict(restored.segments.items()) == dict(first.segments.items())
+
+    cursor = QTextCursor(main_window.text_widget.document().findBlockByNumber(1))
+    cursor.insertText("ha ")
+    third = controller.getSnapshot()
+    assert third.blocks == record_all(main_window)
+    assert third.blocks[1].text.startswith("ha ")
+    # The other blocks are shared with the previous snapshot
+    assert all(
+        third.blocks[i] is restored.blocks[i]
+        for i in range(len(third.blocks)) if i != 1
+    )
+
+
+def test_snapshot_is_immutable(main_window):
+    controller = main_window.document_controller
+    snapshot = controller.getSnapshot()
+    blocks_data = snapshot.getBlocksData()
+
+    controller.deleteUtterances(list(controller.segments)[:3])
+    assert snapshot.getBlocksData() == blocks_data
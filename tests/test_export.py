@@ -1,4 +1,9 @@
 import pytest
+import io
+import re
+import wave
+from xml.dom import minidom
+import numpy as np
 
 from PySide6.QtWidgets import QWidget
 
@@ -6,9 +11,18 @@ from exports.textual_exporter import (
     ExportDialog,
     export,
     clean_subtitle_text,
+    clean_text,
     format_txt,
     format_srt,
-    format_eaf
+    format_eaf,
+    write_export,
+    save_export
+)
+from exports.segment_exporter import (
+    build_extract_command,
+    plan_segment_cuts,
+    write_wav_segment,
+    write_segment_text
 )
 
 
@@ -66,6 +80,17 @@ def test_format_txt(sample_utterances):
     assert lines[2] == "Bold text" # format_txt strips HTML tags in your logic
 
 
+def test_clean_text():
+    assert clean_text("<b>Bold</b> text") == "Bold text"
+    assert clean_text("*Euh* demat <C'HOARZH>") == "Euh demat"
+    assert clean_text("Kentañ linenn\u2028eil linenn") == "Kentañ linenn\neil linenn"
+
+
+def test_write_segment_text(tmp_path):
+    write_segment_text("<i>Kentañ</i>  linenn\u2028*eil* linenn <C'HOARZH>", tmp_path / "001.wav")
+    assert (tmp_path / "001.txt").read_text(encoding="utf-8") == "Kentañ linenn eil linenn\n"
+
+
 def test_format_eaf(sample_utterances):
     # NOTE: There is a logic bug in the provided source code for format_eaf.
     # In the loop: `segment.append(segment)` calls append on a tuple.
@@ -83,4 +108,83 @@ def test_format_eaf(sample_utterances):
     assert "TIME_SLOT_ID=\"ts1\"" in result
     assert "Hello world" in result
     # Check millisecond conversion (1.5s -> 1500)
-    assert 'TIME_VALUE="1500"' in result 
\ No newline at end of file
+    assert 'TIME_VALUE="1500"' in result 
+
+
+def test_build_extract_command(tmp_path):
+    cmd = build_extract_command(tmp_path / "in.wav", (1.5, 4.0), tmp_path / "out.wav")
+    # Input seeking: -ss must come before -i
+    assert cmd.index('-ss') < cmd.index('-i')
+    assert cmd[cmd.index('-ss') + 1] == "1.500"
+    assert cmd[cmd.index('-t') + 1] == "2.500"
+    assert cmd[-1] == str(tmp_path / "out.wav")
+
+
+def test_plan_segment_cuts():
+    # Unsorted segments, with a gap before the first one and between the last two
+    segments = [(5.0, 7.0), (1.0, 3.0), (3.0, 4.5)]
+    cut_times, kept_pieces = plan_segment_cuts(segments)
+    assert cut_times == [1.0, 3.0, 4.5, 5.0, 7.0]
+    # Piece 0 is the leading gap, piece 3 the gap between 4.5 and 5.0
+    assert kept_pieces == {1: 1, 2: 2, 4: 0}
+
+    # Segment starting at 0, no leading gap
+    cut_times, kept_pieces = plan_segment_cuts([(0.0, 2.0)])
+    assert cut_times == [2.0]
+    assert kept_pieces == {0: 0}
+
+    # Overlapping segments can't be split in a single pass
+    assert plan_segment_cuts([(0.0, 2.0), (1.0, 3.0)]) is None
+
+
+def test_write_wav_segment(tmp_path):
+    sample_rate = 16000
+    pcm = np.arange(3 * sample_rate, dtype='<i2')
+
+    write_wav_segment(pcm, (1.0, 1.5), tmp_path / "out.wav", sample_rate)
+    with wave.open(str(tmp_path / "out.wav"), 'rb') as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getframerate() == sample_rate
+        frames = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2')
+    assert np.array_equal(frames, pcm[sample_rate : sample_rate + sample_rate // 2])
+
+    # Segment going past the end of the media
+    write_wav_segment(pcm, (2.5, 4.0), tmp_path / "end.wav", sample_rate)
+    with wave.open(str(tmp_path / "end.wav"), 'rb') as wav_file:
+        assert wav_file.getnframes() == sample_rate // 2
+
+
+def test_write_export(sample_utterances, tmp_path):
+    f = io.StringIO()
+    write_export(f, iter(sample_utterances), "eaf", str(tmp_path / "audio.wav"))
+    # Streamed output is the same as the whole formatted document
+    without_date = lambda xml: re.sub(r'DATE="[^"]*"', '', xml)
+    assert without_date(f.getvalue()) == \
+        without_date(format_eaf(sample_utterances, str(tmp_path / "audio.wav")))
+
+    doc = minidom.parseString(f.getvalue())
+    values = [
+        node.firstChild.data for node in doc.getElementsByTagName("ANNOTATION_VALUE")
+    ]
+    assert values == [text for text, _ in sample_utterances]
+    
+    with pytest.raises(ValueError):
+        write_export(f, sample_utterances, "doc")
+
+
+def test_save_export(sample_utterances, tmp_path):
+    file_path = tmp_path / "export.eaf"
+    file_path.write_text("previous")
+
+    def failing_utterances():
+        yield sample_utterances[0]
+        raise ValueError("Document changed")
+
+    # The previous file is left untouched
+    with pytest.raises(ValueError):
+        save_export(str(file_path), failing_utterances(), "txt")
+    assert file_path.read_text() == "previous"
+    assert list(tmp_path.iterdir()) == [file_path]
+
+    save_export(str(file_path), sample_utterances, "eaf", str(tmp_path / "audio.wav"))
+    assert file_path.read_text().startswith('<?xml')
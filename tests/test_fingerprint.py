@@ -0,0 +1,52 @@
+import os
+from pathlib import Path
+
+from src.fingerprint import FingerprintIndex, compute_fingerprint
+
+
+test_dir = Path(__file__).parent
+
+
+def test_fingerprint_memoized(tmp_path):
+    media_path = test_dir / "MeliMilaMalou.wav"
+    index = FingerprintIndex(tmp_path / "fingerprints.jsonl")
+
+    assert index.lookup(media_path) is None
+    fingerprint = index.get(media_path)
+    assert fingerprint == compute_fingerprint(media_path)
+    assert index.lookup(media_path) == fingerprint
+
+    # The index is persisted on disk
+    index = FingerprintIndex(tmp_path / "fingerprints.jsonl")
+    assert index.lookup(media_path) == fingerprint
+
+
+def test_fingerprint_file_replaced(tmp_path):
+    file_path = tmp_path / "audio.wav"
+    file_path.write_bytes(b"a" * 10000)
+    index = FingerprintIndex(tmp_path / "fingerprints.jsonl")
+    first = index.get(file_path)
+
+    file_path.write_bytes(b"b" * 20000)
+    assert index.lookup(file_path) is None
+    assert index.get(file_path) != first
+
+
+def test_fingerprint_small_file(tmp_path):
+    file_path = tmp_path / "tiny.wav"
+    file_path.write_bytes(b"tiny")
+    assert compute_fingerprint(file_path)
+
+
+def test_fingerprint_directory(tmp_path):
+    for i in range(4):
+        (tmp_path / f"audio_{i}.wav").write_bytes(os.urandom(9000))
+    (tmp_path / "notes.txt").write_text("not a media file")
+
+    index = FingerprintIndex(tmp_path / "fingerprints.jsonl")
+    results = index.get_directory(tmp_path)
+
+    assert len(results) == 4
+    assert len(set(results.values())) == 4
+    for path, fingerprint in results.items():
+        assert index.lookup(path) == fingerprint
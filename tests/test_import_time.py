@@ -0,0 +1,22 @@
+from src.import_time import parse_importtime, package_totals
+
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        500 |     numpy.core
+import time:       200 |        700 |   numpy
+import time:        50 |        870 | src.main
+"""
+
+
+def test_parse_importtime():
+    records = parse_importtime(IMPORTTIME_OUTPUT)
+    assert [r.module for r in records] == ["_io", "numpy.core", "numpy", "src.main"]
+    assert [r.depth for r in records] == [1, 2, 1, 0]
+    assert records[1].self_us == 300
+    assert records[1].cumulative_us == 500
+
+    totals = package_totals(records)
+    assert list(totals) == ["numpy", "_io", "src"]
+    assert totals["numpy"] == 500
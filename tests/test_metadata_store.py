@@ -0,0 +1,75 @@
+from src.metadata_store import JournaledStore
+
+
+def test_journaled_store_reload(tmp_path):
+    snapshot_path = tmp_path / "media_cache.jsonl"
+    store = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    store.load()
+
+    store.put("aaa", {"fingerprint": "aaa", "duration": 1.0})
+    store.put("bbb", {"fingerprint": "bbb", "duration": 2.0})
+    store["aaa"]["duration"] = 3.0
+    store.put("aaa")
+    store.delete("bbb")
+
+    assert not snapshot_path.exists()
+    assert store.journal_path.exists()
+
+    reloaded = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    reloaded.load()
+    assert reloaded.entries == {"aaa": {"fingerprint": "aaa", "duration": 3.0}}
+
+
+def test_journaled_store_compaction(tmp_path):
+    snapshot_path = tmp_path / "doc_cache.jsonl"
+    store = JournaledStore(snapshot_path, key_field="file_path", sort_field="last_access")
+    store.load()
+
+    n = JournaledStore.COMPACT_MIN_RECORDS + 10
+    for i in range(n):
+        store.put("/doc.ali", {"cursor_pos": i, "last_access": i})
+
+    # The journal was folded into the snapshot
+    assert snapshot_path.exists()
+    with store.journal_path.open() as _f:
+        assert len(_f.readlines()) < n
+
+    reloaded = JournaledStore(snapshot_path, key_field="file_path")
+    reloaded.load()
+    assert reloaded.entries == {"/doc.ali": {"cursor_pos": n - 1, "last_access": n - 1}}
+
+
+def test_journaled_store_torn_write(tmp_path):
+    snapshot_path = tmp_path / "media_cache.jsonl"
+    store = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    store.load()
+    store.put("aaa", {"fingerprint": "aaa"})
+
+    with store.journal_path.open('a') as _f:
+        _f.write('{"set": "bbb", "entr')
+
+    reloaded = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    reloaded.load()
+    assert list(reloaded.entries) == ["aaa"]
+
+
+def test_journaled_store_read_only(tmp_path):
+    snapshot_path = tmp_path / "media_cache.jsonl"
+    store = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    store.load()
+    store.put("aaa", {"fingerprint": "aaa", "duration": 1.0})
+
+    # A read-only store keeps its changes in memory
+    reader = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    reader.load()
+    reader.read_only = True
+    for i in range(JournaledStore.COMPACT_MIN_RECORDS + 10):
+        reader.put("bbb", {"fingerprint": "bbb", "duration": float(i)})
+    reader.delete("aaa")
+    reader.compact()
+    assert list(reader.entries) == ["bbb"]
+
+    assert not snapshot_path.exists()
+    reloaded = JournaledStore(snapshot_path, key_field="fingerprint", keep_key=True)
+    reloaded.load()
+    assert reloaded.entries == {"aaa": {"fingerprint": "aaa", "duration": 1.0}}
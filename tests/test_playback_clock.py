@@ -0,0 +1,83 @@
+from src.services.playback_clock import PlaybackClock, MAX_EXTRAPOLATION
+
+
+class FakeTime:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def make_clock():
+    now = FakeTime()
+    clock = PlaybackClock(time_source=now)
+    emitted = []
+    clock.position_changed.connect(emitted.append)
+    return clock, now, emitted
+
+
+def test_paused_positions_are_emitted():
+    clock, now, emitted = make_clock()
+    clock.setPosition(1.0)
+    clock.setPosition(1.0)
+    clock.setPosition(2.5)
+    assert emitted == [1.0, 2.5]
+
+
+def test_playback_is_coalesced_and_interpolated():
+    clock, now, emitted = make_clock()
+    clock.setPosition(10.0)
+    clock.start()
+    # Many position reports between two frames
+    for i in range(5):
+        now.t += 0.004
+        clock.setPosition(10.0 + (i + 1) * 0.004)
+    assert emitted == [10.0]
+
+    now.t += 0.01
+    clock.onFrame()
+    assert len(emitted) == 2
+    assert abs(emitted[-1] - 10.03) < 1e-9
+
+    # No new report, the position is extrapolated, within a limit
+    now.t += 10.0
+    clock.onFrame()
+    assert abs(emitted[-1] - (10.02 + MAX_EXTRAPOLATION)) < 1e-9
+    clock.onFrame()
+    assert len(emitted) == 3
+
+    clock.stop()
+    assert emitted[-1] == 10.02
+    clock.stop()
+    assert len(emitted) == 4
+
+
+def test_playhead_never_steps_back():
+    clock, now, emitted = make_clock()
+    clock.start()
+    now.t += 0.1
+    clock.onFrame()
+    assert abs(emitted[-1] - 0.1) < 1e-9
+    # The player reports a position a little behind the interpolated one
+    clock.setPosition(0.07)
+    clock.onFrame()
+    assert len(emitted) == 1
+    now.t += 0.05
+    clock.onFrame()
+    assert abs(emitted[-1] - 0.12) < 1e-9
+
+    # Looping back to the start of a segment
+    clock.seek(0.05)
+    clock.onFrame()
+    assert emitted[-1] == 0.05
+
+
+def test_playback_rate():
+    clock, now, emitted = make_clock()
+    clock.start(rate=2.0)
+    now.t += 0.05
+    clock.setRate(0.5)
+    now.t += 0.1
+    clock.onFrame()
+    assert abs(emitted[-1] - 0.15) < 1e-9
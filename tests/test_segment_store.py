@@ -0,0 +1,88 @@
+from copy import deepcopy
+import random
+
+import numpy as np
+import pytest
+
+from src.segment_store import SegmentStore
+
+
+def test_dict_api():
+    store = SegmentStore()
+    reference = dict()
+    rng = random.Random(0)
+    for i in range(1000):
+        segment_id = rng.randrange(300)
+        if segment_id in reference and rng.random() < 0.4:
+            del store[segment_id]
+            del reference[segment_id]
+        else:
+            start = round(rng.uniform(0.0, 100.0), 3)
+            segment = [start, start + round(rng.uniform(0.1, 5.0), 3)]
+            store[segment_id] = segment
+            reference[segment_id] = segment
+    
+    assert len(store) == len(reference)
+    assert store == reference
+    assert list(store) == sorted(reference)
+    assert store.items() == sorted(reference.items())
+    assert all(segment_id in store for segment_id in reference)
+    assert -1 not in store and None not in store
+    assert store.get(-1) is None
+    assert store.getSortedItems() == sorted(reference.items(), key=lambda x: x[1])
+
+    # Segments are returned as copies
+    segment_id = next(iter(store))
+    segment = store[segment_id]
+    segment[0] = -1.0
+    assert store[segment_id] != segment
+
+
+def test_numpy_ids():
+    store = SegmentStore({0: [0.0, 1.0], 1: [1.5, 2.0]})
+    assert np.int64(1) in store
+    assert store[np.int64(1)] == [1.5, 2.0]
+
+    # Same key as the Python integer
+    store[np.int64(1)] = [1.5, 2.5]
+    assert len(store) == 2
+    assert list(store) == [0, 1]
+    assert store[1] == [1.5, 2.5]
+
+    del store[np.int32(0)]
+    assert list(store) == [1]
+
+    assert "1" not in store and 1.0 not in store
+    with pytest.raises(TypeError):
+        store[1.0] = [0.0, 1.0]
+
+
+def test_snapshot():
+    store = SegmentStore({0: [0.0, 1.0], 1: [1.5, 2.0]})
+    snapshot = deepcopy(store)
+    store[0] = [0.0, 1.2]
+    del store[1]
+    store[2] = [3.0, 4.0]
+    assert snapshot == {0: [0.0, 1.0], 1: [1.5, 2.0]}
+    assert store == {0: [0.0, 1.2], 2: [3.0, 4.0]}
+
+
+def test_queries():
+    store = SegmentStore({
+        0: [0.0, 2.0],
+        1: [1.0, 1.5],  # Inside segment 0
+        2: [1.8, 3.0],  # Overlaps segment 0
+        3: [5.0, 6.0],
+        4: [6.0, 6.5],
+        5: [10.0, 12.0],
+    })
+    assert [segment_id for segment_id, _ in store.getItemsInRange(2.5, 5.0)] == [2, 3]
+    assert store.getItemsInRange(7.0, 9.0) == []
+    assert store.getOverlaps() == [(0, 1), (0, 2)]
+    assert store.getGaps() == [[3.0, 5.0], [6.5, 10.0]]
+    assert store.getGaps(min_duration=2.5) == [[6.5, 10.0]]
+
+    segment_ids, durations = store.getDurations()
+    assert dict(zip(segment_ids.tolist(), durations.tolist())) == {
+        0: 2.0, 1: 0.5, 2: 1.2, 3: 1.0, 4: 0.5, 5: 2.0
+    }
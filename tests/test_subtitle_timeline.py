@@ -0,0 +1,60 @@
+import random
+
+from src.subtitle_timeline import SubtitleTimeline
+
+
+def _first_segment_at(sorted_segments, t):
+    """Reference implementation, as in DocumentController.getSegmentsAtTime"""
+    for segment_id, (start, end) in sorted_segments:
+        if start - 0.001 <= t < end:
+            return segment_id
+    return -1
+
+
+def test_segment_lookup():
+    rng = random.Random(0)
+    segments = {}
+    t = 0.0
+    for segment_id in range(200):
+        start = t + rng.choice([-0.5, 0.0, 0.0, 0.3, 1.0]) # Some segments overlap
+        end = start + rng.uniform(0.2, 3.0)
+        segments[segment_id] = [round(max(start, 0.0), 3), round(end, 3)]
+        t = end
+    sorted_segments = sorted(segments.items(), key=lambda x: x[1])
+
+    timeline = SubtitleTimeline()
+    assert timeline.getSegmentAt(1.0) == -1
+    assert timeline.isOutdated(sorted_segments)
+    timeline.build(sorted_segments)
+    assert not timeline.isOutdated(sorted_segments)
+
+    positions = [rng.uniform(-1.0, t + 1.0) for _ in range(2000)]
+    positions += [s for _, segment in sorted_segments for s in segment]
+    for position in positions:
+        assert timeline.getSegmentAt(position) == _first_segment_at(sorted_segments, position)
+
+
+def test_caption_cache():
+    timeline = SubtitleTimeline()
+    timeline.build([(0, [0.0, 1.0]), (1, [1.0, 2.0])])
+    calls = []
+
+    def get_html(segment_id):
+        calls.append(segment_id)
+        return f"Linenn {segment_id}"
+
+    caption = timeline.getCaption(0, get_html)
+    assert timeline.getCaption(0, get_html) is caption
+    assert timeline.getCaption(-1, get_html) == ""
+    assert calls == [0]
+
+    timeline.invalidateCaption(0)
+    timeline.getCaption(0, get_html)
+    timeline.getCaption(1, get_html)
+    assert calls == [0, 0, 1]
+
+    # Captions of removed segments are forgotten
+    timeline.build([(1, [1.0, 2.0])])
+    timeline.getCaption(1, get_html)
+    assert calls == [0, 0, 1]
+    assert 0 not in timeline._captions
@@ -10,6 +10,7 @@ from PySide6.QtGui import QTextCursor
 from src.main import MainWindow
 from ui.icons import loadIcons
 from src.text_widget import TextEditWidget
+from src.ui.text_highlighter import Highlighter
 from src.strings import app_strings
 
 
@@ -92,4 +93,132 @@ def random_copy_paste(main_window, i=1):
 def test_copy_paste(main_window):
     load_document(main_window)
 
-    random_copy_paste(main_window, 10)
\ No newline at end of file
+    random_copy_paste(main_window, 10)
+
+def test_load_document_data(main_window):
+    document_controller = main_window.document_controller
+    data = [
+        ("{media-path: test.wav}", None),
+        ("<I>Ar c'hentañ linenn</I>", [0.45, 2.25]),
+        ("# Evezhiadenn", None),
+        ("Eil linenn <C'HOARZH>", [18.0, 20.0]),
+        ("Trede  linenn & all", [25.0, 30.0]),
+    ]
+    document_controller.loadDocumentData(data)
+
+    document = main_window.text_widget.document()
+    assert document.blockCount() == len(data)
+    assert document.findBlockByNumber(3).text() == "Eil linenn <C'HOARZH>"
+    assert document.findBlockByNumber(4).text() == "Trede linenn & all"
+    assert document_controller.getSortedSegments() == [
+        (0, [0.45, 2.25]), (1, [18.0, 20.0]), (2, [25.0, 30.0])
+    ]
+
+    for segment_id, block_number in [(0, 1), (1, 3), (2, 4)]:
+        block = document_controller.getBlockById(segment_id)
+        assert block.blockNumber() == block_number
+    
+    # Block numbers are shifted, the index must be rebuilt
+    cursor = QTextCursor(document.firstBlock())
+    cursor.insertBlock()
+    assert document_controller.getBlockById(1).blockNumber() == 4
+    assert document_controller.getBlockById(3) is None
+
+
+def test_line_numbers(main_window):
+    load_document(main_window)
+    text_widget = main_window.text_widget
+    document_controller = main_window.document_controller
+
+    def check_aligned_counts():
+        count = 0
+        for block in document_controller.getAllBlocks():
+            assert text_widget._getAlignedCount(block) == count
+            if text_widget.isAligned(block):
+                count += 1
+    
+    check_aligned_counts()
+
+    # Unalign the second utterance
+    document_controller.removeSegment(1)
+    check_aligned_counts()
+
+    # Add blocks with the document signals blocked
+    text_widget.document().blockSignals(True)
+    QTextCursor(text_widget.document().firstBlock()).insertBlock()
+    text_widget.document().blockSignals(False)
+    check_aligned_counts()
+
+    text_widget.deleteSentence(3)
+    check_aligned_counts()
+
+
+def test_highlighter_mode(main_window):
+    load_document(main_window)
+    highlighter = main_window.text_widget.highlighter
+
+    def finish_rehighlight():
+        while highlighter._lazy_timer.isActive():
+            highlighter._rehighlightNextSlice()
+
+    # Switching again before the end cancels the previous pass
+    highlighter.setMode(Highlighter.ColorMode.DENSITY)
+    highlighter.setMode(Highlighter.ColorMode.ALIGNMENT)
+    highlighter.setMode(Highlighter.ColorMode.DENSITY)
+    finish_rehighlight()
+
+    for block in main_window.document_controller.getAllBlocks():
+        assert block.blockFormat() == highlighter.getDensityBlockFormat(block)
+        assert block.blockFormat().background() in (
+            highlighter.green_block_format.background(),
+            highlighter.red_block_format.background(),
+        )
+    
+    highlighter.setMode(Highlighter.ColorMode.ALIGNMENT)
+    finish_rehighlight()
+    for block in main_window.document_controller.getAllBlocks():
+        assert block.blockFormat() == highlighter.getAlignmentBlockFormat(block)
+
+
+def test_lazy_rehighlight_is_not_an_edit(main_window, monkeypatch):
+    load_document(main_window)
+    text_widget = main_window.text_widget
+    highlighter = text_widget.highlighter
+    document_controller = main_window.document_controller
+
+    calls = []
+    monkeypatch.setattr(document_controller, "invalidateUtterances",
+                        lambda *args: calls.append("invalidateUtterances"))
+    monkeypatch.setattr(document_controller, "updateUtteranceDensity",
+                        lambda *args: calls.append("updateUtteranceDensity"))
+    
+    # Put the cursor in an aligned utterance
+    text_widget.setTextCursor(QTextCursor(document_controller.getBlockById(0)))
+    calls.clear()
+
+    highlighter.rehighlightLazily()
+    while highlighter._lazy_timer.isActive():
+        highlighter._rehighlightNextSlice()
+    
+    assert not highlighter.isRehighlighting()
+    assert calls == []
+
+    # A real edit is still handled
+    QTextCursor(document_controller.getBlockById(0)).insertText("a")
+    assert "invalidateUtterances" in calls
+
+
+def test_density_status(main_window):
+    load_document(main_window)
+    main_window._target_density = 10.0
+
+    main_window.updateDensityStatus()
+    text = main_window.status_density_label.text()
+    assert "2/5" in text    # First and last utterances
+    assert "14.0" in text
+
+    # Refreshed after an edit
+    main_window._density_status_timer.stop()
+    cursor = QTextCursor(main_window.document_controller.getBlockById(1))
+    cursor.insertText("a")
+    assert main_window._density_status_timer.isActive()
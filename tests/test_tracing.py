@@ -0,0 +1,74 @@
+import json
+import threading
+
+from src.tracing import TraceRecorder, tracer, traced
+
+
+def test_span_recording():
+    recorder = TraceRecorder(capacity=3)
+    with recorder.span("disabled"):
+        pass
+    assert len(recorder) == 0
+
+    recorder.enable()
+    with recorder.span("draw", "waveform", args={"width": 800}):
+        pass
+    recorder.instant("marker")
+    recorder.counter("queue", length=4)
+
+    events = [e for e in recorder.getTraceEvents() if e["ph"] != 'M']
+    assert [e["ph"] for e in events] == ['X', 'i', 'C']
+    assert events[0]["name"] == "draw"
+    assert events[0]["cat"] == "waveform"
+    assert events[0]["dur"] >= 0
+    assert events[0]["args"] == {"width": 800}
+    assert events[2]["args"] == {"length": 4}
+
+    # Oldest events are dropped first
+    for i in range(5):
+        with recorder.span(f"span {i}"):
+            pass
+    assert len(recorder) == 3
+    assert [e["name"] for e in recorder.getTraceEvents() if e["ph"] == 'X'] == ["span 2", "span 3", "span 4"]
+
+
+def test_trace_threads_and_save(tmp_path):
+    recorder = TraceRecorder()
+    recorder.enable()
+
+    def work():
+        with recorder.span("work"):
+            pass
+
+    worker = threading.Thread(target=work, name="worker")
+    worker.start()
+    worker.join()
+    work()
+
+    path = tmp_path / "trace.json"
+    recorder.save(path)
+    data = json.loads(path.read_text())
+    thread_names = {e["args"]["name"] for e in data["traceEvents"] if e["ph"] == 'M'}
+    assert "worker" in thread_names
+    spans = [e for e in data["traceEvents"] if e["ph"] == 'X']
+    assert len(spans) == 2
+    assert spans[0]["tid"] != spans[1]["tid"]
+
+
+def test_traced_decorator():
+    @traced("double")
+    def double(x):
+        return 2 * x
+
+    assert tracer.enabled is False
+    n = len(tracer)
+    assert double(2) == 4
+    assert len(tracer) == n
+
+    tracer.enable()
+    try:
+        assert double(3) == 6
+        assert tracer.getTraceEvents()[-1]["name"] == "double"
+    finally:
+        tracer.disable()
+        tracer.clear()
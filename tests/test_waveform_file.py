@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.waveform_file import (
+    write_waveform, open_waveform, read_waveform_header,
+    WaveformFileError, MAGIC, ALIGNMENT,
+)
+
+
+SAMPLERATE = 1500
+
+
+def make_samples(n: int = 10_000) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.uniform(-0.8, 0.8, n) * np.sin(np.linspace(0, 20, n))).astype(np.float32)
+
+
+def save(path, samples, dtype="float16", samplerate=SAMPLERATE):
+    with path.open("wb") as _f:
+        write_waveform(_f, samples, samplerate, dtype)
+
+
+
+def test_float16_is_memory_mapped(tmp_path):
+    path = tmp_path / "waveform.wf"
+    samples = make_samples()
+    save(path, samples)
+
+    loaded = open_waveform(path, SAMPLERATE)
+    assert type(loaded) is np.ndarray
+    assert isinstance(loaded.base, np.memmap)
+    assert loaded.dtype == np.float16
+    assert len(loaded) == len(samples)
+    assert np.allclose(loaded, samples, atol=1e-3)
+
+    with path.open("rb") as _f:
+        header = read_waveform_header(_f)
+        assert _f.tell() % ALIGNMENT == 0
+    assert header["dtype"] == "float16"
+    assert header["samplerate"] == SAMPLERATE
+
+
+def test_int8(tmp_path):
+    path = tmp_path / "waveform.wf"
+    samples = make_samples()
+    save(path, samples, dtype="int8")
+
+    assert path.stat().st_size <= len(samples) + 2 * ALIGNMENT
+    loaded = open_waveform(path, SAMPLERATE)
+    peak = np.max(np.abs(samples))
+    assert np.allclose(loaded, samples, atol=peak / 127)
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "waveform.wf"
+    save(path, np.zeros(0, dtype=np.float32))
+    assert len(open_waveform(path, SAMPLERATE)) == 0
+
+
+def test_samplerate_changed(tmp_path):
+    path = tmp_path / "waveform.wf"
+    save(path, make_samples(), samplerate=1000)
+    with pytest.raises(WaveformFileError):
+        open_waveform(path, SAMPLERATE)
+
+
+def test_unsupported_files(tmp_path):
+    # Legacy numpy file
+    path = tmp_path / "waveform.npy"
+    np.save(path, make_samples())
+    with pytest.raises(WaveformFileError):
+        open_waveform(path, SAMPLERATE)
+
+    # Unknown version
+    path = tmp_path / "future.wf"
+    header = json.dumps({"version": 99, "samplerate": SAMPLERATE, "dtype": "float16", "scale": 1.0, "length": 0})
+    path.write_bytes(MAGIC + len(header).to_bytes(2, "little") + header.encode())
+    with pytest.raises(WaveformFileError):
+        open_waveform(path, SAMPLERATE)
+
+    # Truncated file
+    path = tmp_path / "truncated.wf"
+    save(path, make_samples())
+    path.write_bytes(path.read_bytes()[:1000])
+    with pytest.raises(WaveformFileError):
+        open_waveform(path, SAMPLERATE)
@@ -0,0 +1,85 @@
+import threading
+
+from src.write_behind import WriteBehindQueue
+
+
+def _write_text(_f, text: str) -> None:
+    _f.write(text.encode("utf-8"))
+
+
+def test_write_behind_coalesce(tmp_path):
+    queue = WriteBehindQueue()
+    target = tmp_path / "scenes.tsv"
+    written = []
+
+    # Hold the I/O thread busy, so the next writes stay pending
+    release = threading.Event()
+    queue.submit(tmp_path / "busy", None, lambda _f, _: release.wait())
+
+    for i in range(10):
+        queue.submit(target, f"version {i}", _write_text, written.append)
+    assert queue.get_pending(target) == "version 9"
+    assert not target.exists()
+
+    release.set()
+    assert queue.flush(timeout=5.0)
+
+    assert target.read_text() == "version 9"
+    assert written == [target]
+    assert queue.get_pending(target) is None
+    assert not (tmp_path / "scenes.tsv.tmp").exists()
+    queue.shutdown()
+
+
+def test_write_behind_failed_write(tmp_path):
+    queue = WriteBehindQueue()
+    target = tmp_path / "waveform.npy"
+    target.write_text("previous")
+
+    def _fail(_f, data):
+        _f.write(b"partial")
+        raise ValueError("Serialization error")
+
+    queue.submit(target, None, _fail)
+    queue.shutdown()
+
+    # The previous file is left untouched
+    assert target.read_text() == "previous"
+    assert not (tmp_path / "waveform.npy.tmp").exists()
+
+
+def _write_lines(_f, lines) -> None:
+    _f.write(''.join(line + '\n' for line in lines).encode("utf-8"))
+
+
+def test_write_behind_append(tmp_path):
+    queue = WriteBehindQueue()
+    target = tmp_path / "transcription.tsv"
+
+    release = threading.Event()
+    queue.submit(tmp_path / "busy", None, lambda _f, _: release.wait())
+
+    # Appends are added to a pending rewrite
+    queue.submit(target, ("a", "b"), _write_lines)
+    queue.append(target, ["c"], _write_lines)
+    assert queue.get_pending(target) == ("a", "b", "c")
+    release.set()
+    assert queue.flush(timeout=5.0)
+    assert target.read_text() == "a\nb\nc\n"
+
+    # Pending appends are written together, at the end of the file
+    release.clear()
+    queue.submit(tmp_path / "busy", None, lambda _f, _: release.wait())
+    queue.append(target, ["d"], _write_lines)
+    queue.append(target, ["e", "f"], _write_lines)
+    assert queue.get_pending(target) is None
+    release.set()
+    assert queue.flush(timeout=5.0)
+    assert target.read_text() == "a\nb\nc\nd\ne\nf\n"
+
+    # Appends to a removed file are dropped
+    target.unlink()
+    queue.append(target, ["g"], _write_lines)
+    assert queue.flush(timeout=5.0)
+    assert not target.exists()
+    queue.shutdown()